@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark of the memory taken by the annotated CAST of the Bucky model and the
+CHIME examples in data/.
+
+For every file, the AnnCast passes are run up to and including
+LambdaExpressionPass, and this reports:
+    - the number of AnnCast nodes
+    - the bytes of the nodes themselves: the node objects, their __dict__s if
+      they have one, and the (shallow) lists, dicts and sets they hold
+    - the memory allocated by the passes that is still held afterwards, and the
+      peak memory allocated while they ran, measured with tracemalloc
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import os
+import sys
+import tracemalloc
+
+from skema.program_analysis.CAST2GrFN.ann_cast.annotated_cast import (
+    node_attributes,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.cast_to_annotated_cast import (
+    CastToAnnotatedCastVisitor,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.container_scope_pass import (
+    ContainerScopePass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.grfn_assignment_pass import (
+    GrfnAssignmentPass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.grfn_var_creation_pass import (
+    GrfnVarCreationPass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.id_collapse_pass import (
+    IdCollapsePass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.lambda_expression_pass import (
+    LambdaExpressionPass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.variable_version_pass import (
+    VariableVersionPass,
+)
+from skema.program_analysis.CAST2GrFN.model.cast import AstNode
+from skema.program_analysis.python2cast import python_to_cast
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+EXAMPLES = {
+    "Bucky": [
+        os.path.join(
+            DATA_DIR,
+            "epidemiology",
+            "Bucky",
+            "code",
+            "bucky_v2",
+            "model",
+            "main.py",
+        )
+    ],
+    "CHIME": [
+        os.path.join(DATA_DIR, "epidemiology", "CHIME", path)
+        for path in (
+            "CHIME_SIR_model/code/CHIME_SIR_while_loop.py",
+            "CHIME_SVIIvR_model/code/CHIME_SVIIvR.py",
+            "CHIME_SVIIvR_model/code/CHIME_SVIIvR_while_loop.py",
+        )
+    ],
+}
+
+PASSES = [
+    IdCollapsePass,
+    ContainerScopePass,
+    VariableVersionPass,
+    GrfnVarCreationPass,
+    GrfnAssignmentPass,
+    LambdaExpressionPass,
+]
+
+
+def node_sizes(nodes):
+    """Returns the number of AST nodes reachable from nodes, and their size in
+    bytes."""
+    seen = set()
+    count = 0
+    size = 0
+    stack = list(nodes)
+    while stack:
+        value = stack.pop()
+        if isinstance(value, AstNode):
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            count += 1
+            size += sys.getsizeof(value)
+            if getattr(value, "__dict__", None) is not None:
+                size += sys.getsizeof(value.__dict__)
+            for attribute in node_attributes(value).values():
+                if isinstance(attribute, (list, dict, set)):
+                    if id(attribute) not in seen:
+                        seen.add(id(attribute))
+                        size += sys.getsizeof(attribute)
+                stack.append(attribute)
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return count, size
+
+
+def benchmark(path: str):
+    with contextlib.redirect_stdout(io.StringIO()):
+        cast = python_to_cast(path, cast_obj=True)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            pipeline_state = CastToAnnotatedCastVisitor(
+                cast
+            ).generate_annotated_cast(False)
+            for ann_cast_pass in PASSES:
+                ann_cast_pass(pipeline_state)
+            gc.collect()
+            held, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    nodes, size = node_sizes(pipeline_state.nodes)
+    print(
+        f"{os.path.basename(path):<32}{nodes:>8}{size / 1024:>12.0f}"
+        f"{size / nodes:>8.0f}{held / 1024:>12.0f}{peak / 1024:>12.0f}"
+    )
+
+
+def main(examples):
+    print(
+        f"{'file':<32}{'nodes':>8}{'node KB':>12}{'B/node':>8}"
+        f"{'held KB':>12}{'peak KB':>12}"
+    )
+    for name in examples:
+        for path in EXAMPLES[name]:
+            benchmark(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--examples",
+        nargs="+",
+        choices=list(EXAMPLES),
+        default=list(EXAMPLES),
+        help="The examples to benchmark",
+    )
+    args = parser.parse_args()
+    main(args.examples)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark of the vectorized execution of a GrFN on arrays of samples.
+
+The GrFN is generated from one of the --model modules:
+    - sir-step: one step of the CHIME SIR model (get_beta and sir from
+      data/epidemiology/CHIME/CHIME_SIR_model/code/CHIME_SIR_while_loop.py),
+      with the intrinsic growth rate and the relative contact rate sampled
+    - threshold: a loop counting the days for infections to reach a
+      threshold, with the growth rate sampled, so that the samples leave the
+      loop after 15 to 700 iterations
+
+For every number of samples, this reports the seconds taken to execute the
+GrFN --calls times (the best of --repeat runs) when:
+    - per-sample: every lambda is called once per sample
+    - vectorized: the lambdas that numpy can evaluate are called once on the
+      arrays of samples
+    - compiled: the GrFN is compiled once into an ExecutionPlan, which is
+      called with the vectorized lambdas
+    - batched: the samples are split in chunks of --chunk-size samples,
+      executed by --workers processes (see execute_batched)
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from skema.program_analysis.python2cast import python_source_to_cast
+from skema.program_analysis.CAST2GrFN.ann_cast.cast_to_annotated_cast import (
+    CastToAnnotatedCastVisitor,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.pass_manager import (
+    PassManager,
+)
+
+CHIME_SIR_STEP = """
+def get_beta(intrinsic_growth_rate, gamma, susceptible, relative_contact_rate):
+    inv_contact_rate = 1.0 - relative_contact_rate
+    updated_growth_rate = intrinsic_growth_rate + gamma
+    beta = updated_growth_rate / susceptible * inv_contact_rate
+    return beta
+
+
+def sir(s, i, r, beta, gamma, n):
+    s_n = (-beta * s * i) + s
+    i_n = (beta * s * i - gamma * i) + i
+    r_n = gamma * i + r
+    scale = n / (s_n + i_n + r_n)
+    return i_n * scale
+
+
+infected = sir(
+    990.0, 10.0, 0.0, get_beta(0.19, 0.07, 990.0, 0.05), 0.07, 1000.0
+)
+"""
+
+THRESHOLD = """
+def days_to_threshold(growth_rate, threshold):
+    infected = 1.0
+    days = 0
+    while infected < threshold:
+        infected = infected * (1.0 + growth_rate)
+        days = days + 1
+    return days
+
+
+result = days_to_threshold(0.1, 1000.0)
+"""
+
+# The source of every model, and the sampled arguments of its calls with
+# their ranges
+MODELS = {
+    "sir-step": (
+        CHIME_SIR_STEP,
+        {
+            "get_beta_id1_call0_arg0": (0.1, 0.3),
+            "get_beta_id1_call0_arg3": (0.0, 0.5),
+        },
+    ),
+    "threshold": (
+        THRESHOLD,
+        {"days_to_threshold_id0_call0_arg0": (0.01, 0.5)},
+    ),
+}
+
+
+def model_grfn(model: str):
+    source, _ = MODELS[model]
+    with contextlib.redirect_stdout(io.StringIO()):
+        cast = python_source_to_cast(source, f"{model}.py")
+        pipeline_state = CastToAnnotatedCastVisitor(
+            cast
+        ).generate_annotated_cast(grfn_2_2=True)
+        PassManager("ToGrfnPass").run(pipeline_state)
+    return pipeline_state.get_grfn()
+
+
+def sample_inputs(model: str, grfn, size: int):
+    _, sampled_inputs = MODELS[model]
+    rng = np.random.default_rng(0)
+    inputs = {}
+    for identifier in grfn.input_names:
+        if identifier.var_name in sampled_inputs:
+            low, high = sampled_inputs[identifier.var_name]
+            inputs[str(identifier)] = rng.uniform(low, high, size)
+    return inputs
+
+
+def per_sample(grfn, chunk_size, workers):
+    for lambda_node in grfn.lambdas:
+        lambda_node.vectorizable = False
+    return grfn
+
+
+def vectorized(grfn, chunk_size, workers):
+    return grfn
+
+
+def compiled(grfn, chunk_size, workers):
+    return grfn.compile()
+
+
+def batched(grfn, chunk_size, workers):
+    return lambda inputs: grfn.execute_batched(inputs, chunk_size, workers)
+
+
+# The executors of the GrFN for every mode, given the chunk size and the
+# number of workers of the batched mode
+MODES = {
+    "per-sample": per_sample,
+    "vectorized": vectorized,
+    "compiled": compiled,
+    "batched": batched,
+}
+
+
+def benchmark(
+    model: str,
+    mode: str,
+    size: int,
+    repeat: int,
+    calls: int,
+    chunk_size: int,
+    workers: int,
+):
+    best = None
+    for _ in range(repeat):
+        # a new GrFN for every run, so that no run reuses the results or the
+        # settings of the previous one
+        grfn = model_grfn(model)
+        inputs = sample_inputs(model, grfn, size)
+        start = time.perf_counter()
+        execute = MODES[mode](grfn, chunk_size, workers)
+        for _ in range(calls):
+            execute(inputs)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main(model, modes, sizes, repeat, calls, chunk_size, workers):
+    print(f"{'samples':>10}" + "".join(f"{mode:>14}" for mode in modes))
+    for size in sizes:
+        seconds = [
+            benchmark(model, mode, size, repeat, calls, chunk_size, workers)
+            for mode in modes
+        ]
+        print(f"{size:>10}" + "".join(f"{s:>14.4f}" for s in seconds))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--model",
+        choices=list(MODELS),
+        default="sir-step",
+        help="The module the GrFN is generated from",
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=list(MODES),
+        default=list(MODES),
+        help="The ways of executing the GrFN to benchmark",
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=[1000, 10000, 100000],
+        help="The numbers of samples",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of times the GrFN is executed for every mode and size",
+    )
+    parser.add_argument(
+        "--calls",
+        type=int,
+        default=1,
+        help="Number of calls to the GrFN in every run, e.g. of a calibration",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=10000,
+        help="Number of samples of every chunk of the batched mode",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of processes of the batched mode, one per CPU if None",
+    )
+    args = parser.parse_args()
+    main(
+        args.model,
+        args.modes,
+        args.sizes,
+        args.repeat,
+        args.calls,
+        args.chunk_size,
+        args.workers,
+    )
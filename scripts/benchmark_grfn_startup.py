@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark of the start of the execution of a wide and deep synthetic GrFN.
+
+The GrFN is generated from a module that only calls a function `main`, which
+assigns --width literals, then computes --depths layers of variables, every
+variable being the sum of two variables of the previous layer. The number of
+paths from a literal to the output doubles with every layer.
+
+As the root subgraph of the GrFN has no lambda to execute, the execution
+starts from the literal with the longest path to an output. For every depth,
+this reports the seconds taken (the best of --repeat runs) to:
+    - simple-paths: choose that literal by enumerating the simple paths from
+      every literal to every output, as the execution used to
+    - distances: choose that literal from GroundedFunctionNetwork
+      .output_distances, as the execution does
+    - execute: execute the GrFN
+"""
+
+import argparse
+import contextlib
+import io
+import time
+from itertools import product
+
+from networkx.algorithms.simple_paths import all_simple_paths
+
+from skema.model_assembly.metadata import LambdaType
+from skema.model_assembly.networks import LambdaNode, VariableNode
+from skema.program_analysis.python2cast import python_source_to_cast
+from skema.program_analysis.CAST2GrFN.ann_cast.cast_to_annotated_cast import (
+    CastToAnnotatedCastVisitor,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.pass_manager import (
+    PassManager,
+)
+
+
+def lattice(width: int, depth: int) -> str:
+    lines = ["def main():"]
+    lines.extend(f"    x_0_{k} = {k}.0" for k in range(width))
+    for layer in range(1, depth + 1):
+        lines.extend(
+            f"    x_{layer}_{k} = x_{layer - 1}_{k} + "
+            f"x_{layer - 1}_{(k + 1) % width}"
+            for k in range(width)
+        )
+    total = " + ".join(f"x_{depth}_{k}" for k in range(width))
+    lines.append(f"    return {total}")
+    return "\n".join(lines) + "\n\n\nmain()\n"
+
+
+def lattice_grfn(width: int, depth: int):
+    with contextlib.redirect_stdout(io.StringIO()):
+        cast = python_source_to_cast(lattice(width, depth), "lattice.py")
+        pipeline_state = CastToAnnotatedCastVisitor(
+            cast
+        ).generate_annotated_cast(grfn_2_2=True)
+        PassManager("ToGrfnPass").run(pipeline_state)
+    return pipeline_state.get_grfn()
+
+
+def global_literals(grfn):
+    return [
+        n
+        for n in grfn.nodes
+        if isinstance(n, LambdaNode)
+        and grfn.in_degree(n) == 0
+        and n.func_type == LambdaType.LITERAL
+    ]
+
+
+def simple_paths(grfn):
+    outputs = [
+        n
+        for n in grfn.nodes
+        if isinstance(n, VariableNode) and grfn.out_degree(n) == 0
+    ]
+    distances = {}
+    for literal, output in product(global_literals(grfn), outputs):
+        # the execution failed on the outputs a literal has no path to
+        distances[literal] = max(
+            [distances.get(literal, 0)]
+            + [len(path) for path in all_simple_paths(grfn, literal, output)]
+        )
+    return max(distances, key=distances.get)
+
+
+def distances(grfn):
+    output_distances = grfn.output_distances()
+    return max(global_literals(grfn), key=output_distances.get)
+
+
+def execute(grfn):
+    return grfn({})
+
+
+MODES = {
+    "simple-paths": simple_paths,
+    "distances": distances,
+    "execute": execute,
+}
+
+
+def benchmark(mode: str, width: int, depth: int, repeat: int):
+    best = None
+    for _ in range(repeat):
+        grfn = lattice_grfn(width, depth)
+        start = time.perf_counter()
+        MODES[mode](grfn)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main(modes, width, depths, repeat):
+    print(f"{'depth':>8}" + "".join(f"{mode:>14}" for mode in modes))
+    for depth in depths:
+        seconds = [benchmark(mode, width, depth, repeat) for mode in modes]
+        print(f"{depth:>8}" + "".join(f"{s:>14.4f}" for s in seconds))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=list(MODES),
+        default=list(MODES),
+        help="The steps of the execution to benchmark",
+    )
+    parser.add_argument(
+        "--width",
+        type=int,
+        default=8,
+        help="The number of variables of every layer",
+    )
+    parser.add_argument(
+        "--depths",
+        nargs="+",
+        type=int,
+        default=[4, 8, 12],
+        help="The numbers of layers",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of times every step is run for every depth",
+    )
+    args = parser.parse_args()
+    main(args.modes, args.width, args.depths, args.repeat)
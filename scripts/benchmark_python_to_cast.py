@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark of the conversion of large synthetic Python modules to CAST.
+
+The modules are generated for every size given:
+    - statements: a module with that many assignment statements
+    - expression: an assignment of a sum of that many terms, which is an
+      expression nested that deep
+    - elif: an if statement with that many elif branches, which are if
+      statements nested that deep
+
+For every module, this reports the seconds taken by python_source_to_cast (the
+best of --repeat runs), or the error that stopped it.
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from skema.program_analysis.python2cast import python_source_to_cast
+
+
+def statements(size: int) -> str:
+    return "x = 0\n" + "".join(f"x = x + {i}\n" for i in range(size))
+
+
+def expression(size: int) -> str:
+    return "x = 1\ny = " + " + ".join(["x"] * size) + "\n"
+
+
+def elif_chain(size: int) -> str:
+    branches = "".join(
+        f"elif x == {i}:\n    y = {i}\n" for i in range(1, size)
+    )
+    return f"x = 1\nif x == 0:\n    y = 0\n{branches}else:\n    y = -1\n"
+
+
+MODULES = {
+    "statements": statements,
+    "expression": expression,
+    "elif": elif_chain,
+}
+
+
+def benchmark(name: str, size: int, repeat: int):
+    source = MODULES[name](size)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                python_source_to_cast(source, f"{name}.py")
+        except RecursionError:
+            print(f"{name:<12}{size:>8}{'RecursionError':>16}")
+            return
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    print(f"{name:<12}{size:>8}{best:>16.3f}")
+
+
+def main(modules, sizes, repeat):
+    print(f"{'module':<12}{'size':>8}{'seconds':>16}")
+    for name in modules:
+        for size in sizes:
+            benchmark(name, size, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--modules",
+        nargs="+",
+        choices=list(MODULES),
+        default=list(MODULES),
+        help="The synthetic modules to benchmark",
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=[500, 2000, 10000],
+        help="The sizes of the generated modules",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of times every module is converted",
+    )
+    args = parser.parse_args()
+    main(args.modules, args.sizes, args.repeat)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark of the compiled serializers in skema.utils.serializers against the
+generated to_dict of the GroMEt and CAST model classes, on the CHIME and Bucky
+examples in data/.
+
+For every example this times:
+    - to_dict of the GroMEt FN module collection
+    - decoding the GroMEt JSON into GroMEt objects, against a deserializer that
+      builds the objects through their generated __init__
+    - CAST.from_json_data on the CAST JSON of every file, against building the
+      nodes with node_type(**fields)
+    - decoding the GroMEt collection packed with skema.utils.packing, against
+      json.loads of its JSON, with and without compression
+"""
+
+import argparse
+import contextlib
+import functools
+import gc
+import io
+import json
+import os
+import time
+
+from skema.gromet.fn import GrometFNModuleCollection
+from skema.program_analysis.CAST2GrFN.cast import CAST
+from skema.program_analysis.multi_file_ingester import build_module_collection
+from skema.program_analysis.python2cast import python_to_cast
+from skema.utils import packing
+from skema.utils.fold import gromet_to_json
+from skema.utils.serializers import (
+    CAST_SCHEMA,
+    GROMET_SCHEMA,
+    LIST_TYPE,
+    PRIMITIVE_TYPES,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+EXAMPLES = {
+    "CHIME": (
+        os.path.join(DATA_DIR, "epidemiology", "CHIME"),
+        [
+            "CHIME_SIR_model/code/CHIME_SIR_while_loop.py",
+            "CHIME_SVIIvR_model/code/CHIME_SVIIvR.py",
+            "CHIME_SVIIvR_model/code/CHIME_SVIIvR_while_loop.py",
+        ],
+    ),
+    "Bucky": (
+        os.path.join(DATA_DIR, "epidemiology", "Bucky", "code", "bucky_v2"),
+        os.path.join(
+            DATA_DIR, "epidemiology", "Bucky", "code", "system_filepaths.txt"
+        ),
+    ),
+}
+
+
+def best_time(function, repeat: int) -> float:
+    """Returns the fastest of repeat runs of function, in seconds. Like timeit,
+    the garbage collector is disabled while timing."""
+    times = []
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return min(times)
+
+
+# Type names are only resolved once, as a client with a table of the models
+# would
+resolve_type = functools.lru_cache(maxsize=None)(GROMET_SCHEMA.resolve)
+
+
+def generic_from_dict(cls, data):
+    """Decodes a GroMEt object the way the swagger-codegen client does: decode
+    the value of every attribute, then pass them all to __init__."""
+    field, classes = GROMET_SCHEMA.discriminators.get(cls, (None, {}))
+    cls = classes.get(data.get(field), cls)
+
+    def decode(value, type_name):
+        match = LIST_TYPE.match(type_name)
+        if match and isinstance(value, list):
+            return [decode(x, match.group(1)) for x in value]
+        elif type_name in PRIMITIVE_TYPES or not isinstance(value, dict):
+            return value
+        model = resolve_type(type_name, cls)
+        return generic_from_dict(model, value) if model else value
+
+    kwargs = {}
+    for attr, type_name in cls.swagger_types.items():
+        if attr in data:
+            kwargs[attr] = decode(data[attr], type_name)
+    if cls.__name__ == "TypedValue" and isinstance(kwargs.get("value"), dict):
+        type_name = {"FN": "GrometFN", "IMPORT": "ImportReference"}.get(
+            data.get("type")
+        )
+        if type_name:
+            kwargs["value"] = decode(data["value"], type_name)
+
+    obj = cls(**kwargs)
+    for key, value in data.items():
+        if key not in cls.swagger_types:
+            setattr(obj, key, value)
+    return obj
+
+
+def load_example(root_dir: str, files):
+    """Runs the pipeline on an example. Returns its GroMEt FN module
+    collection and the CAST JSON of each file."""
+    if isinstance(files, str):
+        with open(files) as f:
+            files = [line.strip() for line in f if line.strip()]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        collection = build_module_collection("benchmark", root_dir, files)
+        cast_json = [
+            python_to_cast(
+                os.path.join(root_dir, f), cast_obj=True
+            ).to_json_object()
+            for f in files
+        ]
+
+    # Round trip the JSON, so that the inputs are plain JSON values
+    return collection, json.loads(json.dumps(cast_json))
+
+
+def benchmark(name: str, root_dir: str, files, repeat: int):
+    collection, cast_json = load_example(root_dir, files)
+    gromet_json = json.loads(gromet_to_json(collection))
+
+    # to_dict
+    compiled_dict = collection.to_dict()
+    compiled = best_time(collection.to_dict, repeat)
+    GROMET_SCHEMA.use_compiled(False)
+    CAST_SCHEMA.use_compiled(False)
+    try:
+        assert collection.to_dict() == compiled_dict
+        generated = best_time(collection.to_dict, repeat)
+    finally:
+        GROMET_SCHEMA.use_compiled(True)
+        CAST_SCHEMA.use_compiled(True)
+    print_row(name, "to_dict", generated, compiled)
+
+    # GroMEt JSON -> GroMEt objects
+    decoded = GrometFNModuleCollection.from_dict(gromet_json)
+    assert decoded == generic_from_dict(GrometFNModuleCollection, gromet_json)
+    compiled = best_time(
+        lambda: GrometFNModuleCollection.from_dict(gromet_json), repeat
+    )
+    generated = best_time(
+        lambda: generic_from_dict(GrometFNModuleCollection, gromet_json),
+        repeat,
+    )
+    print_row(name, "from_dict", generated, compiled)
+
+    # CAST JSON -> CAST
+    def parse_cast():
+        return [CAST.from_json_data(c).nodes for c in cast_json]
+
+    compiled_nodes = parse_cast()
+    compiled = best_time(parse_cast, repeat)
+    CAST_SCHEMA.construct = lambda cls, fields: cls(**fields)
+    try:
+        assert parse_cast() == compiled_nodes
+        generated = best_time(parse_cast, repeat)
+    finally:
+        del CAST_SCHEMA.construct
+    print_row(name, "parse_cast_json", generated, compiled)
+
+    # Packed GroMEt -> JSON values
+    text = gromet_to_json(collection)
+    baseline = best_time(lambda: json.loads(text), repeat)
+    for operation, compress in (
+        ("unpack", True),
+        ("unpack_plain", False),
+    ):
+        data = packing.dumps(collection, compress)
+        assert packing.unpack_document(data)["data"] == json.loads(text)
+        packed = best_time(lambda: packing.unpack_document(data), repeat)
+        print_row(name, operation, baseline, packed)
+        print(
+            f"{'':<8}{'':<18}{len(text) / 1024:>10.0f}KB"
+            f"{len(data) / 1024:>10.0f}KB"
+        )
+
+
+def print_row(example, operation, generated, compiled):
+    print(
+        f"{example:<8}{operation:<18}{generated * 1000:>12.1f}"
+        f"{compiled * 1000:>12.1f}{generated / compiled:>9.1f}x"
+    )
+
+
+def main(examples, repeat: int):
+    print(
+        f"{'example':<8}{'operation':<18}{'baseline ms':>12}"
+        f"{'new ms':>12}{'speedup':>10}"
+    )
+    for name in examples:
+        root_dir, files = EXAMPLES[name]
+        benchmark(name, root_dir, files, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--examples",
+        nargs="+",
+        choices=list(EXAMPLES),
+        default=list(EXAMPLES),
+        help="The examples to benchmark",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="The number of runs to take the best time of",
+    )
+    args = parser.parse_args()
+    main(args.examples, args.repeat)
@@ -1,12 +1,35 @@
+import asyncio
 import os
-import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import List
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
-from skema.program_analysis.multi_file_ingester import process_file_system
-from skema.utils.fold import dictionary_to_gromet_json, del_nulls
+from skema.program_analysis.multi_file_ingester import process_file_sources
+from skema.utils.fold import gromet_to_json
+from skema.utils.pipeline_metrics import (
+    PipelineInstrumentation,
+    format_prometheus,
+)
+
+# Number of worker processes that run the program analysis pipeline
+WORKERS = int(os.environ.get("CODE2FN_WORKERS", os.cpu_count() or 1))
+
+# Maximum number of requests waiting for a free worker. Requests that arrive
+# when the queue is full are rejected with a 503, so that a few large systems
+# cannot make the service unresponsive.
+MAX_QUEUE_SIZE = int(os.environ.get("CODE2FN_MAX_QUEUE_SIZE", 2 * WORKERS))
+
+# Value of the Retry-After header (in seconds) sent with a 503
+RETRY_AFTER = int(os.environ.get("CODE2FN_RETRY_AFTER", 10))
+
+# If set, the peak memory allocated by every pass is measured with tracemalloc,
+# which makes the passes several times slower
+TRACE_MEMORY = os.environ.get("CODE2FN_TRACE_MEMORY", "") not in ("", "0")
 
 
 class System(BaseModel):
@@ -16,7 +39,164 @@ class System(BaseModel):
     root_name: str
 
 
+class Metrics:
+    """Queue depth, request counts, cumulative per-stage timings and
+    per-pass metrics of the service."""
+
+    def __init__(self):
+        self.queued = 0
+        self.running = 0
+        self.requests = 0
+        self.rejected = 0
+        self.failed = 0
+        self.restarts = 0
+        self.stages = {}
+        self.passes = {}
+
+    def record_stage(self, stage: str, seconds: float):
+        timing = self.stages.setdefault(
+            stage, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+        )
+        timing["count"] += 1
+        timing["total_seconds"] += seconds
+        timing["max_seconds"] = max(timing["max_seconds"], seconds)
+
+    def record_pass(self, record: dict):
+        """Adds a record of a PipelineInstrumentation to the totals of its
+        pass."""
+        totals = self.passes.setdefault(
+            record["pass"],
+            {
+                "count": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+                "total_nodes": 0,
+                "max_peak_memory_bytes": None,
+            },
+        )
+        totals["count"] += 1
+        totals["total_seconds"] += record["seconds"]
+        totals["max_seconds"] = max(totals["max_seconds"], record["seconds"])
+        totals["total_nodes"] += record["nodes"] or 0
+        if record["peak_memory_bytes"] is not None:
+            totals["max_peak_memory_bytes"] = max(
+                totals["max_peak_memory_bytes"] or 0,
+                record["peak_memory_bytes"],
+            )
+
+    def to_dict(self):
+        return {
+            "workers": WORKERS,
+            "max_queue_size": MAX_QUEUE_SIZE,
+            "queue_depth": self.queued,
+            "running": self.running,
+            "requests_total": self.requests,
+            "rejected_total": self.rejected,
+            "failed_total": self.failed,
+            "worker_restarts_total": self.restarts,
+            "stages": self.stages,
+            "passes": self.passes,
+        }
+
+    def to_prometheus(self) -> str:
+        metrics = [
+            ("workers", "Number of worker processes", "gauge", WORKERS),
+            ("max_queue_size", "Queue capacity", "gauge", MAX_QUEUE_SIZE),
+            ("queue_depth", "Queued requests", "gauge", self.queued),
+            ("running", "Requests being processed", "gauge", self.running),
+            ("requests_total", "Accepted requests", "counter", self.requests),
+            ("rejected_total", "Rejected requests", "counter", self.rejected),
+            ("failed_total", "Failed requests", "counter", self.failed),
+            (
+                "worker_restarts_total",
+                "Restarts of the worker pool",
+                "counter",
+                self.restarts,
+            ),
+        ]
+        metrics = [
+            (f"code2fn_{name}", description, metric_type, [({}, value)])
+            for name, description, metric_type, value in metrics
+        ]
+
+        # One metric per statistic, labelled with the stage or pass
+        for kind, totals in (("stage", self.stages), ("pass", self.passes)):
+            statistics = next(iter(totals.values()), {})
+            for statistic in statistics:
+                metrics.append(
+                    (
+                        f"code2fn_{kind}_{statistic}",
+                        f"{statistic.replace('_', ' ')} of each {kind}",
+                        "gauge" if statistic.startswith("max") else "counter",
+                        [
+                            ({kind: name}, values[statistic])
+                            for name, values in totals.items()
+                        ],
+                    )
+                )
+        return format_prometheus(metrics)
+
+
+def run_pipeline(system: dict):
+    """Runs the Code2FN pipeline on a system. This runs in a worker process of
+    the pool, so it takes and returns plain Python objects.
+
+    Returns:
+        The GroMEt FN module collection JSON, a dict mapping each stage of the
+        pipeline to the time (in seconds) it took, and the records of the
+        passes run on every file (see PipelineInstrumentation).
+    """
+    timings = {}
+    instrumentation = PipelineInstrumentation(trace_memory=TRACE_MEMORY)
+
+    ## Run pipeline
+    # The files are passed to the pipeline directly, without recreating the
+    # module structure on disk
+    start = time.perf_counter()
+    gromet_collection = process_file_sources(
+        system["system_name"],
+        system["root_name"],
+        list(zip(system["files"], system["blobs"])),
+        instrumentation=instrumentation,
+    )
+    timings["pipeline"] = time.perf_counter() - start
+
+    # Convert output to json
+    start = time.perf_counter()
+    gromet_json = gromet_to_json(gromet_collection)
+    timings["serialize"] = time.perf_counter() - start
+
+    return gromet_json, timings, instrumentation.records
+
+
 app = FastAPI()
+metrics = Metrics()
+executor: ProcessPoolExecutor = None
+worker_slots: asyncio.Semaphore = None
+
+
+@app.on_event("startup")
+async def start_worker_pool():
+    global executor, worker_slots
+    executor = ProcessPoolExecutor(max_workers=WORKERS)
+    worker_slots = asyncio.Semaphore(WORKERS)
+
+
+@app.on_event("shutdown")
+def stop_worker_pool():
+    executor.shutdown()
+
+
+def restart_worker_pool(broken: ProcessPoolExecutor):
+    """Replaces a worker pool that one of its processes died in (e.g. killed
+    by the OOM killer), which fails every later request sent to it. All the
+    requests running in the pool fail with it, so only the first of them
+    replaces it."""
+    global executor
+    if executor is broken:
+        broken.shutdown(wait=False)
+        executor = ProcessPoolExecutor(max_workers=WORKERS)
+        metrics.restarts += 1
 
 
 @app.get("/ping", summary="Ping endpoint to test health of service")
@@ -24,6 +204,20 @@ def ping():
     return "The Code2FN service is running."
 
 
+@app.get(
+    "/metrics",
+    summary=(
+        "Queue depth, request counts, per-stage timings and per-pass metrics"
+        " of the service, as JSON or (with format=prometheus) in the"
+        " Prometheus text format"
+    ),
+)
+def get_metrics(format: str = "json"):
+    if format == "prometheus":
+        return PlainTextResponse(metrics.to_prometheus())
+    return metrics.to_dict()
+
+
 @app.post(
     "/fn-given-filepaths",
     summary=(
@@ -32,28 +226,49 @@ def ping():
     ),
 )
 async def root(system: System):
-    # Create a tempory directory to store module
-    with tempfile.TemporaryDirectory() as tmp:
-        # Recreate module structure
-        for index, file in enumerate(system.files):
-            full_path = os.path.join(tmp, system.root_name, file)
-            # Create file and intermediate directories first
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            with open(full_path, "w") as f:
-                f.write(system.blobs[index])
-
-        # Create system_filepaths.txt file
-        system_filepaths = os.path.join(tmp, "system_filepaths.txt")
-        with open(system_filepaths, "w") as f:
-            f.writelines(file + "\n" for file in system.files)
-
-        ## Run pipeline
-        gromet_collection = process_file_system(
-            system.system_name,
-            os.path.join(tmp, system.root_name),
-            system_filepaths,
+    # Apply backpressure when every worker is busy and the queue is full
+    if worker_slots.locked() and metrics.queued >= MAX_QUEUE_SIZE:
+        metrics.rejected += 1
+        raise HTTPException(
+            status_code=503,
+            detail="The Code2FN service is at capacity, try again later.",
+            headers={"Retry-After": str(RETRY_AFTER)},
         )
 
-    # Convert output to json
-    gromet_collection_dict = gromet_collection.to_dict()
-    return dictionary_to_gromet_json(del_nulls(gromet_collection_dict))
+    metrics.requests += 1
+    metrics.queued += 1
+    start = time.perf_counter()
+    try:
+        await worker_slots.acquire()
+    finally:
+        metrics.queued -= 1
+    metrics.record_stage("queue_wait", time.perf_counter() - start)
+
+    metrics.running += 1
+    pool = executor
+    try:
+        # The pipeline is CPU bound, so it runs in the worker pool to keep the
+        # event loop free to answer other requests
+        loop = asyncio.get_running_loop()
+        gromet_json, timings, pass_records = await loop.run_in_executor(
+            pool, run_pipeline, system.dict()
+        )
+    except BrokenProcessPool:
+        metrics.failed += 1
+        restart_worker_pool(pool)
+        raise HTTPException(
+            status_code=500,
+            detail="A worker process of the Code2FN service died.",
+        )
+    except Exception:
+        metrics.failed += 1
+        raise
+    finally:
+        metrics.running -= 1
+        worker_slots.release()
+
+    for stage, seconds in timings.items():
+        metrics.record_stage(stage, seconds)
+    for record in pass_records:
+        metrics.record_pass(record)
+    return gromet_json
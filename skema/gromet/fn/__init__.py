@@ -35,3 +35,21 @@ from skema.gromet.fn.literal_value import LiteralValue
 # from skema.gromet.fn.metadata import Metadata
 from skema.gromet.fn.source_type import SourceType
 from skema.gromet.fn.typed_value import TypedValue
+
+# Use the compiled to_dict and from_dict of skema.utils.serializers
+from skema.utils.serializers import GROMET_SCHEMA
+
+GROMET_SCHEMA.install(__name__)
+
+
+def decode_typed_value(value, data):
+    """The type of TypedValue.value is given by TypedValue.type"""
+    if isinstance(value, dict):
+        if data.get("type") == "FN":
+            return GROMET_SCHEMA.from_dict(GrometFN, value)
+        elif data.get("type") == "IMPORT":
+            return GROMET_SCHEMA.from_dict(ImportReference, value)
+    return value
+
+
+GROMET_SCHEMA.add_field_decoder(TypedValue, "value", decode_typed_value)
@@ -52,3 +52,15 @@ from skema.gromet.metadata.textual_document_collection import (
 from skema.gromet.metadata.textual_document_reference import (
     TextualDocumentReference,
 )
+
+# Use the compiled to_dict and from_dict of skema.utils.serializers
+from skema.utils.serializers import GROMET_SCHEMA
+
+GROMET_SCHEMA.install(__name__)
+
+# Metadata is decoded as the subclass that its metadata_type names
+GROMET_SCHEMA.add_discriminator(
+    Metadata,
+    "metadata_type",
+    aliases={"equation_parameter": EquationLiteralValue},
+)
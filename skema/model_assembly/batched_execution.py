@@ -0,0 +1,140 @@
+"""
+Execution of a GroundedFunctionNetwork on large arrays of samples, split in
+chunks of samples that a pool of worker processes execute.
+
+Every worker process re-creates the GrFN from its dict (see
+GroundedFunctionNetwork.to_dict) once, when it starts, and compiles it into
+an ExecutionPlan. The tasks sent to the workers only hold the chunks of the
+inputs. The outputs of the chunks are returned in the order of the samples,
+as the workers compute them, with a bounded number of chunks in flight.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+from .execution_plan import ExecutionPlan
+from .structures import GrFNExecutionException
+
+# Number of chunks submitted per worker ahead of the outputs being consumed
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# The compiled GrFN of a worker process, see init_worker
+worker_execute = None
+
+
+def compile_or_call(grfn):
+    """The ExecutionPlan of grfn, or grfn itself if it cannot be compiled
+    (e.g. its loops are not GrFN 2.2 loops)"""
+    try:
+        return ExecutionPlan(grfn)
+    except GrFNExecutionException:
+        return grfn
+
+
+def init_worker(grfn_class: type, grfn_dict: Dict):
+    global worker_execute
+    worker_execute = compile_or_call(grfn_class.from_dict(grfn_dict))
+
+
+def execute_chunk(
+    inputs: Dict[str, Any],
+    literals: Dict[str, Any],
+    desired_outputs: List[str],
+) -> Dict[str, Any]:
+    return worker_execute(inputs, literals, desired_outputs)
+
+
+def is_sampled(value) -> bool:
+    return isinstance(value, np.ndarray) and value.ndim > 0
+
+
+def chunk_inputs(
+    inputs: Dict[str, Any], chunk_size: int
+) -> Iterator[Dict[str, Any]]:
+    """
+    Splits the arrays in inputs along their first (sample) dimension, in
+    chunks of chunk_size samples. The other inputs are the same for every
+    chunk. Raises a GrFNExecutionException if the arrays do not have the
+    same number of samples.
+    """
+    counts = {len(v) for v in inputs.values() if is_sampled(v)}
+    if len(counts) != 1:
+        raise GrFNExecutionException(
+            "Error: batched execution needs input arrays with the same"
+            + f" number of samples, found {sorted(counts)}"
+        )
+    (count,) = counts
+    for start in range(0, count, chunk_size):
+        yield {
+            name: value[start : start + chunk_size]
+            if is_sampled(value)
+            else value
+            for name, value in inputs.items()
+        }
+
+
+def iter_batched(
+    grfn,
+    inputs: Dict[str, Any],
+    chunk_size: int,
+    workers: int = None,
+    literals: Dict[str, Any] = None,
+    desired_outputs: List[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Executes grfn on chunks of chunk_size samples of the inputs, in `workers`
+    processes (one per CPU if None), and yields the outputs of every chunk,
+    in order. With one worker, the chunks are executed in this process.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    chunks = chunk_inputs(inputs, chunk_size)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        execute = compile_or_call(grfn)
+        for chunk in chunks:
+            yield execute(chunk, literals, desired_outputs)
+        return
+
+    with ProcessPoolExecutor(
+        workers,
+        initializer=init_worker,
+        initargs=(type(grfn), grfn.to_dict()),
+    ) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(
+                pool.submit(execute_chunk, chunk, literals, desired_outputs)
+            )
+            if len(pending) >= CHUNKS_IN_FLIGHT_PER_WORKER * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def concatenate_outputs(
+    chunk_outputs: Iterator[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Puts together the outputs of the chunks of samples, in order. The values
+    of an output are concatenated into an array if they are arrays for every
+    chunk, a list otherwise, and None if the output is None for a chunk.
+    """
+    values = dict()
+    for outputs in chunk_outputs:
+        for name, value in outputs.items():
+            values.setdefault(name, []).append(value)
+
+    concatenated = dict()
+    for name, chunks in values.items():
+        if any(chunk is None for chunk in chunks):
+            concatenated[name] = None
+        elif all(isinstance(chunk, np.ndarray) for chunk in chunks):
+            concatenated[name] = np.concatenate(chunks)
+        else:
+            concatenated[name] = [v for chunk in chunks for v in chunk]
+    return concatenated
@@ -0,0 +1,453 @@
+"""
+Compiled execution of a GroundedFunctionNetwork.
+
+Calling a GroundedFunctionNetwork searches, every time, for the hyper edges
+whose inputs have been computed, resolves the interfaces of the subgraphs as
+it enters them, and stores the values on the variable nodes. An ExecutionPlan
+does the scheduling once: it holds the hyper edges in an order in which they
+can be executed, with their variables replaced by indices (slots) in the list
+of values of an execution. Calling the plan binds the inputs to their slots
+and runs the steps.
+
+A loop subgraph, with the subgraphs in it, is compiled into a LoopStep. Every
+iteration runs the steps computing the loop condition, then the rest of the
+steps for the samples whose condition holds. The samples that left the loop
+are removed from the arrays of the loop, and their values are put back in
+place once all of them left it.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import networkx as nx
+import numpy as np
+
+from .metadata import LambdaType
+from .structures import GrFNExecutionException
+
+LOOP_CONTAINER = "LoopContainer"
+
+
+def take(value, positions: np.ndarray):
+    """The values of the samples at `positions` in `value`. A value that is
+    not set, or shared by all samples, is returned as is."""
+    if value is None or len(value) == 1:
+        return value
+    if isinstance(value, np.ndarray):
+        return value[positions]
+    return [value[p] for p in positions]
+
+
+def scatter(count: int, pieces: List[Tuple[np.ndarray, Any]]):
+    """
+    Puts together the values of `count` samples from the (positions, values)
+    pieces that hold the values of the samples at positions. The values are an
+    array if all of the pieces are arrays, and a list otherwise.
+    """
+    if len(pieces) == 1 and len(pieces[0][0]) == count:
+        return pieces[0][1]
+    if all(isinstance(value, np.ndarray) for _, value in pieces):
+        result = np.empty(
+            (count,) + pieces[0][1].shape[1:],
+            dtype=np.result_type(*[value for _, value in pieces]),
+        )
+        for positions, value in pieces:
+            result[positions] = value
+        return result
+
+    result = [None] * count
+    for positions, value in pieces:
+        if value is None or len(value) == 1:
+            value = [None if value is None else value[0]] * len(positions)
+        for position, sample in zip(positions, value):
+            result[position] = sample
+    return result
+
+
+@dataclass
+class PlanState:
+    """
+    The values of an execution of an ExecutionPlan, by slot. `bound` holds
+    the values of the inputs and literals given to the execution, for all the
+    samples. `positions` are the positions in the inputs of the samples the
+    steps are run for (None for all of them), and `shape` the shape of their
+    arrays.
+    """
+
+    values: List[Any]
+    bound: Dict[int, Any]
+    positions: Optional[np.ndarray]
+    shape: Tuple[int, ...]
+
+
+@dataclass
+class LambdaStep:
+    """Calls the lambda of a hyper edge on the values in the `inputs` slots,
+    and stores its outputs in the `outputs` slots."""
+
+    lambda_fn: Any
+    inputs: Tuple[int, ...]
+    outputs: Tuple[int, ...]
+
+    def __call__(self, state: PlanState):
+        values = state.values
+        if self.lambda_fn.func_type == LambdaType.LITERAL and all(
+            slot in state.bound for slot in self.outputs
+        ):
+            # the literal is given a value by the inputs or literals
+            for slot in self.outputs:
+                values[slot] = state.bound[slot]
+                if state.positions is not None:
+                    values[slot] = take(values[slot], state.positions)
+            return
+
+        if len(self.inputs) == 0:
+            self.lambda_fn.np_shape = state.shape
+        result = self.lambda_fn(
+            *[
+                values[slot] if values[slot] is not None else [None]
+                for slot in self.inputs
+            ]
+        )
+        if len(result) != len(self.outputs):
+            raise GrFNExecutionException(
+                f"Error: {len(result)} values for the {len(self.outputs)} "
+                f"outputs of lambda:\n{self.lambda_fn.func_str}"
+            )
+        for slot, value in zip(self.outputs, result):
+            values[slot] = value
+
+
+@dataclass
+class LoopStep:
+    """
+    Executes the steps of a loop subgraph. `init` are the slots of the values
+    the loop `variables` take before the loop, and `updates` the slots of
+    their values at the end of the loop body. `condition` is the slot of the
+    loop condition, computed by `condition_steps`. `external` are the slots
+    that the steps of the loop read, and that are set before the loop.
+    `exit` is the output interface of the loop.
+    """
+
+    init: Tuple[int, ...]
+    variables: Tuple[int, ...]
+    updates: Tuple[int, ...]
+    condition: int
+    condition_steps: List[Any]
+    body_steps: List[Any]
+    external: Tuple[int, ...]
+    exit: LambdaStep
+
+    def __call__(self, state: PlanState):
+        values = state.values
+        entry_positions, entry_shape = state.positions, state.shape
+        external = {slot: values[slot] for slot in self.external}
+        for init, variable in zip(self.init, self.variables):
+            values[variable] = values[init]
+        # slots that the rest of the iteration reads, and that are computed
+        # for all the samples in the loop before the condition is checked
+        checked = list(self.variables) + [
+            slot for step in self.condition_steps for slot in step.outputs
+        ]
+
+        # the positions, in the arrays of the values before the loop, of the
+        # samples still in the loop
+        in_loop = np.arange(entry_shape[0])
+        exits = []
+        while True:
+            for step in self.condition_steps:
+                step(state)
+            holds = np.asarray(values[self.condition], dtype=bool)
+            if holds.ndim != 1:
+                raise GrFNExecutionException(
+                    f"Error: loop condition of shape {holds.shape} is not "
+                    "one value per sample"
+                )
+            holds = np.broadcast_to(holds, in_loop.shape)
+
+            if not holds.all():
+                done = np.flatnonzero(~holds)
+                exits.append(
+                    (
+                        in_loop[done],
+                        [take(values[slot], done) for slot in self.variables],
+                    )
+                )
+                kept = np.flatnonzero(holds)
+                in_loop = in_loop[kept]
+                if len(in_loop) == 0:
+                    break
+                for slot in checked:
+                    values[slot] = take(values[slot], kept)
+                for slot, value in external.items():
+                    values[slot] = take(value, in_loop)
+                state.positions = (
+                    in_loop
+                    if entry_positions is None
+                    else entry_positions[in_loop]
+                )
+                state.shape = (len(in_loop),) + entry_shape[1:]
+
+            for step in self.body_steps:
+                step(state)
+            for variable, update in zip(self.variables, self.updates):
+                values[variable] = values[update]
+
+        state.positions, state.shape = entry_positions, entry_shape
+        for slot, value in external.items():
+            values[slot] = value
+        for i, variable in enumerate(self.variables):
+            values[variable] = scatter(
+                entry_shape[0],
+                [(positions, exited[i]) for positions, exited in exits],
+            )
+        self.exit(state)
+
+    @property
+    def outputs(self) -> Tuple[int, ...]:
+        return self.exit.outputs
+
+
+@dataclass
+class Unit:
+    """A step to schedule, with the slots it reads and writes"""
+
+    step: Any
+    reads: Set[int]
+    writes: Set[int]
+
+
+class ExecutionPlan:
+    def __init__(self, grfn, loop=None):
+        """
+        Compiles `grfn` into steps executing its hyper edges, or only the
+        hyper edges of the loop subgraph `loop` if given. The plan does not
+        follow later changes of the GrFN.
+        Raises a GrFNExecutionException if the hyper edges outside of the
+        loops have a cycle, or a loop does not have the GrFN 2.2 loop
+        interfaces.
+        """
+        self.grfn = grfn
+        self.slots = {var: i for i, var in enumerate(grfn.variables)}
+        self.outputs = [
+            (output.identifier.var_name, self.slots[output])
+            for output in grfn.outputs
+        ]
+
+        lambdas = {edge.lambda_fn for edge in grfn.hyper_edges}
+        subgraph_of = {
+            node: subgraph
+            for subgraph in grfn.subgraphs
+            for node in subgraph.nodes
+            if node in lambdas
+        }
+        # the hyper edges of every loop subgraph, and of the top level (None),
+        # that are not in a loop nested in it
+        self.scope_edges = {None: []}
+        self.nested_loops = {None: []}
+        for subgraph in grfn.subgraphs:
+            if subgraph.type == LOOP_CONTAINER:
+                self.scope_edges[subgraph] = []
+                self.nested_loops[subgraph] = []
+                self.nested_loops[self.enclosing_loop(subgraph)].append(
+                    subgraph
+                )
+        for edge in grfn.hyper_edges:
+            subgraph = subgraph_of[edge.lambda_fn]
+            scope = subgraph if subgraph in self.scope_edges else None
+            if scope is None:
+                scope = self.enclosing_loop(subgraph)
+            self.scope_edges[scope].append(edge)
+
+        if loop is not None:
+            self.steps = [self.loop_unit(loop).step]
+            return
+        units = [self.edge_unit(e) for e in self.scope_edges[None]]
+        units.extend(self.loop_unit(l) for l in self.nested_loops[None])
+        self.steps = [units[i].step for i in self.schedule(units)[1]]
+
+    def enclosing_loop(self, subgraph):
+        """The innermost loop subgraph that `subgraph` is nested in, or None
+        at the top level"""
+        while True:
+            parents = list(self.grfn.subgraphs.predecessors(subgraph))
+            if len(parents) == 0:
+                return None
+            subgraph = parents[0]
+            if subgraph.type == LOOP_CONTAINER:
+                return subgraph
+
+    def edge_unit(self, edge) -> Unit:
+        inputs = tuple(self.slots[var] for var in edge.inputs)
+        outputs = tuple(self.slots[var] for var in edge.outputs)
+        return Unit(
+            LambdaStep(edge.lambda_fn, inputs, outputs),
+            set(inputs),
+            set(outputs),
+        )
+
+    def schedule(self, units: List[Unit]):
+        """
+        Returns the graph of the dependencies between the units, and an order
+        in which they can be executed, which keeps the order of the units
+        that do not depend on each other.
+        """
+        producers = {
+            slot: i for i, unit in enumerate(units) for slot in unit.writes
+        }
+        graph = nx.DiGraph()
+        graph.add_nodes_from(range(len(units)))
+        graph.add_edges_from(
+            (producers[slot], i)
+            for i, unit in enumerate(units)
+            for slot in unit.reads
+            if slot in producers and producers[slot] != i
+        )
+        try:
+            order = list(nx.lexicographical_topological_sort(graph))
+        except nx.NetworkXUnfeasible:
+            raise GrFNExecutionException(
+                "Error: cycle between hyper edges outside of the loops"
+            )
+        return graph, order
+
+    def loop_unit(self, loop) -> Unit:
+        edges = self.scope_edges[loop]
+        direct = [edge for edge in edges if edge.lambda_fn in loop.nodes]
+        tops = [
+            edge
+            for edge in direct
+            if edge.lambda_fn.func_type == LambdaType.LOOP_TOP_INTERFACE
+        ]
+        conditions = [
+            edge
+            for edge in direct
+            if edge.lambda_fn.func_type == LambdaType.CONDITION
+        ]
+        if len(tops) != 1 or len(conditions) != 1:
+            raise GrFNExecutionException(
+                f"Error: loop {loop} has {len(tops)} top interfaces and "
+                f"{len(conditions)} conditions, expected one of each"
+            )
+        top = tops[0]
+        exit_edge = loop.get_output_interface_node(direct)
+        init, variables, updates = self.loop_variables(loop, top)
+
+        units = [
+            self.edge_unit(edge)
+            for edge in edges
+            if edge is not top and edge is not exit_edge
+        ]
+        units.extend(self.loop_unit(l) for l in self.nested_loops[loop])
+        graph, order = self.schedule(units)
+        condition = self.slots[conditions[0].outputs[0]]
+        condition_unit = next(
+            i for i, unit in enumerate(units) if condition in unit.writes
+        )
+        checked = nx.ancestors(graph, condition_unit) | {condition_unit}
+
+        writes = set(variables).union(*[unit.writes for unit in units])
+        reads = set().union(*[unit.reads for unit in units])
+        external = tuple(sorted(reads - writes))
+        step = LoopStep(
+            init,
+            variables,
+            updates,
+            condition,
+            [units[i].step for i in order if i in checked],
+            [units[i].step for i in order if i not in checked],
+            external,
+            self.edge_unit(exit_edge).step,
+        )
+        return Unit(step, set(init) | set(external), set(step.outputs))
+
+    def loop_variables(self, loop, top):
+        """
+        Returns the slots of the values of the loop variables before the
+        loop, of the loop variables, and of their values at the end of the
+        loop body, from the top interface of the loop.
+        The parameters of the top interface lambda are `use_initial`, then
+        `<variable>_init` for every output, then `<variable>_update` for the
+        variables the loop body updates.
+        """
+        params = top.lambda_fn.get_signature()[1:]
+        inits, updates = {}, {}
+        for param, var in zip(params, top.inputs):
+            name, _, kind = param.rpartition("_")
+            if kind == "init":
+                inits[name] = self.slots[var]
+            elif kind == "update":
+                updates[name] = self.slots[var]
+            else:
+                raise GrFNExecutionException(
+                    f"Error: unexpected parameter '{param}' of the top "
+                    f"interface of loop {loop}"
+                )
+        if len(params) != len(top.inputs) or len(inits) != len(top.outputs):
+            raise GrFNExecutionException(
+                f"Error: the top interface of loop {loop} does not have an "
+                "initial value for every loop variable"
+            )
+
+        variables = tuple(self.slots[var] for var in top.outputs)
+        return (
+            tuple(inits.values()),
+            variables,
+            tuple(
+                updates.get(name, variable)
+                for name, variable in zip(inits, variables)
+            ),
+        )
+
+    def __call__(
+        self,
+        inputs: Dict[str, Any],
+        literals: Dict[str, Any] = None,
+        desired_outputs: List[str] = None,
+    ) -> Dict[str, Any]:
+        """Executes the GrFN over a set of inputs, and returns the same
+        outputs as calling the GrFN, see GroundedFunctionNetwork.__call__"""
+        values = [None] * len(self.slots)
+        bound = {}
+        for var, value in self.grfn.bind_inputs(inputs, literals).items():
+            values[self.slots[var]] = bound[self.slots[var]] = value
+        state = PlanState(values, bound, None, self.grfn.np_shape)
+        for step in self.steps:
+            step(state)
+
+        if desired_outputs is not None and len(desired_outputs) > 0:
+            return {
+                name: np.array(values[self.slots[var]])
+                for name, var in self.grfn.desired_output_nodes(
+                    desired_outputs
+                ).items()
+            }
+        return {name: values[slot] for name, slot in self.outputs}
+
+    def execute_on_nodes(self) -> List[Any]:
+        """
+        Executes the steps on the values of the variable nodes of the GrFN,
+        as its dynamic execution sets them (see GrFNLoopSubgraph.__call__).
+        Sets the values the steps output on their variable nodes, and returns
+        these nodes.
+        """
+        nodes = list(self.slots)
+        values = [
+            var.value if var.value is not None else var.input_value
+            for var in nodes
+        ]
+        bound = {
+            slot: var.input_value
+            for var, slot in self.slots.items()
+            if var.input_value is not None
+        }
+        state = PlanState(values, bound, None, self.grfn.np_shape)
+        outputs = []
+        for step in self.steps:
+            step(state)
+            for slot in step.outputs:
+                nodes[slot].value = values[slot]
+                outputs.append(nodes[slot])
+        return outputs
+
@@ -6,7 +6,7 @@ import ast
 
 import networkx as nx
 
-from skema.utils.misc import uuid
+from skema.utils.misc import new_uid
 
 
 @dataclass(repr=False, frozen=False)
@@ -27,7 +27,7 @@ class ExprAbstractNode(ABC):
         Returns:
             str: the string representation of a generated UUID object
         """
-        return str(uuid.uuid4())
+        return new_uid()
 
     @abstractmethod
     def get_label(self):
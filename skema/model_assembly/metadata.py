@@ -7,7 +7,7 @@ from datetime import datetime
 from typing import List, Union, Type, Dict
 from time import time
 
-from ..utils.misc import uuid
+from ..utils.misc import new_uid
 
 CategoricalTypes = Union[bool, str, int]
 NumericalTypes = Union[int, float]
@@ -339,7 +339,7 @@ class CodeFileReference(BaseMetadata):
         split_point = filepath.rfind("/")
         dirpath = filepath[: split_point + 1]
         filename = filepath[split_point + 1 :]
-        return cls(str(uuid.uuid4()), filename, dirpath)
+        return cls(new_uid(), filename, dirpath)
 
     @classmethod
     def from_data(cls, data: dict) -> CodeFileReference:
@@ -539,7 +539,7 @@ class CodeCollectionReference(TypedMetadata):
                 MetadataMethod.PROGRAM_ANALYSIS_PIPELINE,
                 ProvenanceData.get_dt_timestamp(),
             ),
-            str(uuid.uuid4()),
+            new_uid(),
             [CodeFileReference.from_str(fpath) for fpath in sources],
         )
 
@@ -1,12 +1,12 @@
 from copy import deepcopy
 
-from networkx.algorithms.simple_paths import all_simple_paths
 from skema.model_assembly.networks import (
     GrFNLoopSubgraph,
     GrFNSubgraph,
     GroundedFunctionNetwork,
     HyperEdge,
     LambdaNode,
+    path_nodes,
 )
 from skema.model_assembly.structures import LambdaType
 
@@ -79,6 +79,14 @@ def get_output_interface_node(
     ][0]
 
 
+def get_nodes_on_paths(grfn: GroundedFunctionNetwork, source, target):
+    """
+    Returns the nodes on the paths from source to target, in breadth first
+    order from source, see path_nodes.
+    """
+    return path_nodes(grfn, source, target)
+
+
 def get_decision_nodes(subgraph: GrFNSubgraph):
     return [
         node
@@ -195,24 +203,19 @@ def extract_dynamics_from_loop(
         loop_succ_interface_pred = set(
             dynamics_grfn.predecessors(loop_succ_interface)
         )
-        # Find potential paths to this loop successors interface
-        paths_to_interface = all_simple_paths(
+        # Find the nodes on the paths to this loop successors interface
+        nodes_to_interface = get_nodes_on_paths(
             dynamics_grfn, loop_interface, loop_succ_interface
         )
         interface_hyper_edge_inputs = list()
-        # for each path found to this interface
-        for path in paths_to_interface:
-            # for each node on the path, if it is from the loop subgraph,
-            # add it into the root subgraph
-            for node in path:
-                if node != loop_interface and node in loop.nodes:
-                    dynamics_grfn.root_subgraph.nodes.append(node)
-                    loop_nodes_to_preserve.add(node)
-                    if (
-                        node in loop_succ_interface_pred
-                        and node not in interface_hyper_edge_inputs
-                    ):
-                        interface_hyper_edge_inputs.append(node)
+        # for each node on the paths, if it is from the loop subgraph, add it
+        # into the root subgraph
+        for node in nodes_to_interface:
+            if node != loop_interface and node in loop.nodes:
+                dynamics_grfn.root_subgraph.nodes.append(node)
+                loop_nodes_to_preserve.add(node)
+                if node in loop_succ_interface_pred:
+                    interface_hyper_edge_inputs.append(node)
 
         existing_hyper_edges = [
             h
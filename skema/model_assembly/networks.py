@@ -1,8 +1,18 @@
 from __future__ import annotations
-from typing import List, Dict, Iterable, Set, Any, Tuple, NoReturn, Optional
+from typing import (
+    List,
+    Dict,
+    Iterable,
+    Iterator,
+    Set,
+    Any,
+    Tuple,
+    NoReturn,
+    Optional,
+)
 from abc import ABC, abstractmethod
-from functools import singledispatch
-from dataclasses import dataclass
+from functools import cached_property, singledispatch
+from dataclasses import dataclass, field
 from itertools import product
 from copy import deepcopy
 
@@ -13,9 +23,10 @@ import os
 
 import networkx as nx
 import numpy as np
-from networkx.algorithms.simple_paths import all_simple_paths
 
-from .sandbox import load_lambda_function
+from .sandbox import is_vectorizable, load_lambda_function
+from .execution_plan import ExecutionPlan
+from .batched_execution import concatenate_outputs, iter_batched
 from .air import AutoMATES_IR
 from .structures import (
     GenericContainer,
@@ -46,15 +57,126 @@ from .metadata import (
     MetadataMethod,
     Domain,
 )
-from ..utils.misc import choose_font, uuid
+from ..utils.misc import choose_font, new_uid
 
 
 FONT = choose_font()
 
+# The numpy dtype kinds of the arrays lambdas are called on at once: booleans,
+# integers, floats and complex numbers
+NUMERIC_KINDS = "biufc"
+
 dodgerblue3 = "#1874CD"
 forestgreen = "#228b22"
 
 
+def simple_paths_subgraph(
+    graph: nx.DiGraph, source, target, nodes: Set = None
+) -> Tuple[Set, Set]:
+    """
+    Returns the nodes and the edges on the simple paths from source to target
+    in graph, or in its subgraph induced by `nodes` if given, without
+    enumerating the paths.
+    A simple path never enters source or leaves target, so the nodes on the
+    paths are among those reachable from source that reach target, without
+    these edges. Between the strongly connected components of these nodes, a
+    path can go from any node of a component to any other, so every node and
+    edge outside of the cycles is on a path. The nodes and edges of a cycle,
+    e.g. the body of a loop, are those on the simple paths inside its
+    component, from a node the paths enter it by to a node they leave it by.
+    This takes linear time for an acyclic graph, and is repeated for every
+    pair of entry and exit nodes of a cycle, so nested cycles with many of
+    them, unlike the loops of a GrFN, still take exponential time.
+    """
+    if nodes is None:
+        nodes = graph.nodes
+
+    def walk(start, neighbors, stop):
+        seen = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if node == stop:
+                continue
+            for n in neighbors(node):
+                if n in nodes and n not in seen and n != start:
+                    seen.add(n)
+                    stack.append(n)
+        return seen
+
+    reaching_target = walk(target, graph.predecessors, source)
+    if source not in reaching_target:
+        return set(), set()
+    on_paths = walk(source, graph.successors, target) & reaching_target
+
+    candidates = nx.DiGraph()
+    candidates.add_nodes_from(on_paths)
+    candidates.add_edges_from(
+        (u, v)
+        for u in on_paths
+        if u != target
+        for v in graph.successors(u)
+        if v in on_paths and v != source
+    )
+    component_of = {}
+    for i, component in enumerate(
+        nx.strongly_connected_components(candidates)
+    ):
+        for node in component:
+            component_of[node] = i
+
+    nodes_on_paths = set()
+    edges_on_paths = set()
+    # the nodes of every cycle that the paths enter and leave it by
+    entries, exits = {}, {}
+    for u, v in candidates.edges:
+        if component_of[u] != component_of[v]:
+            edges_on_paths.add((u, v))
+            entries.setdefault(component_of[v], set()).add(v)
+            exits.setdefault(component_of[u], set()).add(u)
+    entries.setdefault(component_of[source], set()).add(source)
+    exits.setdefault(component_of[target], set()).add(target)
+
+    components = {}
+    for node, i in component_of.items():
+        components.setdefault(i, set()).add(node)
+    for i, component in components.items():
+        if len(component) == 1:
+            nodes_on_paths |= component
+            continue
+        for entry, exit_node in product(entries[i], exits[i]):
+            if entry == exit_node:
+                nodes_on_paths.add(entry)
+                continue
+            cycle_nodes, cycle_edges = simple_paths_subgraph(
+                graph, entry, exit_node, component
+            )
+            nodes_on_paths |= cycle_nodes
+            edges_on_paths |= cycle_edges
+    return nodes_on_paths, edges_on_paths
+
+
+def path_nodes(graph: nx.DiGraph, source, target) -> List:
+    """
+    Returns the nodes on the simple paths from source to target, in breadth
+    first order from source, see simple_paths_subgraph.
+    """
+    _, edges = simple_paths_subgraph(graph, source, target)
+    if source == target:
+        return [source]
+    successors = {}
+    for u, v in edges:
+        successors.setdefault(u, []).append(v)
+    nodes = [source] if edges else []
+    reached = set(nodes)
+    for node in nodes:
+        for succ in successors.get(node, []):
+            if succ not in reached:
+                reached.add(succ)
+                nodes.append(succ)
+    return nodes
+
+
 @dataclass(repr=False, frozen=False)
 class GenericNode(ABC):
     uid: str
@@ -67,7 +189,7 @@ class GenericNode(ABC):
 
     @staticmethod
     def create_node_id() -> str:
-        return str(uuid.uuid4())
+        return new_uid()
 
     @abstractmethod
     def get_kwargs(self):
@@ -251,6 +373,11 @@ class LambdaNode(GenericNode):
                 for lambda:\n{self.func_str}"""
             )
 
+        if len(values) != 0 and self.vectorizable:
+            res = self.call_vectorized(values)
+            if res is not None:
+                return res
+
         try:
             if len(values) != 0:
                 # In vectorized execution, we would have a values list that looks like:
@@ -260,6 +387,8 @@ class LambdaNode(GenericNode):
                 # each sub list is length of inputs (3 in this case) with the corresponding
                 # x/y/z variables. I.e. it should look like:
                 # [ [x_1, y_1, z_1] [x_2, y_2, z_2] ... [x_N, y_N, z_N]]
+                # This calls the lambda once per sample, for the lambdas that
+                # cannot be called on the whole arrays (see call_vectorized)
                 res = [self.function(*inputs) for inputs in zip(*values)]
             else:
                 res = self.function()
@@ -267,6 +396,54 @@ class LambdaNode(GenericNode):
         except Exception as e:
             raise GrFNExecutionException(e)
 
+    @property
+    def unpacks_tuples(self) -> bool:
+        """Whether the tuple the lambda returns holds one value per output"""
+        return self.func_type in (
+            LambdaType.INTERFACE,
+            LambdaType.DECISION,
+            LambdaType.EXTRACT,
+        )
+
+    @cached_property
+    def vectorizable(self) -> bool:
+        """Whether the lambda can be called once on whole arrays of samples,
+        see is_vectorizable"""
+        return is_vectorizable(self.func_str, self.unpacks_tuples)
+
+    def call_vectorized(self, values) -> Optional[List[np.ndarray]]:
+        """
+        Calls the lambda once on the arrays of samples in values, and returns
+        the arrays of its outputs.
+        Returns None if the lambda has to be called once per sample instead:
+        the values are not numeric arrays of the same shape, or numpy reports
+        an error (e.g. a division by zero) that the call on the sample raises.
+        """
+        shape = getattr(values[0], "shape", None)
+        for value in values:
+            if (
+                not isinstance(value, np.ndarray)
+                or value.shape != shape
+                or value.dtype.kind not in NUMERIC_KINDS
+            ):
+                return None
+
+        try:
+            with np.errstate(divide="raise", over="raise", invalid="raise"):
+                res = self.function(*values)
+        except Exception:
+            return None
+
+        outputs = list(res) if isinstance(res, tuple) else [res]
+        for i, output in enumerate(outputs):
+            if np.ndim(output) == 0:
+                # the output does not depend on the samples
+                outputs[i] = np.full(shape, output)
+            elif any(output is value for value in values):
+                # the output variable does not share the array of the input
+                outputs[i] = output.copy()
+        return outputs
+
     def parse_result(self, values, res):
         if (
             self.func_type == LambdaType.INTERFACE
@@ -346,6 +523,10 @@ class LambdaNode(GenericNode):
 class LoopTopInterface(LambdaNode):
     use_initial: bool = False
 
+    @property
+    def unpacks_tuples(self) -> bool:
+        return True
+
     def parse_result(self, values, res):
         # The top interfaces node (LTI) should output a tuple of the
         # correct variables. However, if there is only one var in the
@@ -459,7 +640,7 @@ class HyperEdge:
             # Initialize seen exits to an array of False if it does not exist
             if not hasattr(self, "seen_exits"):
                 self.seen_exits = np.full(
-                    self.lambda_fn.np_shape, False, dtype=np.bool
+                    self.lambda_fn.np_shape, False, dtype=bool
                 )
 
             # Gather the exit conditions for this execution
@@ -474,15 +655,19 @@ class HyperEdge:
                     self.outputs[res_index].value = np.full(
                         out_val.shape, np.NaN
                     )
-                # If we have seen an exit before at a given position, keep the
-                # existing value, otherwise update.
-                for j, _ in enumerate(self.outputs[res_index].value):
-                    if self.seen_exits[j]:
-                        self.outputs[res_index].value[j] = out_val[j]
+                # Update the values at the positions that have seen an exit
+                # before, and keep the existing values at the others.
+                self.outputs[res_index].value = np.where(
+                    self.seen_exits,
+                    out_val,
+                    self.outputs[res_index].value,
+                )
 
             # Update seen_exits with any vectorized positions that may have
             # exited during this execution
-            self.seen_exits = np.copy(self.seen_exits) | exit_var_values
+            self.seen_exits = self.seen_exits | np.asarray(
+                exit_var_values, dtype=bool
+            )
 
         else:
             for i, out_val in enumerate(result):
@@ -634,7 +819,9 @@ class GrFNSubgraph:
                     0, input_interface_hyper_edge_node.lambda_fn
                 )
 
-            # Need to recurse to a different subgraph if no nodes to execute here
+            # Need to recurse to a different subgraph if no nodes to execute
+            # here, and the GrFN has literals to start from
+            global_literal_nodes = []
             if len(node_execute_queue) == 0:
                 global_literal_nodes = [
                     n
@@ -643,31 +830,11 @@ class GrFNSubgraph:
                     and grfn.in_degree(n) == 0
                     and n.func_type == LambdaType.LITERAL
                 ]
-                global_output_vars = [
-                    n
-                    for n in grfn.nodes
-                    if isinstance(n, VariableNode) and grfn.out_degree(n) == 0
-                ]
-
+            if len(global_literal_nodes) > 0:
                 # Choose a literal node with maximum distance to the output
                 # to begin recursing.
-                lit_node_to_max_dist = dict()
-                for (l_node, o_node) in product(
-                    global_literal_nodes, global_output_vars
-                ):
-                    max_dist = max(
-                        [
-                            len(path)
-                            for path in all_simple_paths(grfn, l_node, o_node)
-                        ]
-                    )
-                    lit_node_to_max_dist[l_node] = max_dist
-                lits_by_dist = sorted(
-                    list(lit_node_to_max_dist.items()),
-                    key=lambda t: t[1],
-                    reverse=True,
-                )
-                (L_node, _) = lits_by_dist[0]
+                output_distances = grfn.output_distances()
+                L_node = max(global_literal_nodes, key=output_distances.get)
                 subgraph = node_to_subgraph[L_node]
                 subgraph_hyper_edges = subgraphs_to_hyper_edges[subgraph]
                 subgraph_input_interface = (
@@ -699,6 +866,8 @@ class GrFNSubgraph:
                 # or (var in self.nodes and succ.func_type == LambdaType.INTERFACE)
             ]
 
+        # Nodes that waited on their inputs since a node was last executed
+        waiting_nodes = set()
         while node_execute_queue:
             executed = True
             executed_visited_variables = set()
@@ -706,6 +875,16 @@ class GrFNSubgraph:
             # TODO remove?
             if node_to_execute in all_nodes_visited:
                 continue
+            if node_to_execute in waiting_nodes and all(
+                n in waiting_nodes or n in all_nodes_visited
+                for n in node_execute_queue
+            ):
+                # Nothing was executed since every node in the queue last
+                # waited, so their inputs will never be computed
+                raise GrFNExecutionException(
+                    "Error: Cannot compute the inputs of the nodes waiting"
+                    + f" to execute in subgraph {self}."
+                )
 
             if node_to_execute not in nodes_to_hyper_edge:
                 # Node is not in current subgraph
@@ -744,6 +923,34 @@ class GrFNSubgraph:
                     else:
                         node_to_execute = subgraph_input_interface.lambda_fn
                         executed = False
+                elif (
+                    node_to_execute.func_type == LambdaType.LOOP_TOP_INTERFACE
+                ):
+                    # The top interface of a loop subgraph, whose inputs
+                    # in the loop subgraph are its updated variables
+                    subgraph = node_to_subgraph[node_to_execute]
+                    top_interface = [
+                        e
+                        for e in subgraphs_to_hyper_edges[subgraph]
+                        if e.lambda_fn == node_to_execute
+                    ][0]
+                    if all(
+                        [
+                            n in all_nodes_visited
+                            for n in top_interface.inputs
+                            if n not in subgraph.nodes
+                        ]
+                    ):
+                        executed_visited_variables.update(
+                            subgraph(
+                                grfn,
+                                subgraphs_to_hyper_edges,
+                                node_to_subgraph,
+                                all_nodes_visited,
+                            )
+                        )
+                    else:
+                        executed = False
                 else:
                     raise GrFNExecutionException(
                         "Error: Attempting to execute non-interface node"
@@ -767,6 +974,7 @@ class GrFNSubgraph:
                 executed = False
 
             if executed:
+                waiting_nodes.clear()
                 all_nodes_visited.update(executed_visited_variables)
                 all_nodes_visited.add(node_to_execute)
                 if not reverse_path_execution:
@@ -781,7 +989,11 @@ class GrFNSubgraph:
                             )
                             or (
                                 var in self.nodes
-                                and succ.func_type == LambdaType.INTERFACE
+                                and succ.func_type
+                                in (
+                                    LambdaType.INTERFACE,
+                                    LambdaType.LOOP_TOP_INTERFACE,
+                                )
                             )
                         ]
                     )
@@ -799,6 +1011,7 @@ class GrFNSubgraph:
                     ]
                 )
                 node_execute_queue.append(node_to_execute)
+                waiting_nodes.add(node_to_execute)
 
         return (
             {}
@@ -817,7 +1030,7 @@ class GrFNSubgraph:
             class_to_create = GrFNLoopSubgraph
 
         return class_to_create(
-            str(uuid.uuid4()),
+            new_uid(),
             id.namespace,
             id.scope,
             id.con_name,
@@ -947,6 +1160,21 @@ class GrFNSubgraph:
 
 @dataclass(repr=False, eq=False)
 class GrFNLoopSubgraph(GrFNSubgraph):
+    # the ExecutionPlan of a GrFN 2.2 loop, see execution_plan
+    plan: Optional[ExecutionPlan] = field(
+        default=None, init=False, compare=False
+    )
+
+    def execution_plan(self, grfn: GroundedFunctionNetwork) -> ExecutionPlan:
+        """
+        The ExecutionPlan of this GrFN 2.2 loop in grfn. It is compiled the
+        first time the loop is executed in grfn, and reused every time the
+        loop is entered again, e.g. on every iteration of an enclosing loop.
+        """
+        if self.plan is None or self.plan.grfn is not grfn:
+            self.plan = ExecutionPlan(grfn, self)
+        return self.plan
+
     def __call__(
         self,
         grfn: GroundedFunctionNetwork,
@@ -969,6 +1197,17 @@ class GrFNLoopSubgraph(GrFNSubgraph):
                 Holds the set of all variable nodes that have been visited
         """
 
+        # GrFN 2.2 loops have a top interface instead of decision nodes.
+        # They are executed by an ExecutionPlan of the loop, which leaves out
+        # the samples that exited the loop from the following iterations.
+        if any(
+            [
+                e.lambda_fn.func_type == LambdaType.LOOP_TOP_INTERFACE
+                for e in subgraphs_to_hyper_edges[self]
+            ]
+        ):
+            return set(self.execution_plan(grfn).execute_on_nodes())
+
         # First, find exit node within the subgraph
         exit_var_nodes = [
             n
@@ -1062,7 +1301,7 @@ class GrFNLoopSubgraph(GrFNSubgraph):
                 and all(exit_var_node.value)
             ):
                 output_decision_edge.seen_exits = np.full(
-                    grfn.np_shape, True, dtype=np.bool
+                    grfn.np_shape, True, dtype=bool
                 )
                 output_decision_edge()
                 output_interface()
@@ -1287,6 +1526,38 @@ class GroundedFunctionNetwork(nx.DiGraph):
             A set of outputs from executing the GrFN, one for every set of
             inputs.
         """
+        for input_node, value in self.bind_inputs(inputs, literals).items():
+            input_node.input_value = value
+
+        # Configure the np array shape for all lambda nodes
+        for n in self.lambdas:
+            n.np_shape = self.np_shape
+
+        subgraph_to_hyper_edges = {
+            s: [h for h in self.hyper_edges if h.lambda_fn in s.nodes]
+            for s in self.subgraphs
+        }
+        node_to_subgraph = {n: s for s in self.subgraphs for n in s.nodes}
+        self.root_subgraph(
+            self, subgraph_to_hyper_edges, node_to_subgraph, set()
+        )
+        # Return the output
+        if desired_outputs is not None and len(desired_outputs) > 0:
+            return {
+                k: np.array(v.value)
+                for k, v in self.desired_output_nodes(desired_outputs).items()
+            }
+
+        return {
+            output.identifier.var_name: output.value for output in self.outputs
+        }
+
+    def bind_inputs(
+        self, inputs: Dict[str, Any], literals: Dict[str, Any] = None
+    ) -> Dict[VariableNode, Any]:
+        """Returns the values of the input and literal variable nodes given
+        by the inputs and literals of an execution (see __call__), and sets
+        the numpy shape of the values of the execution."""
         self.np_shape = (1,)
         # TODO: update this function to work with new GrFN object
         full_inputs = {
@@ -1305,6 +1576,7 @@ class GroundedFunctionNetwork(nx.DiGraph):
                 self.np_shape = value.shape
 
         # Set the values of input var nodes given in the inputs dict
+        values = {}
         for input_node in [n for n in self.inputs if n in full_inputs]:
             value = full_inputs[input_node]
             # TODO: need to find a way to incorporate a 32/64 bit check here
@@ -1315,7 +1587,7 @@ class GroundedFunctionNetwork(nx.DiGraph):
             elif isinstance(value, (dict, list)):
                 value = np.array([value] * self.np_shape[0])
 
-            input_node.input_value = value
+            values[input_node] = value
 
         if literals is not None:
             literal_ids = set(
@@ -1344,46 +1616,110 @@ class GroundedFunctionNetwork(nx.DiGraph):
                 elif isinstance(value, np.ndarray):
                     self.np_shape = value.shape
 
-                input_node.input_value = value
+                values[input_node] = value
 
-        # Configure the np array shape for all lambda nodes
-        for n in self.lambdas:
-            n.np_shape = self.np_shape
+        return values
 
-        subgraph_to_hyper_edges = {
-            s: [h for h in self.hyper_edges if h.lambda_fn in s.nodes]
-            for s in self.subgraphs
-        }
-        node_to_subgraph = {n: s for s in self.subgraphs for n in s.nodes}
-        self.root_subgraph(
-            self, subgraph_to_hyper_edges, node_to_subgraph, set()
-        )
-        # Return the output
-        if desired_outputs is not None and len(desired_outputs) > 0:
-            root_var_nodes = [
-                n
-                for n, _ in self.out_degree()
-                if isinstance(n, VariableNode)
-                and n in self.root_subgraph.nodes
-            ]
+    def desired_output_nodes(
+        self, desired_outputs: List[str]
+    ) -> Dict[str, VariableNode]:
+        """Returns the max version var node in the root container for each
+        name in desired_outputs (see __call__)"""
+        root_var_nodes = [
+            n
+            for n, _ in self.out_degree()
+            if isinstance(n, VariableNode) and n in self.root_subgraph.nodes
+        ]
 
-            desired_output_values = {}
-            for n in root_var_nodes:
-                n_name = n.identifier.var_name
-                if n_name in set(desired_outputs) and (
-                    n_name not in desired_output_values
-                    or desired_output_values[n_name].identifier.index
-                    < n.identifier.index
-                ):
-                    desired_output_values[n_name] = n
-            return {
-                k: np.array(v.value) for k, v in desired_output_values.items()
-            }
+        desired_output_values = {}
+        for n in root_var_nodes:
+            n_name = n.identifier.var_name
+            if n_name in set(desired_outputs) and (
+                n_name not in desired_output_values
+                or desired_output_values[n_name].identifier.index
+                < n.identifier.index
+            ):
+                desired_output_values[n_name] = n
+        return desired_output_values
 
+    def output_distances(self) -> Dict[GenericNode, int]:
+        """
+        Returns the number of nodes on the longest path from every node to a
+        node with no successors, e.g. an output variable. The nodes of a
+        cycle (the variables of a loop and the lambdas updating them) count
+        as one node, so that this takes linear time in the size of the GrFN.
+        """
+        condensed = nx.condensation(self)
+        distances = dict()
+        for component in reversed(list(nx.topological_sort(condensed))):
+            distances[component] = 1 + max(
+                (distances[succ] for succ in condensed.successors(component)),
+                default=0,
+            )
         return {
-            output.identifier.var_name: output.value for output in self.outputs
+            node: distances[component]
+            for node, component in condensed.graph["mapping"].items()
         }
 
+    def compile(self) -> ExecutionPlan:
+        """Returns an ExecutionPlan that executes the GrFN like __call__,
+        without scheduling its hyper edges again on every call. The plan does
+        not follow later changes of the GrFN.
+
+        Raises:
+            GrFNExecutionException: The hyper edges outside of the loops have
+            a cycle, or a loop does not have the GrFN 2.2 loop interfaces.
+        """
+        return ExecutionPlan(self)
+
+    def execute_batched(
+        self,
+        inputs: Dict[str, Any],
+        chunk_size: int = 100000,
+        workers: int = None,
+        literals: Dict[str, Any] = None,
+        desired_outputs: List[str] = None,
+    ) -> Dict[str, Any]:
+        """Executes the GrFN like __call__ on inputs holding arrays of many
+        samples. The samples are split in chunks of chunk_size samples,
+        executed by a pool of processes (see batched_execution).
+
+        Args:
+            inputs: Input set as in __call__. The arrays must have the same
+            number of samples, and the other values are shared by all of
+            them.
+            chunk_size: The number of samples executed by every task
+            workers: The number of worker processes, one per CPU if None.
+            With one worker, the GrFN is executed in this process.
+            literals: Literal overrides as in __call__, shared by all the
+            samples
+            desired_outputs: As in __call__
+
+        Returns:
+            The outputs of __call__ for all of the samples, in order. Use
+            iter_batched to get the outputs of every chunk instead, e.g. for
+            sample sets whose outputs do not fit in memory.
+        """
+        return concatenate_outputs(
+            self.iter_batched(
+                inputs, chunk_size, workers, literals, desired_outputs
+            )
+        )
+
+    def iter_batched(
+        self,
+        inputs: Dict[str, Any],
+        chunk_size: int = 100000,
+        workers: int = None,
+        literals: Dict[str, Any] = None,
+        desired_outputs: List[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yields the outputs of every chunk of samples of execute_batched,
+        in order, as the worker processes compute them."""
+        return iter_batched(
+            self, inputs, chunk_size, workers, literals, desired_outputs
+        )
+
     @classmethod
     def from_AIR(cls, air: AutoMATES_IR):
         network = nx.DiGraph()
@@ -1610,7 +1946,7 @@ class GroundedFunctionNetwork(nx.DiGraph):
         start_container = air.containers[air.entrypoint]
         Occs[air.entrypoint] = 0
         translate_container(start_container, [])
-        grfn_uid = str(uuid.uuid4())
+        grfn_uid = new_uid()
         date_created = datetime.datetime.now().strftime("%Y-%m-%d")
         return cls(
             grfn_uid,
@@ -1872,18 +2208,17 @@ class GroundedFunctionNetwork(nx.DiGraph):
         outputs = self.outputs
         inputs = set(self.inputs).intersection(shared_nodes)
 
-        # Get all paths from shared inputs to shared outputs
+        # Get the nodes and edges on the paths from shared inputs to shared
+        # outputs
         path_inputs = shared_nodes - set(outputs)
         io_pairs = [(inp, self.output_node) for inp in path_inputs]
-        paths = [
-            p for (i, o) in io_pairs for p in all_simple_paths(self, i, o)
-        ]
+        main_nodes, main_edges = set(), set()
+        for i, o in io_pairs:
+            nodes, edges = simple_paths_subgraph(self, i, o)
+            main_nodes |= nodes
+            main_edges |= edges
 
         # Get all edges needed to blanket the included nodes
-        main_nodes = {node for path in paths for node in path}
-        main_edges = {
-            (n1, n2) for path in paths for n1, n2 in zip(path, path[1:])
-        }
         blanket_nodes = set()
         add_nodes, add_edges = list(), list()
 
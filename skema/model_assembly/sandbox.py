@@ -1,5 +1,6 @@
 from typing import List, Callable
 from numbers import Number, Real
+import ast
 import re
 
 import numpy as np
@@ -58,6 +59,76 @@ def load_lambda_function(func_str: str) -> Callable:
         raise e
 
 
+# The operators numpy applies to every element of arrays the same way Python
+# applies them to numbers
+VECTORIZABLE_OPERATORS = (
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.Pow,
+    ast.UAdd,
+    ast.USub,
+    ast.Eq,
+    ast.NotEq,
+    ast.Lt,
+    ast.LtE,
+    ast.Gt,
+    ast.GtE,
+)
+
+
+def is_vectorizable(func_str: str, allow_tuple: bool = False) -> bool:
+    """
+    Checks whether the lambda in func_str gives the same results when called
+    once on whole arrays of samples as when called once per sample, i.e. its
+    body only applies arithmetic operators and single comparisons to its
+    arguments and to numbers. If allow_tuple is set, the body can also be a
+    tuple of such expressions, one per output.
+    """
+    try:
+        tree = ast.parse(func_str, mode="eval")
+    except SyntaxError:
+        return False
+    if not isinstance(tree.body, ast.Lambda):
+        return False
+
+    args = {arg.arg for arg in tree.body.args.args}
+    body = tree.body.body
+    if allow_tuple and isinstance(body, ast.Tuple):
+        stack = list(body.elts)
+    else:
+        stack = [body]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Name):
+            if node.id not in args:
+                return False
+        elif isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float, bool):
+                return False
+        elif isinstance(node, ast.BinOp):
+            if not isinstance(node.op, VECTORIZABLE_OPERATORS):
+                return False
+            stack.extend((node.left, node.right))
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, VECTORIZABLE_OPERATORS):
+                return False
+            stack.append(node.operand)
+        elif isinstance(node, ast.Compare):
+            # a chained comparison is evaluated with `and`
+            if len(node.ops) != 1 or not isinstance(
+                node.ops[0], VECTORIZABLE_OPERATORS
+            ):
+                return False
+            stack.extend((node.left, node.comparators[0]))
+        else:
+            return False
+    return True
+
+
 def load_derived_type(type_str: str) -> None:
     # Checking to ensure the string has no executable import statements
     bad_match = re.search(rf"({UNSAFE_BUILTINS})|({UNSAFE_IMPORT})", type_str)
@@ -1,8 +1,13 @@
+import contextlib
+import contextvars
+import functools
+import inspect
 import re
 import sys
 import typing
 from dataclasses import dataclass, field
 from datetime import datetime
+from enum import Enum
 
 from skema.model_assembly.metadata import (
     CodeSpanReference,
@@ -22,7 +27,7 @@ from skema.model_assembly.networks import (
 )
 from skema.model_assembly.structures import VariableIdentifier
 from skema.program_analysis.CAST2GrFN.ann_cast.annotated_cast import *
-from skema.program_analysis.CAST2GrFN.model.cast import SourceRef
+from skema.program_analysis.CAST2GrFN.model.cast import AstNode, SourceRef
 
 # NOTE: the GrFN json loading seems to rely on "." as the separator for container scopes
 # For the Annotated Cast pipeline, it is fine to change these separators as long as they
@@ -330,6 +335,533 @@ def combine_grfn_con_src_refs(source_refs: typing.List[GrfnContainerSrcRef]):
 # End Metadata functions
 
 
+# GrFN 2.2 FunctionDef templates
+
+# The slots of AnnCast nodes that are not annotations, besides the ones set
+# from the arguments of their __init__. The template of a FunctionDef is the
+# same for all of its instances.
+STRUCTURE_SLOTS = frozenset(["_source_refs", "discriminator", "template"])
+
+
+@functools.lru_cache(maxsize=None)
+def annotation_slots(cls) -> typing.FrozenSet[str]:
+    """
+    Returns the slots of the AnnCast node class `cls` that hold the
+    annotations of the passes, i.e. the slots that are not set from the
+    arguments of its __init__
+    """
+    params = inspect.signature(cls.__init__).parameters
+    return frozenset(
+        name
+        for name in slot_names(cls)
+        if name not in params and name not in STRUCTURE_SLOTS
+    )
+
+
+def copy_annotation(value):
+    """
+    Returns a copy of the lists, dicts and sets in the annotation `value`,
+    which shares the other values with it
+    """
+    if value.__class__ is list:
+        return [copy_annotation(item) for item in value]
+    if value.__class__ is dict:
+        return {key: copy_annotation(item) for key, item in value.items()}
+    if value.__class__ is set:
+        return set(value)
+    return value
+
+
+class FuncDefTemplate:
+    """
+    The parameters and body of a FunctionDef that GrFN 2.2 Call nodes
+    instantiate. The instances share the nodes of the template, and the
+    annotations that the passes add to the nodes for an instance are kept in
+    the `overlays` of the instance, by the index of the node in `nodes`.
+
+    `initial` holds the annotations the nodes had when the template was
+    made, which the instances start from.
+    `active` is the instance whose annotations the nodes have, or None for
+    the annotations of the FunctionDef itself, see `func_def_instances()`.
+    `classes` caches the classes of the nodes of the template, see
+    `overlay_class()`.
+    """
+
+    __slots__ = ("nodes", "index", "initial", "active", "classes")
+
+    def __init__(self):
+        self.nodes: typing.List[AnnCastNode] = []
+        self.index: typing.Dict[int, int] = {}
+        self.initial: typing.List[typing.Dict] = []
+        self.active: typing.Optional[AnnCastFunctionDef] = None
+        self.classes: typing.Dict[typing.Tuple, type] = {}
+
+    def add(self, node: AnnCastNode):
+        self.index[id(node)] = len(self.nodes)
+        self.nodes.append(node)
+        annotations = annotation_slots(template_base(type(node)))
+        self.initial.append(
+            {
+                name: copy_annotation(value)
+                for name, value in node_attributes(node).items()
+                if name in annotations
+            }
+        )
+
+    def __reduce__(self):
+        # the nodes refer to the template, so it is made before they are
+        return FuncDefTemplate, (), (self.nodes, self.initial)
+
+    def __setstate__(self, state):
+        self.nodes, self.initial = state
+        self.index = {id(node): i for i, node in enumerate(self.nodes)}
+
+
+# The value of the annotations deleted in an instance
+DELETED = object()
+
+
+@functools.lru_cache(maxsize=None)
+def annotations_class(base) -> type:
+    """
+    Returns the class of the objects that hold the annotations of a node of
+    class `base` in a FunctionDef instance, which only has the slots of
+    these annotations
+    """
+    return type(
+        base.__name__ + "Annotations",
+        (),
+        {
+            "__slots__": tuple(sorted(annotation_slots(base))),
+            "__reduce__": reduce_annotations,
+            "__setstate__": set_annotations_state,
+            "base": base,
+        },
+    )
+
+
+def new_annotations(base):
+    return annotations_class(base)()
+
+
+def reduce_annotations(annotations):
+    state = {}
+    for name in annotations.__slots__:
+        try:
+            state[name] = getattr(annotations, name)
+        except AttributeError:
+            pass
+    return new_annotations, (annotations.base,), state
+
+
+def set_annotations_state(annotations, state):
+    for name, value in state.items():
+        setattr(annotations, name, value)
+
+
+class OverlaidSlot:
+    """
+    Replaces the slot of an annotation in the classes of the nodes of
+    FunctionDef templates. `templates` are the templates a node belongs to,
+    innermost first: a FunctionDef defined in the body of another one is
+    part of its template.
+
+    While an instance of one of the templates is active, the annotation is
+    stored in the overlays of the innermost active instance instead of the
+    node, in an object of the annotations_class of the node. An annotation
+    that the instance has not set has its initial value in the template, and
+    the lists, dicts and sets are copied on the first access, before the
+    instance can modify them.
+    """
+
+    __slots__ = ("name", "slot", "overlay_slot", "templates")
+
+    def __init__(self, name, base, templates):
+        self.name = name
+        self.slot = getattr(base, name)
+        self.overlay_slot = getattr(annotations_class(base), name)
+        self.templates = templates
+
+    def __get__(self, node, owner=None):
+        if node is None:
+            return self
+        for template in self.templates:
+            instance = template.active
+            if instance is None:
+                continue
+            index = template.index[id(node)]
+            annotations = instance.overlays.get(index)
+            if annotations is not None:
+                try:
+                    value = self.overlay_slot.__get__(annotations)
+                except AttributeError:
+                    pass
+                else:
+                    if value is DELETED:
+                        raise AttributeError(self.name)
+                    return value
+            value = template.initial[index].get(self.name, DELETED)
+            if value is DELETED:
+                raise AttributeError(self.name)
+            if value.__class__ in (list, dict, set):
+                value = copy_annotation(value)
+                self.__set__(node, value)
+            return value
+        return self.slot.__get__(node, owner)
+
+    def active_annotations(self, node):
+        """
+        The annotations of node in the innermost active instance, or None if
+        no instance is active
+        """
+        for template in self.templates:
+            instance = template.active
+            if instance is not None:
+                index = template.index[id(node)]
+                annotations = instance.overlays.get(index)
+                if annotations is None:
+                    base = template_base(type(node))
+                    annotations = annotations_class(base)()
+                    instance.overlays[index] = annotations
+                return annotations
+        return None
+
+    def __set__(self, node, value):
+        annotations = self.active_annotations(node)
+        if annotations is None:
+            self.slot.__set__(node, value)
+        else:
+            self.overlay_slot.__set__(annotations, value)
+
+    def __delete__(self, node):
+        annotations = self.active_annotations(node)
+        if annotations is None:
+            self.slot.__delete__(node)
+        else:
+            # raises AttributeError if the annotation is not set
+            self.__get__(node)
+            self.overlay_slot.__set__(annotations, DELETED)
+
+
+def template_base(cls) -> type:
+    """Returns the class the nodes of class `cls` have outside of templates"""
+    return getattr(cls, "template_base", cls)
+
+
+def reduce_template_node(node, protocol):
+    """Pickles a node of FunctionDef templates with its own annotations"""
+    base = template_base(type(node))
+    slots = {}
+    for name in slot_names(base):
+        try:
+            slots[name] = getattr(base, name).__get__(node, base)
+        except AttributeError:
+            pass
+    state = (type(node).templates, slots)
+    return (
+        new_node,
+        (base,),
+        state,
+        None,
+        None,
+        set_template_node_state,
+    )
+
+
+def new_node(cls):
+    return cls.__new__(cls)
+
+
+def set_template_node_state(node, state):
+    templates, slots = state
+    node.__class__ = overlay_class(type(node), templates)
+    for name, value in slots.items():
+        setattr(node, name, value)
+
+
+def overlay_class(base, templates: typing.Tuple[FuncDefTemplate]) -> type:
+    """
+    Returns the class of the nodes of class `base` that are in the
+    FunctionDef `templates`, innermost first
+    """
+    key = (base, templates)
+    overlay = templates[0].classes.get(key)
+    if overlay is not None:
+        return overlay
+
+    namespace = {
+        "__slots__": (),
+        "__module__": base.__module__,
+        "__qualname__": base.__qualname__,
+        "__reduce_ex__": reduce_template_node,
+        "template_base": base,
+        "templates": templates,
+    }
+    for name in annotation_slots(base):
+        namespace[name] = OverlaidSlot(name, base, templates)
+    overlay = type(base.__name__, (base,), namespace)
+    templates[0].classes[key] = overlay
+    return overlay
+
+
+def child_nodes(node) -> typing.List[AstNode]:
+    """
+    Returns the AST nodes that are children of `node`, i.e. that are in its
+    slots that are not annotations
+    """
+    if isinstance(node, AnnCastNode):
+        annotations = annotation_slots(template_base(type(node)))
+        values = [
+            value
+            for name, value in node_attributes(node).items()
+            if name not in annotations
+        ]
+    else:
+        values = list(node_attributes(node).values())
+
+    children = []
+    while values:
+        value = values.pop()
+        if isinstance(value, AstNode):
+            children.append(value)
+        elif isinstance(value, (list, tuple)):
+            values.extend(value)
+    return children
+
+
+def make_func_def_template(func_def: AnnCastFunctionDef) -> FuncDefTemplate:
+    """
+    Makes the parameters and body of `func_def` a template that Call nodes can
+    instantiate, by changing the classes of their nodes
+    """
+    template = FuncDefTemplate()
+    # the templates of the FunctionDefs func_def is defined in
+    enclosing = getattr(type(func_def), "templates", ())
+    stack = list(func_def.func_args) + list(func_def.body)
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, AnnCastNode):
+            stack.extend(child_nodes(node))
+            continue
+        if id(node) in template.index:
+            continue
+        stack.extend(child_nodes(node))
+        template.add(node)
+        # nodes that are already in templates keep their annotations in them
+        # too, the templates of the FunctionDefs defined in func_def first
+        current = getattr(type(node), "templates", ())
+        templates = (
+            tuple(t for t in current if t not in enclosing)
+            + (template,)
+            + tuple(t for t in current if t in enclosing)
+        )
+        node.__class__ = overlay_class(template_base(type(node)), templates)
+    func_def.template = template
+    return template
+
+
+def copy_node(node: AnnCastNode) -> AnnCastNode:
+    """
+    Returns a copy of `node` with its annotations in the active instances, and
+    the class it has outside of templates. The copy shares the children of
+    node.
+    """
+    cls = template_base(type(node))
+    annotations = annotation_slots(cls)
+    copy = cls.__new__(cls)
+    for name, value in node_attributes(node).items():
+        if name in annotations:
+            value = copy_annotation(value)
+        setattr(copy, name, value)
+    return copy
+
+
+def instantiate_func_def(
+    func_def: AnnCastFunctionDef, instance_id: int
+) -> AnnCastFunctionDef:
+    """
+    Returns an instance of `func_def` for a GrFN 2.2 Call node, whose name has
+    the id `instance_id`.
+
+    The instance is a FunctionDef with the parameters and body of func_def,
+    which become its template. The passes annotate the nodes of the template
+    for the instance while it is active, see `func_def_instances()`, and the
+    annotations are kept in the overlays of the instance. So making an
+    instance does not copy the nodes of the template.
+    """
+    template = func_def.template
+    if template is None:
+        template = make_func_def_template(func_def)
+
+    instance = copy_node(func_def)
+    instance.name = copy_node(func_def.name)
+    instance.name.id = instance_id
+    instance.template = template
+    instance.overlays = {}
+    return instance
+
+
+def active_instances(node) -> typing.List[AnnCastFunctionDef]:
+    """
+    Returns the active instances of the templates that `node` belongs to
+    """
+    return [
+        template.active
+        for template in getattr(type(node), "templates", ())
+        if template.active is not None
+    ]
+
+
+@contextlib.contextmanager
+def func_def_instances(instances: typing.Iterable[AnnCastFunctionDef]):
+    """
+    Makes the nodes of the templates of the FunctionDef `instances` have
+    their annotations in the instances, until the end of the with block
+    """
+    previous = []
+    for instance in instances:
+        if instance.overlays is not None:
+            template = instance.template
+            previous.append((template, template.active))
+            template.active = instance
+    try:
+        yield
+    finally:
+        for template, active in reversed(previous):
+            template.active = active
+
+
+class dispatchmethod:
+    """
+    Used in place of functools.singledispatchmethod by the visitors of the
+    AnnCast passes, which dispatch once for every node they visit.
+    singledispatchmethod builds a new wrapper function every time the method is
+    looked up, and then dispatches through the singledispatch registry; this
+    caches the implementation for each node class, and calls it directly.
+    Implementations are registered the same way, with `@_visit.register`.
+
+    While a SubtreePruning of the method is active in the current context,
+    the nodes whose subtree the visitor has nothing to do in are not visited,
+    and the visit returns None.
+    """
+
+    def __init__(self, func):
+        self.dispatcher = functools.singledispatch(func)
+        self.func = func
+        self.impls = {}
+        functools.update_wrapper(self, func)
+
+    def register(self, cls, method=None):
+        self.impls.clear()
+        return self.dispatcher.register(cls, func=method)
+
+    @property
+    def registry(self):
+        return self.dispatcher.registry
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+        return functools.partial(self.call, obj)
+
+    def call(self, obj, node, *args, **kwargs):
+        pruning = active_pruning.get()
+        if pruning is not None and pruning.method is self:
+            subtree = pruning.subtrees.get(id(node))
+            if subtree is not None and not subtree[0] & pruning.mask:
+                pruning.subtrees_skipped += 1
+                pruning.nodes_skipped += subtree[1]
+                return None
+        try:
+            impl = self.impls[node.__class__]
+        except KeyError:
+            impl = self.dispatcher.dispatch(node.__class__)
+            self.impls[node.__class__] = impl
+        return impl(obj, node, *args, **kwargs)
+
+
+class SubtreeTypes:
+    """
+    The node types in the subtree of every node of an AnnCast, as a bit mask
+    of the types, with the number of nodes in the subtree.
+    """
+
+    def __init__(self, roots: typing.Iterable[AstNode]):
+        # the bit of every node type, by its class without templates
+        self.bits = {}
+        # id(node) -> (mask of the types of the subtree, nodes in the subtree)
+        self.subtrees = {}
+        for root in roots:
+            self.add(root)
+
+    def add(self, root: AstNode):
+        stack = [(root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if id(node) in self.subtrees:
+                continue
+            children = child_nodes(node)
+            if not children_done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children)
+                continue
+            node_type = template_base(type(node))
+            bit = self.bits.setdefault(node_type, 1 << len(self.bits))
+            mask, size = bit, 1
+            for child in children:
+                child_mask, child_size = self.subtrees[id(child)]
+                mask |= child_mask
+                size += child_size
+            self.subtrees[id(node)] = (mask, size)
+
+    def mask_excluding(self, node_types: typing.AbstractSet[type]) -> int:
+        """The mask of the node types of the AnnCast, except `node_types`"""
+        mask = 0
+        for node_type, bit in self.bits.items():
+            if node_type not in node_types:
+                mask |= bit
+        return mask
+
+
+class SubtreePruning:
+    """
+    Prunes the visits of a dispatchmethod to the subtrees of `subtree_types`
+    that have none of the node types in `mask`. Nodes created after the
+    SubtreeTypes, e.g. the FunctionDef instances of GrFN 2.2, are always
+    visited.
+    """
+
+    __slots__ = (
+        "subtrees",
+        "mask",
+        "method",
+        "subtrees_skipped",
+        "nodes_skipped",
+    )
+
+    def __init__(self, subtree_types: SubtreeTypes, mask: int):
+        self.subtrees = subtree_types.subtrees
+        self.mask = mask
+        self.method = None
+        self.subtrees_skipped = 0
+        self.nodes_skipped = 0
+
+    @contextlib.contextmanager
+    def pruning(self, method: dispatchmethod):
+        """Prunes the visits of `method` in this context, so that pipelines
+        run concurrently in other threads or tasks are not pruned."""
+        self.method = method
+        token = active_pruning.set(self)
+        try:
+            yield self
+        finally:
+            active_pruning.reset(token)
+
+
+# the SubtreePruning of the pass run in the current context
+active_pruning = contextvars.ContextVar("active_pruning", default=None)
+
+
 def union_dicts(dict1, dict2):
     """
     Combines the key value pairs of dict1 and dict2.
@@ -1,6 +1,8 @@
-from functools import singledispatchmethod
 import typing
 
+from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
+    dispatchmethod,
+)
 from skema.program_analysis.CAST2GrFN.ann_cast.annotated_cast import *
 
 
@@ -30,7 +32,7 @@ class AnnCastPass:
     def visit_node_list(self, node_list: typing.List[AnnCastNode]):
         return [self.visit(node) for node in node_list]
 
-    @singledispatchmethod
+    @dispatchmethod
     def _visit(self, node: AnnCastNode):
         """
         Internal visit
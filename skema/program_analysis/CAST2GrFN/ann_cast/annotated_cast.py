@@ -1,5 +1,6 @@
-import typing
 import difflib
+import functools
+import typing
 
 from skema.program_analysis.CAST2GrFN.model.cast import (
     AstNode,
@@ -33,14 +34,23 @@ from skema.program_analysis.CAST2GrFN.model.cast import (
 )
 
 from skema.model_assembly.networks import GroundedFunctionNetwork, VariableNode
+from skema.utils.misc import IdAllocator
 from skema.program_analysis.CAST2GrFN.model.cast.model_import import (
     ModelImport,
 )
 
 
 class PipelineState:
-    def __init__(self, ann_nodes: typing.List, grfn2_2: bool):
+    def __init__(
+        self,
+        ann_nodes: typing.List,
+        grfn2_2: bool,
+        ids: typing.Optional[IdAllocator] = None,
+    ):
         self.GENERATE_GRFN_2_2 = grfn2_2
+        # allocates the uids of the GrFN nodes and the metadata created by
+        # the passes, see PassManager.run()
+        self.ids = ids if ids is not None else IdAllocator()
         self.PRINT_DEBUGGING_INFO = False
         self.nodes = ann_nodes
         # populated after IdCollapsePass, and used to give ids to GrFN condition variables
@@ -61,6 +71,8 @@ class PipelineState:
         self.module_node = None
         # GrFN stored after ToGrfnPass
         self.grfn: typing.Optional[GroundedFunctionNetwork] = None
+        # the metadata ToGrometPass generates, one of its METADATA_MODES
+        self.gromet_metadata = "full"
 
         # flag deciding whether or not to use GE's interpretation of From Source
         # when populating metadata information
@@ -207,11 +219,77 @@ class PipelineState:
         return True
 
 
+@functools.lru_cache(maxsize=None)
+def slot_names(cls) -> typing.Tuple[str, ...]:
+    """
+    Returns the names of the slots of cls and its base classes
+    """
+    names = []
+    for base in reversed(cls.__mro__):
+        slots = base.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        names.extend(s for s in slots if s not in ("__dict__", "__weakref__"))
+    return tuple(names)
+
+
+def node_attributes(node) -> typing.Dict:
+    """
+    Returns the attributes set on an AST node, whether they are stored in slots,
+    or in the __dict__ of the node
+    """
+    attributes = {}
+    for name in slot_names(type(node)):
+        # object.__getattribute__ does not fall back to __getattr__, so this does
+        # not allocate lazy tables
+        try:
+            attributes[name] = object.__getattribute__(node, name)
+        except AttributeError:
+            pass
+    attributes.update(getattr(node, "__dict__", {}))
+    return attributes
+
+
 class AnnCastNode(AstNode):
+    """
+    The attributes of AnnCast nodes, including the annotations added by the
+    passes, are stored in slots, and the nodes have no __dict__. So every
+    attribute that is set on a node, even by a single pass, needs a slot in its
+    class.
+
+    The dicts of annotations listed in `lazy_tables` are only allocated when they
+    are first accessed, since most nodes never use some of them.
+    """
+
+    __slots__ = ("_source_refs", "discriminator", "expr_str")
+    lazy_tables: typing.FrozenSet[str] = frozenset()
+
     def __init__(self, *args, **kwargs):
         super().__init__(self)
         self.expr_str: str = ""
 
+    def __getattr__(self, name):
+        # only called when the attribute is not set
+        if name in self.lazy_tables:
+            table = {}
+            setattr(self, name, table)
+            return table
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'"
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, AstNode):
+            return False
+        # lazy tables that have not been allocated yet are empty
+        attributes = dict.fromkeys(self.lazy_tables, {})
+        attributes.update(node_attributes(self))
+        other_attributes = dict.fromkeys(
+            getattr(other, "lazy_tables", ()), {}
+        )
+        other_attributes.update(node_attributes(other))
+        return attributes == other_attributes
+
     def to_dict(self):
         result = super().to_dict()
         result["expr_str"] = self.expr_str
@@ -224,6 +302,12 @@ class AnnCastNode(AstNode):
 
 
 class AnnCastAssignment(AnnCastNode):
+    __slots__ = (
+        "left",
+        "right",
+        "grfn_assignment",
+    )
+
     def __init__(self, left, right, source_refs):
         super().__init__(self)
         self.left = left
@@ -248,6 +332,12 @@ class AnnCastAssignment(AnnCastNode):
 
 
 class AnnCastAttribute(AnnCastNode):
+    __slots__ = (
+        "value",
+        "attr",
+        "con_scope",
+    )
+
     def __init__(self, value, attr, source_refs):
         super().__init__(self)
         self.value = value
@@ -269,6 +359,12 @@ class AnnCastAttribute(AnnCastNode):
 
 
 class AnnCastBinaryOp(AnnCastNode):
+    __slots__ = (
+        "op",
+        "left",
+        "right",
+    )
+
     def __init__(self, op, left, right, source_refs):
         super().__init__(self)
         self.op = op
@@ -293,6 +389,8 @@ class AnnCastBinaryOp(AnnCastNode):
 
 
 class AnnCastBoolean(AnnCastNode):
+    __slots__ = ("boolean",)
+
     def __init__(self, boolean, source_refs):
         super().__init__(self)
         self.boolean = boolean
@@ -313,6 +411,49 @@ class AnnCastBoolean(AnnCastNode):
 
 
 class AnnCastCall(AnnCastNode):
+    __slots__ = (
+        "func",
+        "arguments",
+        "invocation_index",
+        "top_interface_in",
+        "top_interface_out",
+        "bot_interface_in",
+        "bot_interface_out",
+        "top_interface_vars",
+        "bot_interface_vars",
+        "top_interface_lambda",
+        "bot_interface_lambda",
+        "globals_accessed_before_mod",
+        "used_globals",
+        "in_ret_val",
+        "out_ret_val",
+        "is_grfn_2_2",
+        "func_def_copy",
+        "has_func_def",
+        "has_ret_val",
+        "arg_index_to_fullid",
+        "param_index_to_fullid",
+        "arg_assignments",
+        "grfn_con_src_ref",
+    )
+    lazy_tables = frozenset(
+        [
+            "top_interface_in",
+            "top_interface_out",
+            "bot_interface_in",
+            "bot_interface_out",
+            "top_interface_vars",
+            "bot_interface_vars",
+            "globals_accessed_before_mod",
+            "used_globals",
+            "in_ret_val",
+            "out_ret_val",
+            "arg_index_to_fullid",
+            "param_index_to_fullid",
+            "arg_assignments",
+        ]
+    )
+
     def __init__(self, func, arguments, source_refs):
         super().__init__(self)
         self.func: AnnCastName = func
@@ -323,13 +464,13 @@ class AnnCastCall(AnnCastNode):
         self.invocation_index: int
 
         # dicts mapping a Name id to its fullid
-        self.top_interface_in = {}
-        self.top_interface_out = {}
-        self.bot_interface_in = {}
-        self.bot_interface_out = {}
+        self.top_interface_in: typing.Dict
+        self.top_interface_out: typing.Dict
+        self.bot_interface_in: typing.Dict
+        self.bot_interface_out: typing.Dict
         # dicts mapping Name id to Name string
-        self.top_interface_vars = {}
-        self.bot_interface_vars = {}
+        self.top_interface_vars: typing.Dict
+        self.bot_interface_vars: typing.Dict
         # GrFN lambda expressions
         self.top_interface_lambda: str
         self.bot_interface_lambda: str
@@ -337,13 +478,13 @@ class AnnCastCall(AnnCastNode):
         # for top_interface_out
         # mapping Name id to fullid
         # to determine this, we check if we store version 0 on any Name node
-        self.globals_accessed_before_mod = {}
-        self.used_globals = {}
+        self.globals_accessed_before_mod: typing.Dict
+        self.used_globals: typing.Dict
 
         # for bot_interface
         # map Name id to fullid
-        self.in_ret_val = {}
-        self.out_ret_val = {}
+        self.in_ret_val: typing.Dict
+        self.out_ret_val: typing.Dict
 
         # if this is a GrFN 2.2 Call, we will copy the associated FunctionDef
         # to make the GrFN 2.2 container
@@ -357,13 +498,13 @@ class AnnCastCall(AnnCastNode):
         self.has_ret_val: bool = False
 
         # dict mapping argument index to created argument fullid
-        self.arg_index_to_fullid = {}
-        self.param_index_to_fullid = {}
+        self.arg_index_to_fullid: typing.Dict
+        self.param_index_to_fullid: typing.Dict
         # this dict maps argument positional index to GrfnAssignment's
         # Each GrfnAssignment stores the ASSIGN/LITERAL node,
         # the inputs to the ASSIGN/LITERAL node, and the outputs to the ASSIGN/LITERAL node
         # In this case, the output will map the arguments fullid to its grfn_id
-        self.arg_assignments: typing.Dict[int, GrfnAssignment] = {}
+        self.arg_assignments: typing.Dict[int, GrfnAssignment]
 
         # metadata attributes
         self.grfn_con_src_ref: GrfnContainerSrcRef
@@ -384,6 +525,11 @@ class AnnCastCall(AnnCastNode):
 
 
 class AnnCastDict(AnnCastNode):
+    __slots__ = (
+        "keys",
+        "values",
+    )
+
     def __init__(self, keys, values, source_refs):
         super().__init__(self)
         self.keys = keys
@@ -405,6 +551,8 @@ class AnnCastDict(AnnCastNode):
 
 
 class AnnCastExpr(AnnCastNode):
+    __slots__ = ("expr",)
+
     def __init__(self, expr, source_refs):
         super().__init__(self)
         self.expr = expr
@@ -425,6 +573,55 @@ class AnnCastExpr(AnnCastNode):
 
 
 class AnnCastFunctionDef(AnnCastNode):
+    __slots__ = (
+        "name",
+        "func_args",
+        "body",
+        "con_scope",
+        "has_ret_val",
+        "in_ret_val",
+        "out_ret_val",
+        "modified_vars",
+        "vars_accessed_before_mod",
+        "used_vars",
+        "top_interface_vars",
+        "bot_interface_vars",
+        "globals_accessed_before_mod",
+        "used_globals",
+        "modified_globals",
+        "arg_index_to_fullid",
+        "param_index_to_fullid",
+        "top_interface_in",
+        "top_interface_out",
+        "bot_interface_in",
+        "bot_interface_out",
+        "top_interface_lambda",
+        "bot_interface_lambda",
+        "body_highest_var_vers",
+        "grfn_con_src_ref",
+        "dummy_grfn_assignments",
+        "template",
+        "overlays",
+    )
+    lazy_tables = frozenset(
+        [
+            "in_ret_val",
+            "out_ret_val",
+            "top_interface_vars",
+            "bot_interface_vars",
+            "globals_accessed_before_mod",
+            "used_globals",
+            "modified_globals",
+            "arg_index_to_fullid",
+            "param_index_to_fullid",
+            "top_interface_in",
+            "top_interface_out",
+            "bot_interface_in",
+            "bot_interface_out",
+            "body_highest_var_vers",
+        ]
+    )
+
     def __init__(self, name, func_args, body, source_refs):
         super().__init__(self)
         self.name = name
@@ -443,8 +640,8 @@ class AnnCastFunctionDef(AnnCastNode):
         self.has_ret_val: bool = False
         # for bot_interface
         # in_ret_val and out_ret_val map Name id to fullid
-        self.in_ret_val = {}
-        self.out_ret_val = {}
+        self.in_ret_val: typing.Dict
+        self.out_ret_val: typing.Dict
 
         # dicts mapping a Name id to its string name
         # used for container interfaces
@@ -453,32 +650,32 @@ class AnnCastFunctionDef(AnnCastNode):
         self.used_vars: typing.Dict[int, str]
         # for now, top_interface_vars and bot_interface_vars only include globals
         # since those variables cross the container boundaries
-        self.top_interface_vars: typing.Dict[int, str] = {}
-        self.bot_interface_vars: typing.Dict[int, str] = {}
+        self.top_interface_vars: typing.Dict[int, str]
+        self.bot_interface_vars: typing.Dict[int, str]
         # dicts for global variables
         # for top_interface_out
         # mapping Name id to fullid
         # to determine this, we check if we store version 0 on any Name node
-        self.globals_accessed_before_mod = {}
-        self.used_globals = {}
+        self.globals_accessed_before_mod: typing.Dict
+        self.used_globals: typing.Dict
         # for bot interface in
-        self.modified_globals = {}
+        self.modified_globals: typing.Dict
 
         # dict mapping argument index to created argument fullid
-        self.arg_index_to_fullid = {}
-        self.param_index_to_fullid = {}
+        self.arg_index_to_fullid: typing.Dict
+        self.param_index_to_fullid: typing.Dict
 
         # dicts mapping a Name id to its fullid
-        self.top_interface_in = {}
-        self.top_interface_out = {}
-        self.bot_interface_in = {}
-        self.bot_interface_out = {}
+        self.top_interface_in: typing.Dict
+        self.top_interface_out: typing.Dict
+        self.bot_interface_in: typing.Dict
+        self.bot_interface_out: typing.Dict
         # GrFN lambda expressions
         self.top_interface_lambda: str
         self.bot_interface_lambda: str
 
         # dict mapping Name id to highest version at end of "block"
-        self.body_highest_var_vers = {}
+        self.body_highest_var_vers: typing.Dict
 
         # metadata attributes
         self.grfn_con_src_ref: GrfnContainerSrcRef
@@ -486,6 +683,13 @@ class AnnCastFunctionDef(AnnCastNode):
         # dummy assignments to handle Python dynamic variable creation
         self.dummy_grfn_assignments = []
 
+        # for GrFN 2.2, the FuncDefTemplate of a FunctionDef that Call nodes
+        # instantiate, and of its instances (see instantiate_func_def)
+        self.template = None
+        # for an instance, maps the index of the nodes of the template to the
+        # annotations they have in the instance
+        self.overlays: typing.Optional[typing.Dict[int, typing.Any]] = None
+
     def to_dict(self):
         result = super().to_dict()
         result["name"] = self.name.to_dict()
@@ -506,6 +710,8 @@ class AnnCastFunctionDef(AnnCastNode):
 
 
 class AnnCastList(AnnCastNode):
+    __slots__ = ("values",)
+
     def __init__(self, values, source_refs):
         super().__init__(self)
         self.values = values
@@ -527,6 +733,13 @@ class AnnCastList(AnnCastNode):
 
 
 class AnnCastRecordDef(AnnCastNode):
+    __slots__ = (
+        "name",
+        "bases",
+        "funcs",
+        "fields",
+    )
+
     def __init__(self, name, bases, funcs, fields, source_refs):
         super().__init__(self)
         self.name = name
@@ -550,6 +763,12 @@ class AnnCastRecordDef(AnnCastNode):
 
 
 class AnnCastLiteralValue(AnnCastNode):
+    __slots__ = (
+        "value_type",
+        "value",
+        "source_code_data_type",
+    )
+
     def __init__(self, value_type, value, source_code_data_type, source_refs):
         super().__init__(self)
         self.value_type = value_type
@@ -571,6 +790,58 @@ class AnnCastLiteralValue(AnnCastNode):
 
 
 class AnnCastLoop(AnnCastNode):
+    __slots__ = (
+        "init",
+        "expr",
+        "body",
+        "con_scope",
+        "base_func_scopestr",
+        "modified_vars",
+        "vars_accessed_before_mod",
+        "used_vars",
+        "top_interface_vars",
+        "top_interface_updated_vars",
+        "bot_interface_vars",
+        "init_highest_var_vers",
+        "expr_highest_var_vers",
+        "body_highest_var_vers",
+        "expr_vars_accessed_before_mod",
+        "expr_modified_vars",
+        "expr_used_vars",
+        "top_interface_initial",
+        "top_interface_updated",
+        "top_interface_out",
+        "bot_interface_in",
+        "bot_interface_out",
+        "condition_in",
+        "condition_out",
+        "condition_var",
+        "top_interface_lambda",
+        "bot_interface_lambda",
+        "condition_lambda",
+        "grfn_con_src_ref",
+    )
+    lazy_tables = frozenset(
+        [
+            "top_interface_vars",
+            "top_interface_updated_vars",
+            "bot_interface_vars",
+            "init_highest_var_vers",
+            "expr_highest_var_vers",
+            "body_highest_var_vers",
+            "expr_vars_accessed_before_mod",
+            "expr_modified_vars",
+            "expr_used_vars",
+            "top_interface_initial",
+            "top_interface_updated",
+            "top_interface_out",
+            "bot_interface_in",
+            "bot_interface_out",
+            "condition_in",
+            "condition_out",
+        ]
+    )
+
     def __init__(self, init, expr, body, source_refs):
         super().__init__(self)
         self.init = init
@@ -588,32 +859,32 @@ class AnnCastLoop(AnnCastNode):
         self.modified_vars: typing.Dict[int, str]
         self.vars_accessed_before_mod: typing.Dict[int, str]
         self.used_vars: typing.Dict[int, str]
-        self.top_interface_vars: typing.Dict[int, str] = {}
-        self.top_interface_updated_vars: typing.Dict[int, str] = {}
-        self.bot_interface_vars: typing.Dict[int, str] = {}
+        self.top_interface_vars: typing.Dict[int, str]
+        self.top_interface_updated_vars: typing.Dict[int, str]
+        self.bot_interface_vars: typing.Dict[int, str]
 
         # dicts mapping Name id to highest version at end of "block"
-        self.init_highest_var_vers = {}
-        self.expr_highest_var_vers = {}
-        self.body_highest_var_vers = {}
+        self.init_highest_var_vers: typing.Dict
+        self.expr_highest_var_vers: typing.Dict
+        self.body_highest_var_vers: typing.Dict
 
         # dicts mapping a Name id to variable string name
         # for variables used in the Loop expr
-        self.expr_vars_accessed_before_mod = {}
-        self.expr_modified_vars = {}
-        self.expr_used_vars = {}
+        self.expr_vars_accessed_before_mod: typing.Dict
+        self.expr_modified_vars: typing.Dict
+        self.expr_used_vars: typing.Dict
 
         # dicts mapping a Name id to its fullid
         # initial versions for the top interface come from enclosing scope
         # updated versions for the top interface are versions
         # at the bottom of the loop after one or more executions of the loop
-        self.top_interface_initial = {}
-        self.top_interface_updated = {}
-        self.top_interface_out = {}
-        self.bot_interface_in = {}
-        self.bot_interface_out = {}
-        self.condition_in = {}
-        self.condition_out = {}
+        self.top_interface_initial: typing.Dict
+        self.top_interface_updated: typing.Dict
+        self.top_interface_out: typing.Dict
+        self.bot_interface_in: typing.Dict
+        self.bot_interface_out: typing.Dict
+        self.condition_in: typing.Dict
+        self.condition_out: typing.Dict
         # GrFN VariableNode for the condition node
         self.condition_var = None
 
@@ -644,6 +915,8 @@ class AnnCastLoop(AnnCastNode):
 
 
 class AnnCastModelBreak(AnnCastNode):
+    __slots__ = ()
+
     def __init__(self, source_refs):
         super().__init__(self)
         self.source_refs = source_refs
@@ -662,6 +935,8 @@ class AnnCastModelBreak(AnnCastNode):
 
 
 class AnnCastModelContinue(AnnCastNode):
+    __slots__ = ()
+
     def __init__(self, node: ModelContinue):
         super().__init__(self)
         self.source_refs = node.source_refs
@@ -680,6 +955,13 @@ class AnnCastModelContinue(AnnCastNode):
 
 
 class AnnCastModelImport(AnnCastNode):
+    __slots__ = (
+        "name",
+        "alias",
+        "symbol",
+        "all",
+    )
+
     def __init__(self, node: ModelImport):
         super().__init__(self)
         self.name = node.name
@@ -702,6 +984,59 @@ class AnnCastModelImport(AnnCastNode):
 
 
 class AnnCastModelIf(AnnCastNode):
+    __slots__ = (
+        "expr",
+        "body",
+        "orelse",
+        "con_scope",
+        "base_func_scopestr",
+        "modified_vars",
+        "vars_accessed_before_mod",
+        "used_vars",
+        "top_interface_vars",
+        "bot_interface_vars",
+        "expr_vars_accessed_before_mod",
+        "expr_modified_vars",
+        "expr_used_vars",
+        "expr_highest_var_vers",
+        "ifbody_highest_var_vers",
+        "elsebody_highest_var_vers",
+        "top_interface_in",
+        "top_interface_out",
+        "bot_interface_in",
+        "bot_interface_out",
+        "condition_in",
+        "condition_out",
+        "decision_in",
+        "decision_out",
+        "condition_var",
+        "top_interface_lambda",
+        "bot_interface_lambda",
+        "condition_lambda",
+        "decision_lambda",
+        "grfn_con_src_ref",
+    )
+    lazy_tables = frozenset(
+        [
+            "top_interface_vars",
+            "bot_interface_vars",
+            "expr_vars_accessed_before_mod",
+            "expr_modified_vars",
+            "expr_used_vars",
+            "expr_highest_var_vers",
+            "ifbody_highest_var_vers",
+            "elsebody_highest_var_vers",
+            "top_interface_in",
+            "top_interface_out",
+            "bot_interface_in",
+            "bot_interface_out",
+            "condition_in",
+            "condition_out",
+            "decision_in",
+            "decision_out",
+        ]
+    )
+
     def __init__(self, expr, body, orelse, source_refs):
         super().__init__(self)
         self.expr = expr
@@ -719,27 +1054,27 @@ class AnnCastModelIf(AnnCastNode):
         self.modified_vars: typing.Dict[int, str]
         self.vars_accessed_before_mod: typing.Dict[int, str]
         self.used_vars: typing.Dict[int, str]
-        self.top_interface_vars: typing.Dict[int, str] = {}
-        self.bot_interface_vars: typing.Dict[int, str] = {}
+        self.top_interface_vars: typing.Dict[int, str]
+        self.bot_interface_vars: typing.Dict[int, str]
         # dicts mapping a Name id to variable string name
         # for variables used in the if expr
-        self.expr_vars_accessed_before_mod = {}
-        self.expr_modified_vars = {}
-        self.expr_used_vars = {}
+        self.expr_vars_accessed_before_mod: typing.Dict
+        self.expr_modified_vars: typing.Dict
+        self.expr_used_vars: typing.Dict
         # dicts mapping Name id to highest version at end of "block"
-        self.expr_highest_var_vers = {}
-        self.ifbody_highest_var_vers = {}
-        self.elsebody_highest_var_vers = {}
+        self.expr_highest_var_vers: typing.Dict
+        self.ifbody_highest_var_vers: typing.Dict
+        self.elsebody_highest_var_vers: typing.Dict
 
         # dicts mapping a Name id to its fullid
-        self.top_interface_in = {}
-        self.top_interface_out = {}
-        self.bot_interface_in = {}
-        self.bot_interface_out = {}
-        self.condition_in = {}
-        self.condition_out = {}
-        self.decision_in = {}
-        self.decision_out = {}
+        self.top_interface_in: typing.Dict
+        self.top_interface_out: typing.Dict
+        self.bot_interface_in: typing.Dict
+        self.bot_interface_out: typing.Dict
+        self.condition_in: typing.Dict
+        self.condition_out: typing.Dict
+        self.decision_in: typing.Dict
+        self.decision_out: typing.Dict
         # GrFN VariableNode for the condition node
         self.condition_var = None
 
@@ -772,6 +1107,12 @@ class AnnCastModelIf(AnnCastNode):
 
 
 class AnnCastModelReturn(AnnCastNode):
+    __slots__ = (
+        "value",
+        "owning_func_def",
+        "grfn_assignment",
+    )
+
     def __init__(self, value, source_refs):
         super().__init__(self)
         self.value = value
@@ -796,6 +1137,16 @@ class AnnCastModelReturn(AnnCastNode):
 
 
 class AnnCastModule(AnnCastNode):
+    __slots__ = (
+        "name",
+        "body",
+        "modified_vars",
+        "vars_accessed_before_mod",
+        "used_vars",
+        "con_scope",
+        "grfn_con_src_ref",
+    )
+
     def __init__(self, name, body, source_refs):
         super().__init__(self)
         self.name = name
@@ -830,6 +1181,15 @@ class AnnCastModule(AnnCastNode):
 
 
 class AnnCastName(AnnCastNode):
+    __slots__ = (
+        "name",
+        "id",
+        "con_scope",
+        "base_func_scopestr",
+        "version",
+        "grfn_id",
+    )
+
     def __init__(self, name, id, source_refs):
         super().__init__(self)
         self.name = name
@@ -861,6 +1221,8 @@ class AnnCastName(AnnCastNode):
 
 
 class AnnCastNumber(AnnCastNode):
+    __slots__ = ("number",)
+
     def __init__(self, number, source_refs):
         super().__init__(self)
         self.number = number
@@ -881,6 +1243,8 @@ class AnnCastNumber(AnnCastNode):
 
 
 class AnnCastSet(AnnCastNode):
+    __slots__ = ("values",)
+
     def __init__(self, values, source_refs):
         super().__init__(self)
         self.values = values
@@ -901,6 +1265,8 @@ class AnnCastSet(AnnCastNode):
 
 
 class AnnCastString(AnnCastNode):
+    __slots__ = ("string",)
+
     def __init__(self, string, source_refs):
         super().__init__(self)
         self.string = string
@@ -921,6 +1287,11 @@ class AnnCastString(AnnCastNode):
 
 
 class AnnCastSubscript(AnnCastNode):
+    __slots__ = (
+        "value",
+        "slice",
+    )
+
     def __init__(self, value, slice, source_refs):
         super().__init__(self)
         self.value = value
@@ -942,6 +1313,8 @@ class AnnCastSubscript(AnnCastNode):
 
 
 class AnnCastTuple(AnnCastNode):
+    __slots__ = ("values",)
+
     def __init__(self, values, source_refs):
         super().__init__(self)
         self.values = values
@@ -962,6 +1335,11 @@ class AnnCastTuple(AnnCastNode):
 
 
 class AnnCastUnaryOp(AnnCastNode):
+    __slots__ = (
+        "op",
+        "value",
+    )
+
     def __init__(self, op, value, source_refs):
         super().__init__(self)
         self.op = op
@@ -983,6 +1361,12 @@ class AnnCastUnaryOp(AnnCastNode):
 
 
 class AnnCastVar(AnnCastNode):
+    __slots__ = (
+        "val",
+        "type",
+        "default_value",
+    )
+
     def __init__(self, val, type, default_value, source_refs):
         super().__init__(self)
         self.val = val
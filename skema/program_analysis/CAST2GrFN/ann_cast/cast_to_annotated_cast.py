@@ -1,4 +1,3 @@
-from functools import singledispatchmethod
 import typing
 
 from skema.program_analysis.CAST2GrFN.cast import CAST
@@ -33,7 +32,11 @@ from skema.program_analysis.CAST2GrFN.model.cast import (
     Var,
 )
 
+from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
+    dispatchmethod,
+)
 from skema.program_analysis.CAST2GrFN.ann_cast.annotated_cast import *
+from skema.utils.misc import IdAllocator
 
 
 class CASTTypeError(TypeError):
@@ -60,14 +63,19 @@ class CastToAnnotatedCastVisitor:
     def visit_node_list(self, node_list: typing.List[AstNode]):
         return [self.visit(node) for node in node_list]
 
-    def generate_annotated_cast(self, grfn_2_2: bool = False):
+    def generate_annotated_cast(self, grfn_2_2: bool = False, id_seed=None):
+        """
+        Returns the PipelineState of the annotated CAST.
+        If id_seed is given, the passes run on it create the same uids every
+        time, see IdAllocator.
+        """
         nodes = self.cast.nodes
 
         annotated_cast = []
         for node in nodes:
             annotated_cast.append(self.visit(node))
 
-        return PipelineState(annotated_cast, grfn_2_2)
+        return PipelineState(annotated_cast, grfn_2_2, IdAllocator(id_seed))
 
     def visit(self, node: AstNode) -> AnnCastNode:
         # print current node being visited.
@@ -76,7 +84,7 @@ class CastToAnnotatedCastVisitor:
         # print(f"\nProcessing node type {class_name}")
         return self._visit(node)
 
-    @singledispatchmethod
+    @dispatchmethod
     def _visit(self, node: AstNode):
         raise NameError(f"Unrecognized node type: {type(node)}")
 
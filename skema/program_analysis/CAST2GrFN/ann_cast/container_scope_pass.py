@@ -1,8 +1,6 @@
-import copy
 import typing
 from collections import defaultdict
 from enum import Enum
-from functools import singledispatchmethod
 
 from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
     CON_STR_SEP,
@@ -18,7 +16,11 @@ from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
     combine_grfn_con_src_refs,
     combine_source_refs,
     con_scope_to_str,
+    active_instances,
+    dispatchmethod,
     func_def_container_name,
+    func_def_instances,
+    instantiate_func_def,
     var_dict_to_str,
 )
 from skema.program_analysis.CAST2GrFN.ann_cast.annotated_cast import *
@@ -56,6 +58,9 @@ class ContainerScopePass:
         self.con_str_to_node = {}
         # dict mapping container scope str to cached Container Data
         self.con_str_to_con_data = {}
+        # dict mapping container scope str to the GrFN 2.2 FunctionDef
+        # instances to activate to annotate its node (see instantiate_func_def)
+        self.con_str_to_instances = {}
         self.calls_to_process = list()
 
         for node in self.pipeline_state.nodes:
@@ -155,45 +160,52 @@ class ContainerScopePass:
                 )
                 print(used_vars)
 
-            # Note: for the ModelIf.Expr and Loop.Expr nodes,
-            # we put the ModelIf and Loop nodes respectively in
-            # `con_str_to_node`.
-            # We need to put the container data for the Expr nodes in
-            # the expr_*_vars attributes of their associated container nodes
-            # so we call `add_container_data_to_expr()`
-            if_expr_suffix = CON_STR_SEP + IFEXPR
-            if scopestr.endswith(if_expr_suffix):
-                if_container = self.con_str_to_node[scopestr]
-                self.add_container_data_to_expr(if_container, data)
-                continue
-
-            loop_expr_suffix = CON_STR_SEP + LOOPEXPR
-            if scopestr.endswith(loop_expr_suffix):
-                loop_container = self.con_str_to_node[scopestr]
-                self.add_container_data_to_expr(loop_container, data)
-                continue
-
-            # otherwise, store container data, in the container nodes
-            # *_vars attributes
-            container = self.con_str_to_node[scopestr]
-            container.vars_accessed_before_mod = data.vars_accessed_before_mod
-            container.modified_vars = data.modified_vars
-            container.used_vars = data.used_vars
-
-            # if the container is a FunctionDef, we want to store how globals are used
-            if isinstance(container, AnnCastFunctionDef):
-                all_globals = self.pipeline_state.all_globals_dict()
-                for id, name in all_globals.items():
-                    if id in container.vars_accessed_before_mod:
-                        container.globals_accessed_before_mod[id] = name
-                    if id in container.modified_vars:
-                        container.modified_globals[id] = name
-                    if id in container.used_vars:
-                        container.used_globals[id] = name
-
-            # DEBUG printing
-            if self.pipeline_state.PRINT_DEBUGGING_INFO:
-                print(container.grfn_con_src_ref)
+            # the container may be a node of the body of GrFN 2.2 FunctionDef
+            # instances, which keep the annotations of these nodes
+            instances = self.con_str_to_instances.get(scopestr, ())
+            with func_def_instances(instances):
+                self.add_container_data(scopestr, data)
+
+    def add_container_data(self, scopestr, data):
+        # Note: for the ModelIf.Expr and Loop.Expr nodes,
+        # we put the ModelIf and Loop nodes respectively in
+        # `con_str_to_node`.
+        # We need to put the container data for the Expr nodes in
+        # the expr_*_vars attributes of their associated container nodes
+        # so we call `add_container_data_to_expr()`
+        if_expr_suffix = CON_STR_SEP + IFEXPR
+        if scopestr.endswith(if_expr_suffix):
+            if_container = self.con_str_to_node[scopestr]
+            self.add_container_data_to_expr(if_container, data)
+            return
+
+        loop_expr_suffix = CON_STR_SEP + LOOPEXPR
+        if scopestr.endswith(loop_expr_suffix):
+            loop_container = self.con_str_to_node[scopestr]
+            self.add_container_data_to_expr(loop_container, data)
+            return
+
+        # otherwise, store container data, in the container nodes
+        # *_vars attributes
+        container = self.con_str_to_node[scopestr]
+        container.vars_accessed_before_mod = data.vars_accessed_before_mod
+        container.modified_vars = data.modified_vars
+        container.used_vars = data.used_vars
+
+        # if the container is a FunctionDef, we want to store how globals are used
+        if isinstance(container, AnnCastFunctionDef):
+            all_globals = self.pipeline_state.all_globals_dict()
+            for id, name in all_globals.items():
+                if id in container.vars_accessed_before_mod:
+                    container.globals_accessed_before_mod[id] = name
+                if id in container.modified_vars:
+                    container.modified_globals[id] = name
+                if id in container.used_vars:
+                    container.used_globals[id] = name
+
+        # DEBUG printing
+        if self.pipeline_state.PRINT_DEBUGGING_INFO:
+            print(container.grfn_con_src_ref)
 
     def initialize_con_scope_data(self, con_scope: typing.List, node):
         """
@@ -206,6 +218,9 @@ class ContainerScopePass:
 
         # map con_scopestr to passed in node
         self.con_str_to_node[con_scopestr] = node
+        instances = active_instances(node)
+        if instances:
+            self.con_str_to_instances[con_scopestr] = instances
 
     def visit(
         self,
@@ -239,7 +254,7 @@ class ContainerScopePass:
 
         return combine_grfn_con_src_refs([children_src_ref, grfn_src_ref])
 
-    @singledispatchmethod
+    @dispatchmethod
     def _visit(
         self,
         node: AnnCastNode,
@@ -413,22 +428,24 @@ class ContainerScopePass:
             assign_side,
         )
 
-        node.func_def_copy = copy.deepcopy(
-            self.pipeline_state.func_id_to_def[node.func.id]
+        # the copy's Name node has a new id, store the copy in func_id_to_def
+        func_def_copy = instantiate_func_def(
+            self.pipeline_state.func_id_to_def[node.func.id],
+            self.pipeline_state.next_collapsed_id(),
         )
-        # make a new id for the copy's Name node, and store in func_id_to_def
-        node.func_def_copy.name.id = self.pipeline_state.next_collapsed_id()
+        node.func_def_copy = func_def_copy
         self.pipeline_state.func_id_to_def[
-            node.func_def_copy.name.id
-        ] = node.func_def_copy
+            func_def_copy.name.id
+        ] = func_def_copy
         calling_scope = enclosing_con_scope + [call_container_name(node)]
         call_assign_side = AssignSide.NEITHER
-        self.visit_function_def(
-            node.func_def_copy,
-            base_func_scopestr,
-            calling_scope,
-            call_assign_side,
-        )
+        with func_def_instances([func_def_copy]):
+            self.visit_function_def(
+                func_def_copy,
+                base_func_scopestr,
+                calling_scope,
+                call_assign_side,
+            )
 
         return args_src_ref
 
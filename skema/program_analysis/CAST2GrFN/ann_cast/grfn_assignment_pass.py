@@ -1,5 +1,4 @@
 import typing
-from functools import singledispatchmethod
 
 from skema.model_assembly.metadata import LambdaType
 from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
@@ -10,6 +9,8 @@ from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
     create_grfn_pack_node,
     create_grfn_unpack_node,
     create_lambda_node_metadata,
+    dispatchmethod,
+    func_def_instances,
     is_literal_assignment,
 )
 from skema.program_analysis.CAST2GrFN.ann_cast.annotated_cast import *
@@ -48,7 +49,7 @@ class GrfnAssignmentPass:
     ):
         return [self.visit(node, add_to) for node in node_list]
 
-    @singledispatchmethod
+    @dispatchmethod
     def _visit(self, node: AnnCastNode, add_to: typing.Dict):
         """
         `add_to` is either the input or outputs to an GrFN Assignment/Literal node
@@ -184,7 +185,9 @@ class GrfnAssignmentPass:
             # store GrfnAssignment for this argument
             node.arg_assignments[i] = arg_assignment
 
-        self.visit_function_def(node.func_def_copy, {})
+        func_def_copy = node.func_def_copy
+        with func_def_instances([func_def_copy]):
+            self.visit_function_def(func_def_copy, {})
 
         # DEBUG printing
         if self.pipeline_state.PRINT_DEBUGGING_INFO:
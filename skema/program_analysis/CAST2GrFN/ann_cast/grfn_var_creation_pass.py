@@ -1,5 +1,4 @@
 import typing
-from functools import singledispatchmethod
 
 from skema.model_assembly.metadata import VariableCreationReason
 from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
@@ -21,6 +20,8 @@ from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
     con_scope_to_str,
     create_grfn_var,
     create_grfn_var_from_name_node,
+    dispatchmethod,
+    func_def_instances,
     generate_from_source_metadata,
     make_cond_var_name,
     make_loop_exit_name,
@@ -475,7 +476,7 @@ class GrfnVarCreationPass:
             grfn_var = self.pipeline_state.grfn_id_to_grfn_var[grfn_id]
             print(f"{fullid:<70}{grfn_id:<70}{grfn_var.identifier.index:<2}")
 
-    @singledispatchmethod
+    @dispatchmethod
     def _visit(self, node: AnnCastNode):
         """
         Internal visit
@@ -525,7 +526,9 @@ class GrfnVarCreationPass:
         self.alias_copied_func_body_highest_vers(node)
 
         self.visit_node_list(node.arguments)
-        self.visit_function_def_copy(node.func_def_copy)
+        func_def_copy = node.func_def_copy
+        with func_def_instances([func_def_copy]):
+            self.visit_function_def_copy(func_def_copy)
 
     @_visit.register
     def visit_record_def(self, node: AnnCastRecordDef):
@@ -1,10 +1,10 @@
 from re import A
 import typing
 from collections import defaultdict
-from functools import singledispatchmethod
 
 from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
     call_container_name,
+    dispatchmethod,
 )
 from skema.program_analysis.CAST2GrFN.ann_cast.annotated_cast import *
 from skema.program_analysis.CAST2GrFN.model.cast import (
@@ -82,7 +82,7 @@ class IdCollapsePass:
     ):
         return [self.visit(node, at_module_scope) for node in node_list]
 
-    @singledispatchmethod
+    @dispatchmethod
     def _visit(self, node: AnnCastNode, at_module_scope):
         """
         Visit each AnnCastNode, collapsing AnnCastName ids along the way
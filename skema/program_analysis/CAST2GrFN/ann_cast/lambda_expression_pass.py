@@ -1,5 +1,4 @@
 import typing
-from functools import singledispatchmethod
 
 from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
     ELSEBODY,
@@ -7,6 +6,8 @@ from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
     GrfnAssignment,
     ann_cast_name_to_fullid,
     cast_op_to_str,
+    dispatchmethod,
+    func_def_instances,
     lambda_var_from_fullid,
 )
 from skema.program_analysis.CAST2GrFN.ann_cast.annotated_cast import *
@@ -173,7 +174,7 @@ class LambdaExpressionPass:
     ) -> typing.List[str]:
         return [self.visit(node) for node in node_list]
 
-    @singledispatchmethod
+    @dispatchmethod
     def _visit(self, node: AnnCastNode) -> str:
         """
         Internal visit
@@ -235,7 +236,9 @@ class LambdaExpressionPass:
         node.top_interface_lambda = lambda_for_interface(node.top_interface_in)
 
         # build lamba expressions for function def copy body
-        body_expr = self.visit_function_def_copy(node.func_def_copy)
+        func_def_copy = node.func_def_copy
+        with func_def_instances([func_def_copy]):
+            body_expr = self.visit_function_def_copy(func_def_copy)
 
         # bot interface lambda
         node.bot_interface_lambda = lambda_for_interface(node.bot_interface_in)
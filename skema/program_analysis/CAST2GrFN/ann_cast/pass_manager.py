@@ -0,0 +1,236 @@
+"""
+The passes of the AnnCast pipeline, with the passes whose annotations each of
+them reads.
+
+A PassManager runs the passes a target pass depends on, in dependency order,
+and skips the passes the target does not depend on, e.g. ToGrometPass does
+not read the GrFN variables, assignments and lambda expressions, so the passes
+creating them are not run when generating GroMEt.
+
+The passes that declare the node types they only descend through (or do
+nothing for) do not visit the subtrees made of these node types only, e.g.
+the literals and the arithmetic on literals do not have any Name for
+VariableVersionPass to version.
+"""
+import contextlib
+import typing
+from dataclasses import dataclass
+
+from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
+    SubtreePruning,
+    SubtreeTypes,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.annotated_cast import (
+    AnnCastBinaryOp,
+    AnnCastBoolean,
+    AnnCastDict,
+    AnnCastExpr,
+    AnnCastList,
+    AnnCastLiteralValue,
+    AnnCastModelBreak,
+    AnnCastModelContinue,
+    AnnCastModelImport,
+    AnnCastModelReturn,
+    AnnCastNode,
+    AnnCastNumber,
+    AnnCastSet,
+    AnnCastString,
+    AnnCastSubscript,
+    AnnCastTuple,
+    AnnCastUnaryOp,
+    PipelineState,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.container_scope_pass import (
+    ContainerScopePass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.grfn_assignment_pass import (
+    GrfnAssignmentPass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.grfn_var_creation_pass import (
+    GrfnVarCreationPass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.id_collapse_pass import (
+    IdCollapsePass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.lambda_expression_pass import (
+    LambdaExpressionPass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.to_grfn_pass import ToGrfnPass
+from skema.program_analysis.CAST2GrFN.ann_cast.to_gromet_pass import (
+    ToGrometPass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.variable_version_pass import (
+    VariableVersionPass,
+)
+from skema.utils.misc import use_id_allocator
+
+
+@dataclass(frozen=True)
+class PassSpec:
+    """
+    An AnnCast pass, and the names of the passes whose annotations it reads.
+    Running `pass_class` on a PipelineState traverses all of its nodes once,
+    except the subtrees with only `descending_types` nodes. The visits of
+    these node types must return None and only visit the children of the
+    node, if anything.
+    """
+
+    name: str
+    pass_class: type
+    requires: typing.Tuple[str, ...] = ()
+    descending_types: typing.FrozenSet[type] = frozenset()
+
+    @property
+    def node_types(self) -> typing.FrozenSet[type]:
+        """The AnnCast node types the pass has work to do for"""
+        return frozenset(
+            node_type
+            for node_type in self.pass_class._visit.registry
+            if node_type not in (object, AnnCastNode)
+            and node_type not in self.descending_types
+        )
+
+
+# The node types that IdCollapsePass, VariableVersionPass and
+# GrfnVarCreationPass only descend through
+DESCENDING_TYPES = frozenset(
+    [
+        AnnCastBinaryOp,
+        AnnCastBoolean,
+        AnnCastDict,
+        AnnCastExpr,
+        AnnCastList,
+        AnnCastLiteralValue,
+        AnnCastModelBreak,
+        AnnCastModelContinue,
+        AnnCastModelImport,
+        AnnCastModelReturn,
+        AnnCastNumber,
+        AnnCastSet,
+        AnnCastString,
+        AnnCastSubscript,
+        AnnCastTuple,
+        AnnCastUnaryOp,
+    ]
+)
+
+ANN_CAST_PASSES = (
+    PassSpec(
+        "IdCollapsePass", IdCollapsePass, descending_types=DESCENDING_TYPES
+    ),
+    PassSpec("ContainerScopePass", ContainerScopePass, ("IdCollapsePass",)),
+    PassSpec(
+        "VariableVersionPass",
+        VariableVersionPass,
+        ("ContainerScopePass",),
+        DESCENDING_TYPES,
+    ),
+    PassSpec(
+        "GrfnVarCreationPass",
+        GrfnVarCreationPass,
+        ("VariableVersionPass",),
+        DESCENDING_TYPES,
+    ),
+    # the assignments of the return statements are created and added to the
+    # GrFN
+    PassSpec(
+        "GrfnAssignmentPass",
+        GrfnAssignmentPass,
+        ("GrfnVarCreationPass",),
+        DESCENDING_TYPES - {AnnCastModelReturn},
+    ),
+    PassSpec(
+        "LambdaExpressionPass", LambdaExpressionPass, ("GrfnAssignmentPass",)
+    ),
+    # the GroMEt ports and wires are created from the container scopes and
+    # the versioned variables of the containers
+    PassSpec("ToGrometPass", ToGrometPass, ("VariableVersionPass",)),
+    PassSpec(
+        "ToGrfnPass",
+        ToGrfnPass,
+        ("LambdaExpressionPass",),
+        # ToGrfnPass has no visit for imports
+        DESCENDING_TYPES - {AnnCastModelReturn, AnnCastModelImport},
+    ),
+)
+
+
+class PassManager:
+    def __init__(
+        self,
+        target: str,
+        passes: typing.Sequence[PassSpec] = ANN_CAST_PASSES,
+    ):
+        """
+        Schedules the passes needed to run the pass named `target`.
+        Raises a KeyError if a pass requires a pass that is not in `passes`,
+        and a ValueError if the requirements have a cycle.
+        """
+        self.passes = {spec.name: spec for spec in passes}
+        self.schedule = []
+        self.schedule_pass(target, [])
+        # the passes annotating the nodes for other passes, which the target
+        # does not need
+        required = {name for spec in passes for name in spec.requires}
+        self.skipped = [
+            spec.name
+            for spec in passes
+            if spec.name in required and spec not in self.schedule
+        ]
+        # pass name -> (subtrees, nodes) the pass did not visit in the last run
+        self.pruned = {}
+
+    def schedule_pass(self, name: str, requiring: typing.List[str]):
+        if name in requiring:
+            cycle = " -> ".join(requiring + [name])
+            raise ValueError(f"Cyclic AnnCast pass requirements: {cycle}")
+        spec = self.passes[name]
+        if spec in self.schedule:
+            return
+        for required in spec.requires:
+            self.schedule_pass(required, requiring + [name])
+        self.schedule.append(spec)
+
+    def run(
+        self,
+        pipeline_state: PipelineState,
+        measure: typing.Callable = None,
+        after_pass: typing.Callable = None,
+    ):
+        """
+        Runs the scheduled passes on pipeline_state.
+        The uids the passes create are allocated by `pipeline_state.ids`.
+        Every pass is run in the context `measure(pass_name)` if given, and
+        `after_pass(pass_name)` is called after it.
+        """
+        # the passes annotate the nodes without changing the tree, so the
+        # types of the subtrees are the same for every pass
+        subtree_types = None
+        self.pruned = {}
+        for spec in self.schedule:
+            print(f"\nCalling {spec.name}-------------------")
+            pruning = None
+            if spec.descending_types:
+                if subtree_types is None:
+                    subtree_types = SubtreeTypes(pipeline_state.nodes)
+                pruning = SubtreePruning(
+                    subtree_types,
+                    subtree_types.mask_excluding(spec.descending_types),
+                )
+            with contextlib.ExitStack() as stack:
+                if measure is not None:
+                    stack.enter_context(measure(spec.name))
+                if pruning is not None:
+                    stack.enter_context(
+                        pruning.pruning(spec.pass_class._visit)
+                    )
+                stack.enter_context(use_id_allocator(pipeline_state.ids))
+                spec.pass_class(pipeline_state)
+            if pruning is not None:
+                self.pruned[spec.name] = (
+                    pruning.subtrees_skipped,
+                    pruning.nodes_skipped,
+                )
+            if after_pass is not None:
+                after_pass(spec.name)
+
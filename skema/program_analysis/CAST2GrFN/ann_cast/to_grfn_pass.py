@@ -1,5 +1,4 @@
 import typing
-from functools import singledispatchmethod
 
 import networkx as nx
 from skema.model_assembly.metadata import LambdaType
@@ -24,6 +23,8 @@ from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
     call_container_name,
     con_scope_to_str,
     create_container_metadata,
+    dispatchmethod,
+    func_def_instances,
     is_func_def_main,
     lambda_var_from_fullid,
 )
@@ -256,7 +257,7 @@ class ToGrfnPass:
     ):
         return [self.visit(node, subgraph) for node in node_list]
 
-    @singledispatchmethod
+    @dispatchmethod
     def _visit(self, node: AnnCastNode, subgraph: GrFNSubgraph):
         """
         Internal visit
@@ -425,7 +426,9 @@ class ToGrfnPass:
             # container includes top_interface and top_interface outputs
             subgraph.nodes.extend([top_interface] + outputs)
 
-        self.visit_function_def_copy(node.func_def_copy, subgraph)
+        func_def_copy = node.func_def_copy
+        with func_def_instances([func_def_copy]):
+            self.visit_function_def_copy(func_def_copy, subgraph)
 
         # build bot interface
         if len(node.bot_interface_in) > 0:
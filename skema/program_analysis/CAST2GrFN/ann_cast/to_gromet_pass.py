@@ -1,9 +1,8 @@
-from copy import deepcopy
+from collections import ChainMap
 import sys
 
-from skema.utils.misc import uuid
+from skema.utils.misc import new_uid
 
-from functools import singledispatchmethod
 from datetime import datetime
 from time import time
 
@@ -35,6 +34,9 @@ from skema.gromet.metadata import (
     GrometCreation,
 )
 
+from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
+    dispatchmethod,
+)
 from skema.program_analysis.CAST2GrFN.ann_cast.annotated_cast import *
 from skema.program_analysis.PyAST2CAST.modules_list import (
     BUILTINS,
@@ -55,6 +57,97 @@ def is_inline(func_name):
     return func_name == "iter" or func_name == "next" or func_name == "range"
 
 
+class GrometTable(list):
+    """A GroMEt table (a list of boxes, ports, wires or attributes) that
+    indexes its contents, so that adding a port or looking an object up by name
+    does not scan the whole table.
+
+    The indexes are brought up to date lazily, with the objects appended since
+    the last lookup, so objects appended to the table directly are indexed
+    too. Ports are assumed to keep the box, and boxes and ports the name, they
+    had when they were added. The one exception is the name of the FN of an
+    attribute, whose box is usually added after the FN itself is.
+
+    ToGrometPass turns every table back into a plain list when it's done (see
+    plain_gromet_tables).
+
+    Attributes:
+        box_ports: The number of ports on every box.
+        names: The 1-based index of the first object with every name.
+        fn_names: The 1-based index of the first FN attribute with every
+            name.
+    """
+
+    def __init__(self, objects=()):
+        super().__init__(objects)
+        self.clear_indexes()
+
+    def clear_indexes(self):
+        self.indexed = 0
+        self.box_ports = {}
+        self.names = {}
+        self.fn_names = {}
+        # FN attributes that had no box when they were indexed
+        self.unnamed_fns = []
+
+    def update_indexes(self):
+        if self.indexed > len(self):
+            # Objects were removed, start over
+            self.clear_indexes()
+        for idx in range(self.indexed + 1, len(self) + 1):
+            obj = self[idx - 1]
+            if isinstance(obj, GrometPort):
+                self.box_ports[obj.box] = self.box_ports.get(obj.box, 0) + 1
+            if isinstance(obj, TypedValue):
+                if obj.type == AttributeType.FN:
+                    self.unnamed_fns.append((idx, obj.value))
+            else:
+                self.names.setdefault(getattr(obj, "name", None), idx)
+        self.indexed = len(self)
+
+    def port_count(self, box) -> int:
+        self.update_indexes()
+        return self.box_ports.get(box, 0)
+
+    def find_name(self, name):
+        """Returns the 1-based index of the first object called name, or None
+        if there isn't one."""
+        self.update_indexes()
+        return self.names.get(name)
+
+    def find_fn(self, name):
+        """Returns the 1-based index of the first FN attribute whose first box
+        is called name, or None if there isn't one."""
+        self.update_indexes()
+        if self.unnamed_fns:
+            unnamed_fns = []
+            for idx, gromet_fn in self.unnamed_fns:
+                if gromet_fn.b:
+                    fn_name = gromet_fn.b[0].name
+                    if idx < self.fn_names.get(fn_name, idx + 1):
+                        self.fn_names[fn_name] = idx
+                else:
+                    unnamed_fns.append((idx, gromet_fn))
+            self.unnamed_fns = unnamed_fns
+        return self.fn_names.get(name)
+
+
+def plain_gromet_tables(gromet_module):
+    """Replaces the GrometTables in a GroMEt module and its FNs with plain
+    lists."""
+    gromet_fns = [gromet_module.fn] + [
+        attribute.value
+        for attribute in gromet_module.attributes
+        if isinstance(attribute.value, GrometFN)
+    ]
+    for obj in [gromet_module] + gromet_fns:
+        if obj is None:
+            continue
+        for attr, value in vars(obj).items():
+            if value.__class__ is GrometTable:
+                vars(obj)[attr] = list(value)
+
+
 def insert_gromet_object(t: list, obj):
     """Inserts a GroMEt object obj into a GroMEt table t
     Where obj can be
@@ -70,17 +163,15 @@ def insert_gromet_object(t: list, obj):
     first create it, and then insert the value.
     """
 
+    if t is None:
+        t = GrometTable()
+    elif t.__class__ is not GrometTable:
+        t = GrometTable(t)
+
     # Logic for generating port ids
     if isinstance(obj, GrometPort):
-        if t == None:
-            obj.id = 1
-        else:
-            current_box = obj.box
-            current_box_ports = [port for port in t if port.box == current_box]
-            obj.id = len(current_box_ports) + 1
+        obj.id = t.port_count(obj.box) + 1
 
-    if t == None:
-        t = []
     t.append(obj)
 
     return t
@@ -92,6 +183,17 @@ def generate_provenance():
     return Provenance(method=method_name, timestamp=timestamp)
 
 
+# The metadata ToGrometPass attaches to the GroMEt it generates:
+#   - full: a metadata list for every box and port
+#   - interned: identical metadata lists are stored once in the
+#     metadata_collection, and shared by the boxes and ports they describe
+#   - none: no metadata, for runs that only need the GroMEt FNs
+METADATA_FULL = "full"
+METADATA_INTERNED = "interned"
+METADATA_NONE = "none"
+METADATA_MODES = (METADATA_FULL, METADATA_INTERNED, METADATA_NONE)
+
+
 def comp_name_nodes(n1, n2):
     if not isinstance(n1, AnnCastName) and not isinstance(n1, AnnCastUnaryOp):
         return False
@@ -123,27 +225,25 @@ def comp_name_nodes(n1, n2):
 
 
 def find_existing_opi(gromet_fn, opi_name):
-    idx = 1
     if gromet_fn.opi == None:
-        return False, idx
+        return False, 1
 
-    for opi in gromet_fn.opi:
-        if opi_name == opi.name:
-            return True, idx
-        idx += 1
-    return False, idx
+    if gromet_fn.opi.__class__ is not GrometTable:
+        gromet_fn.opi = GrometTable(gromet_fn.opi)
+    idx = gromet_fn.opi.find_name(opi_name)
+    if idx is None:
+        return False, len(gromet_fn.opi) + 1
+    return True, idx
 
 
 def find_existing_pil(gromet_fn, opi_name):
     if gromet_fn.pil == None:
         return -1
 
-    idx = 1
-    for pil in gromet_fn.pil:
-        if opi_name == pil.name:
-            return idx
-        idx += 1
-    return -1
+    if gromet_fn.pil.__class__ is not GrometTable:
+        gromet_fn.pil = GrometTable(gromet_fn.pil)
+    idx = gromet_fn.pil.find_name(opi_name)
+    return -1 if idx is None else idx
 
 
 def get_left_side_name(node):
@@ -169,6 +269,9 @@ class ToGrometPass:
         self.nodes = self.pipeline_state.nodes
 
         self.var_environment = {"global": {}, "args": {}, "local": {}}
+        # The args and local environments of the enclosing scopes, see
+        # push_var_environment
+        self.var_environment_stack = []
         # Attribute accesses check this collection
         # to see if we're using an imported item
         # Function calls to imported functions without their attributes will also check here
@@ -186,6 +289,23 @@ class ToGrometPass:
             metadata_collection=[],
         )
 
+        self.metadata_mode = pipeline_state.gromet_metadata
+        if self.metadata_mode not in METADATA_MODES:
+            raise ValueError(
+                f"Unknown GroMEt metadata mode {self.metadata_mode!r}, "
+                f"expected one of {', '.join(METADATA_MODES)}"
+            )
+        # All the metadata created by the pass share the same provenance
+        self.provenance = generate_provenance()
+        # The SourceCodeReferences and SourceCodeDataTypes created, by their
+        # contents
+        self.source_code_references = {}
+        self.source_code_data_types = {}
+        # The indices of the interned metadata lists, by the ids of the
+        # metadata they hold. The metadata are kept alive by the
+        # metadata_collection, so their ids are not reused.
+        self.metadata_indices = {}
+
         # Everytime we see an AnnCastRecordDef we can store information for it
         # for example the name of the class and indices to its functions
         self.record = {}
@@ -201,6 +321,7 @@ class ToGrometPass:
         for node in self.pipeline_state.nodes:
             self.visit(node, parent_gromet_fn=None, parent_cast_node=None)
 
+        plain_gromet_tables(self.gromet_module)
         pipeline_state.gromet_collection = self.gromet_module
 
     def build_function_arguments_table(self, nodes):
@@ -254,28 +375,55 @@ class ToGrometPass:
             )
 
     def create_source_code_reference(self, ref_info):
-        # return None # comment this when we want metadata
-        if ref_info == None:
+        """
+        Returns the SourceCodeReference of the code at ref_info.
+        References to the same code are the same object.
+        """
+        if ref_info == None or self.metadata_mode == METADATA_NONE:
             return None
 
-        line_begin = ref_info.row_start
-        line_end = ref_info.row_end
-        col_begin = ref_info.col_start
-        col_end = ref_info.col_end
+        key = (
+            ref_info.row_start,
+            ref_info.row_end,
+            ref_info.col_start,
+            ref_info.col_end,
+        )
+        reference = self.source_code_references.get(key)
+        if reference is None:
+            file_uid = str(
+                self.gromet_module.metadata_collection[0][0].files[0].uid
+            )
+            reference = SourceCodeReference(
+                provenance=self.provenance,
+                code_file_reference_uid=file_uid,
+                line_begin=ref_info.row_start,
+                line_end=ref_info.row_end,
+                col_begin=ref_info.col_start,
+                col_end=ref_info.col_end,
+            )
+            self.source_code_references[key] = reference
+        return reference
+
+    def create_source_code_data_type(self, ref):
+        """
+        Returns the SourceCodeDataType of a literal value, given its
+        source_code_data_type (language, language version, data type).
+        """
+        if self.metadata_mode == METADATA_NONE:
+            return None
 
-        # file_uid = str(self.gromet_module.metadata[-1].files[0].uid)
-        file_uid = str(
-            self.gromet_module.metadata_collection[0][0].files[0].uid
-        )
-        # file_uid = ""
-        return SourceCodeReference(
-            provenance=generate_provenance(),
-            code_file_reference_uid=file_uid,
-            line_begin=line_begin,
-            line_end=line_end,
-            col_begin=col_begin,
-            col_end=col_end,
-        )
+        key = (ref[0], ref[1], str(ref[2]))
+        data_type = self.source_code_data_types.get(key)
+        if data_type is None:
+            data_type = SourceCodeDataType(
+                metadata_type="source_code_data_type",
+                provenance=self.provenance,
+                source_language=ref[0],
+                source_language_version=ref[1],
+                data_type=str(ref[2]),
+            )
+            self.source_code_data_types[key] = data_type
+        return data_type
 
     def insert_metadata(self, *metadata):
         """
@@ -283,13 +431,23 @@ class ToGrometPass:
         Then, the index of where this metadata lives is returned
         The idea is that all GroMEt objects that store metadata will store an index
         into metadata_collection that points to the metadata they stored
+        When interning, inserting the same metadata again returns the index
+        of the list inserted first. Without metadata, None is returned.
         """
-        # return None # Uncomment this line if we don't want metadata
-        to_insert = []
-        for md in metadata:
-            to_insert.append(md)
-        self.gromet_module.metadata_collection.append(to_insert)
-        return len(self.gromet_module.metadata_collection)
+        if self.metadata_mode == METADATA_NONE:
+            return None
+
+        if self.metadata_mode == METADATA_INTERNED:
+            key = tuple(map(id, metadata))
+            index = self.metadata_indices.get(key)
+            if index is not None:
+                return index
+
+        self.gromet_module.metadata_collection.append(list(metadata))
+        index = len(self.gromet_module.metadata_collection)
+        if self.metadata_mode == METADATA_INTERNED:
+            self.metadata_indices[key] = index
+        return index
 
     def set_index(self):
         """Called after a Gromet FN is added to the whole collection
@@ -528,20 +686,45 @@ class ToGrometPass:
         If it doesn't find it, the func_idx then represents the index at
         the end of the self.gromet_module.attributes collection.
         """
-        func_idx = 0
-        found_func = False
-        for attribute in self.gromet_module.attributes:
-            if attribute.type == AttributeType.FN:
-                gromet_fn = attribute.value
-                if gromet_fn.b != None:
-                    gromet_fn_b = gromet_fn.b[0]
-                    if gromet_fn_b.name == func_name:
-                        found_func = True
-                        break
-
-            func_idx += 1
+        attributes = self.gromet_module.attributes
+        if attributes.__class__ is not GrometTable:
+            attributes = self.gromet_module.attributes = GrometTable(
+                attributes
+            )
+        func_idx = attributes.find_fn(func_name)
+        if func_idx is None:
+            return len(attributes) + 1, False
+        return func_idx, True
+
+    def push_var_environment(self, new_locals=False):
+        """Enters a scope that is a function of its own in GroMEt (a function
+        or method definition, or the body of a loop or an if). The argument
+        environment of the new scope starts out empty. Its local environment
+        does too if new_locals is True. Otherwise the local variables of the
+        enclosing scope stay visible in it, but the variables added to it are
+        not added to the enclosing scope.
+
+        pop_var_environment restores the environments of the enclosing scope.
+        Nothing is copied, the entries of the environments hold AnnCast nodes
+        and GroMEt ports, which are shared by all the scopes.
+        """
+        self.var_environment_stack.append(
+            (self.var_environment["args"], self.var_environment["local"])
+        )
+        self.var_environment["args"] = {}
+        if new_locals:
+            self.var_environment["local"] = {}
+        else:
+            self.var_environment["local"] = ChainMap(
+                {}, self.var_environment["local"]
+            )
 
-        return func_idx + 1, found_func
+    def pop_var_environment(self):
+        """Leaves the scope entered by the last push_var_environment."""
+        (
+            self.var_environment["args"],
+            self.var_environment["local"],
+        ) = self.var_environment_stack.pop()
 
     def retrieve_var_port(self, var_name):
         if var_name in self.var_environment["local"]:
@@ -590,7 +773,7 @@ class ToGrometPass:
             for node in node_list
         ]
 
-    @singledispatchmethod
+    @dispatchmethod
     def _visit(self, node: AnnCastNode, parent_gromet_fn, parent_cast_node):
         """
         Internal visit
@@ -1729,13 +1912,18 @@ class ToGrometPass:
         if (
             parent_gromet_fn.pof != None and parent_gromet_fn.pif != None
         ):  # NOTE: this is a good guard probably don't need to remove
+            # Wire every pof to every pif with the same name, in the order of
+            # the pofs and then the pifs. The names of pofs can change after
+            # they're added, so they're not indexed.
+            pifs_by_name = {}
+            for j, pif in enumerate(parent_gromet_fn.pif, 1):
+                if pif.name != None:
+                    pifs_by_name.setdefault(pif.name, []).append(j)
             for i, pof in enumerate(parent_gromet_fn.pof, 1):
-                if pof.name != None:
-                    for j, pif in enumerate(parent_gromet_fn.pif, 1):
-                        if pif.name != None and pif.name == pof.name:
-                            parent_gromet_fn.wff = insert_gromet_object(
-                                parent_gromet_fn.wff, GrometWire(src=i, tgt=j)
-                            )
+                for j in pifs_by_name.get(pof.name, ()):
+                    parent_gromet_fn.wff = insert_gromet_object(
+                        parent_gromet_fn.wff, GrometWire(src=i, tgt=j)
+                    )
 
         # in_module = self.func_in_module(node.func.name)
         # in_module = (False, "")
@@ -1982,11 +2170,7 @@ class ToGrometPass:
 
         # Because "new:Record" is a function definition itself we
         # need to maintain an argument environment for it
-        # store copies of previous ones and create new ones
-        arg_env_copy = deepcopy(self.var_environment["args"])
-        local_env_copy = deepcopy(self.var_environment["local"])
-
-        self.var_environment["args"] = {}
+        self.push_var_environment()
 
         # Generate the init new:ClassName FN
         new_gromet.b = insert_gromet_object(
@@ -2226,15 +2410,12 @@ class ToGrometPass:
             self.gromet_module.attributes
         )
 
-        self.var_environment["args"] = deepcopy(arg_env_copy)
-        self.var_environment["local"] = deepcopy(local_env_copy)
+        self.pop_var_environment()
 
         # Generate and store the rest of the functions associated with this record
         for f in node.funcs:
             if isinstance(f, FunctionDef) and f.name.name != "__init__":
-                arg_env_copy = deepcopy(self.var_environment["args"])
-                local_env_copy = deepcopy(self.var_environment["local"])
-                self.var_environment["args"] = {}
+                self.push_var_environment()
 
                 # This is a new function, so  create a GroMEt FN
                 new_gromet = GrometFN()
@@ -2280,8 +2461,7 @@ class ToGrometPass:
                     ),
                 )
 
-                self.var_environment["args"] = deepcopy(arg_env_copy)
-                self.var_environment["local"] = deepcopy(local_env_copy)
+                self.pop_var_environment()
 
                 self.record[node.name][f.name.name] = len(
                     self.gromet_module.attributes
@@ -2632,13 +2812,7 @@ class ToGrometPass:
             node.source_refs[0]
         )
 
-        code_data_metadata = SourceCodeDataType(
-            metadata_type="source_code_data_type",
-            provenance=generate_provenance(),
-            source_language=ref[0],
-            source_language_version=ref[1],
-            data_type=str(ref[2]),
-        )
+        code_data_metadata = self.create_source_code_data_type(ref)
         val = LiteralValue(
             node.value_type if node.value_type is not None else "None",
             node.value if node.value is not None else "None",
@@ -2737,12 +2911,9 @@ class ToGrometPass:
                 GrometBoxFunction(function_type=FunctionType.FUNCTION),
             )
 
-            # Copy the var environment, as we're in a 'function' of sorts
-            # so we need a new var environment
-            var_args_copy = deepcopy(self.var_environment["args"])
-            var_local_copy = deepcopy(self.var_environment["local"])
-            self.var_environment["args"] = {}
-            self.var_environment["local"] = {}
+            # We're in a 'function' of sorts, so we need a new var
+            # environment
+            self.push_var_environment(new_locals=True)
 
             for line in node.init:
                 # Determines if loop's init box function has any opis
@@ -2866,8 +3037,7 @@ class ToGrometPass:
                             GrometWire(src=i, tgt=j),
                         )
 
-            self.var_environment["args"] = var_args_copy
-            self.var_environment["local"] = var_local_copy
+            self.pop_var_environment()
 
         ######### Loop Condition
 
@@ -2987,10 +3157,7 @@ class ToGrometPass:
         # Variable environment for the local variables and function arguments
         # While preserving the old one
         # After we're done with the body of the loop, we restore the old environment
-        previous_func_def_args = deepcopy(self.var_environment["args"])
-        previous_local_args = deepcopy(self.var_environment["local"])
-
-        self.var_environment["args"] = {}
+        self.push_var_environment()
 
         # The Gromet FN for the loop body needs to have its opis and opos generated here, since it isn't an actual FunctionDef here to make it with
         # Any opis we create for this Gromet FN are also added to the variable environment
@@ -3018,8 +3185,7 @@ class ToGrometPass:
         )
 
         # Restore the old variable environment
-        self.var_environment["args"] = previous_func_def_args
-        self.var_environment["local"] = previous_local_args
+        self.pop_var_environment()
 
         # pols become 'locals' from this point on
         # That is, any code that is after the while loop should be looking at the pol ports to fetch data for
@@ -3270,11 +3436,8 @@ class ToGrometPass:
                 GrometPort(name=val, box=len(parent_gromet_fn.bf)),
             )
 
-        # copy the old var environments over since we're going into a function
-        previous_func_def_args = deepcopy(self.var_environment["args"])
-        previous_local_args = deepcopy(self.var_environment["local"])
-
-        self.var_environment["args"] = {}
+        # save the old var environments since we're going into a function
+        self.push_var_environment()
 
         # TODO: determine a better for loop that only grabs what appears in the body of the if_true
         for (_, val) in node.expr_used_vars.items():
@@ -3298,8 +3461,7 @@ class ToGrometPass:
         )
 
         # restore previous var environments
-        self.var_environment["args"] = previous_func_def_args
-        self.var_environment["local"] = previous_local_args
+        self.pop_var_environment()
 
         ########### If false generation
 
@@ -3348,11 +3510,8 @@ class ToGrometPass:
                     GrometPort(name=val, box=len(parent_gromet_fn.bf)),
                 )
 
-            # copy the old var environments over since we're going into a function
-            previous_func_def_args = deepcopy(self.var_environment["args"])
-            previous_local_args = deepcopy(self.var_environment["local"])
-
-            self.var_environment["args"] = {}
+            # save the old var environments since we're going into a function
+            self.push_var_environment()
 
             # TODO: determine a better for loop that only grabs what appears in the body of the if_true
             for (_, val) in node.expr_used_vars.items():
@@ -3379,8 +3538,7 @@ class ToGrometPass:
             )
 
             # restore previous var environments
-            self.var_environment["args"] = previous_func_def_args
-            self.var_environment["local"] = previous_local_args
+            self.pop_var_environment()
 
         # print("-------------- IF DONE  ---")
 
@@ -3510,16 +3668,16 @@ class ToGrometPass:
 
         # Initialize the Gromet module's SourceCodeCollection of CodeFileReferences
         code_file_references = [
-            CodeFileReference(uid=str(uuid.uuid4()), name=file_name, path="")
+            CodeFileReference(uid=new_uid(), name=file_name, path="")
         ]
         self.gromet_module.metadata = self.insert_metadata(
             SourceCodeCollection(
-                provenance=generate_provenance(),
+                provenance=self.provenance,
                 name="",
                 global_reference_id="",
                 files=code_file_references,
             ),
-            GrometCreation(provenance=generate_provenance()),
+            GrometCreation(provenance=self.provenance),
         )
 
         # Outer module box only has name 'module' and its type 'Module'
@@ -1,5 +1,4 @@
 import typing
-from functools import singledispatchmethod
 
 from skema.model_assembly.metadata import VariableCreationReason, LambdaType
 from skema.model_assembly.networks import load_lambda_function
@@ -25,6 +24,8 @@ from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
     create_grfn_literal_node,
     create_grfn_var,
     create_lambda_node_metadata,
+    dispatchmethod,
+    func_def_instances,
     func_def_argument_name,
     func_def_ret_val_name,
     generate_from_source_metadata,
@@ -1063,7 +1064,7 @@ class VariableVersionPass:
         # print(f"\nProcessing node type {class_name}")
         return self._visit(node, assign_lhs)
 
-    @singledispatchmethod
+    @dispatchmethod
     def _visit(self, node: AnnCastNode, assign_lhs: bool):
         """
         Visit each AnnCastNode
@@ -1160,7 +1161,9 @@ class VariableVersionPass:
 
         # we visit the function def copy to version globals appearing in its body
         call_assign_lhs = False
-        self.visit_function_def_copy(node.func_def_copy, call_assign_lhs)
+        func_def_copy = node.func_def_copy
+        with func_def_instances([func_def_copy]):
+            self.visit_function_def_copy(func_def_copy, call_assign_lhs)
 
         # add globals to call interface
         self.add_globals_to_grfn_2_2_call_interfaces(node)
@@ -43,6 +43,8 @@ from skema.program_analysis.CAST2GrFN.model.cast import (
 from skema.program_analysis.CAST2GrFN.visitors import (
     CASTToAIRVisitor,
 )
+from skema.utils import json_stream
+from skema.utils.serializers import CAST_SCHEMA
 from skema.model_assembly.air import AutoMATES_IR
 from skema.model_assembly.networks import GroundedFunctionNetwork
 from skema.model_assembly.structures import (
@@ -91,6 +93,17 @@ CAST_NODES_TYPES_LIST = [
     ValueConstructor,
 ]
 
+# Maps the "node_type" of a JSON CAST object to its class
+CAST_NODE_TYPES = {
+    node_type.__name__: node_type for node_type in CAST_NODES_TYPES_LIST
+}
+
+# A JSON CAST object with all these fields is a SourceRef
+SOURCE_REF_FIELDS = ("row_start", "row_end", "col_start", "col_end")
+
+# JSON values of these types are CAST values as they are
+JSON_SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+
 
 def compare_name_nodes(name1: Name, name2: Name) -> bool:
     """
@@ -280,43 +293,108 @@ class CAST(object):
             indent=4,
         )
 
+    @staticmethod
+    def is_source_ref_json(data: dict) -> bool:
+        return "row_start" in data and all(k in data for k in SOURCE_REF_FIELDS)
+
+    @staticmethod
+    def decode_source_ref(data: dict) -> SourceRef:
+        return CAST_SCHEMA.construct(
+            SourceRef,
+            {
+                "row_start": data["row_start"],
+                "row_end": data["row_end"],
+                "col_start": data["col_start"],
+                "col_end": data["col_end"],
+                "source_file_name": data["source_file_name"],
+            },
+        )
+
     @classmethod
-    def parse_cast_json(cls, data):
-        if isinstance(data, list):
-            # If we see a list parse each one of its elements
-            return [cls.parse_cast_json(item) for item in data]
-        elif data is None:
-            return None
-        elif isinstance(data, (float, int, str, bool)):
-            # If we see a primitave type, simply return its value
-            return data
-        elif all(
-            k in data for k in ("row_start", "row_end", "col_start", "col_end")
-        ):
-            return SourceRef(
-                row_start=data["row_start"],
-                row_end=data["row_end"],
-                col_start=data["col_start"],
-                col_end=data["col_end"],
-                source_file_name=data["source_file_name"],
+    def decode_cast_object(cls, data: dict):
+        """
+        Creates the CAST node or SourceRef for a JSON object whose values have
+        already been decoded
+
+        Raises:
+            CASTJsonException: If the object is not a known CAST node
+        """
+        if cls.is_source_ref_json(data):
+            return cls.decode_source_ref(data)
+
+        node_type = CAST_NODE_TYPES.get(data.get("node_type"))
+        if node_type is None:
+            raise CASTJsonException(
+                f"Unable to decode json CAST field with field names: {set(data.keys())}"
             )
 
-        if "node_type" in data:
-            # Create the object specified by "node_type" object with the values
-            # from its children nodes
-            for node_type in CAST_NODES_TYPES_LIST:
-
-                if node_type.__name__ == data["node_type"]:
-                    node_results = {
-                        k: cls.parse_cast_json(v)
-                        for k, v in data.items()
-                        if k != "node_type"
-                    }
-                    return node_type(**node_results)
-
-        raise CASTJsonException(
-            f"Unable to decode json CAST field with field names: {set(data.keys())}"
-        )
+        # Equivalent to node_type(**fields), without the overhead of
+        # __init__ and the property setters
+        fields = dict(data)
+        del fields["node_type"]
+        return CAST_SCHEMA.construct(node_type, fields)
+
+    @classmethod
+    def parse_cast_json(cls, data):
+        """
+        Decodes JSON CAST data into CAST nodes. The data is walked with an
+        explicit stack instead of recursively, so that deeply nested CAST does
+        not hit the recursion limit.
+
+        Raises:
+            CASTJsonException: If we encounter an unknown CAST node
+        """
+        # Each frame is a list or a CAST node object being decoded: an iterator
+        # over its values, the values decoded so far, and for nodes, the node
+        # type and the keys
+        stack = []
+        value = data
+        while True:
+            if isinstance(value, list):
+                stack.append((iter(value), [], None, None))
+            elif isinstance(value, dict) and not (
+                "row_start" in value
+                and all(k in value for k in SOURCE_REF_FIELDS)
+            ):
+                node_type = CAST_NODE_TYPES.get(value.get("node_type"))
+                if node_type is None:
+                    raise CASTJsonException(
+                        f"Unable to decode json CAST field with field names: {set(value.keys())}"
+                    )
+                stack.append((iter(value.values()), [], node_type, list(value)))
+            else:
+                if isinstance(value, dict):
+                    value = cls.decode_source_ref(value)
+                elif not (
+                    value is None or isinstance(value, (float, int, str, bool))
+                ):
+                    raise CASTJsonException(
+                        f"Unable to decode json CAST value: {value!r}"
+                    )
+                if not stack:
+                    return value
+                stack[-1][1].append(value)
+
+            # Move on to the next list or object. Primitive values are
+            # returned as they are, so they are added to their parent here
+            # directly. Frames that have no values left are closed.
+            while True:
+                values, decoded, node_type, keys = stack[-1]
+                for value in values:
+                    if value.__class__ not in JSON_SCALAR_TYPES:
+                        break
+                    decoded.append(value)
+                else:
+                    stack.pop()
+                    if node_type is not None:
+                        fields = dict(zip(keys, decoded))
+                        del fields["node_type"]
+                        decoded = CAST_SCHEMA.construct(node_type, fields)
+                    if not stack:
+                        return decoded
+                    stack[-1][1].append(decoded)
+                    continue
+                break
 
     @classmethod
     def from_json_data(cls, json_data, cast_source_language="unknown"):
@@ -334,18 +412,38 @@ class CAST(object):
         return cls(nodes, cast_source_language)
 
     @classmethod
-    def from_json_file(cls, json_filepath):
+    def from_json_file(
+        cls, json_filepath, cast_source_language="unknown", stream=False
+    ):
         """
-        Loads json CAST data from a file and returns the created CAST object
+        Loads json CAST data from a file and returns the created CAST object.
+
+        With stream=True, the file is decoded incrementally and iteratively
+        with skema.utils.json_stream, and every CAST node is created as soon
+        as its JSON object has been read, so the JSON text and the
+        dictionaries of the whole document are never in memory at once, and
+        CAST nested deeper than the recursion limit can be loaded. This is
+        several times slower than json.load, which is used otherwise.
 
         Args:
             json_filepath: string of a full filepath to a JSON file
                            representing a CAST with a `nodes` field
+            stream: decode the file with the streaming decoder
+
+        Raises:
+            CASTJsonException: If we encounter an unknown CAST node
 
         Returns:
             CAST: The parsed CAST object.
         """
-        return cls.from_json_data(json.load(open(json_filepath, "r")))
+        with open(json_filepath, "r") as f:
+            if not stream:
+                return cls.from_json_data(json.load(f), cast_source_language)
+            # The objects in the top level "nodes" list are at depth 2
+            json_data = json_stream.load(
+                f, object_hook=cls.decode_cast_object, hook_depth=2
+            )
+        return cls(json_data["nodes"], cast_source_language)
 
     @classmethod
     def from_json_str(cls, json_str):
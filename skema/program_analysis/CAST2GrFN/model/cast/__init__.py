@@ -69,3 +69,9 @@ from skema.program_analysis.CAST2GrFN.model.cast.value_constructor import (
 )
 from skema.program_analysis.CAST2GrFN.model.cast.var import Var
 from skema.program_analysis.CAST2GrFN.model.cast.var_type import VarType
+
+# Use the compiled to_dict of skema.utils.serializers. CAST JSON is decoded by
+# CAST.parse_cast_json, which builds the nodes with CAST_SCHEMA.construct
+from skema.utils.serializers import CAST_SCHEMA
+
+CAST_SCHEMA.install(__name__, from_dict=False)
@@ -33,6 +33,10 @@ class AstNode(object):
 
     attribute_map = {"source_refs": "source_refs"}
 
+    # AstNode has no attributes of its own, so that the AnnCast nodes can keep
+    # theirs in slots, without a __dict__. The CAST nodes still have one.
+    __slots__ = ()
+
     def __init__(self, source_refs=None):  # noqa: E501
         """AstNode - a model defined in Swagger"""  # noqa: E501
         self._source_refs = None
@@ -1,7 +1,7 @@
 import networkx as nx
 
 from functools import singledispatchmethod
-from skema.utils.misc import uuid
+import uuid
 
 from .cast_visitor import CASTVisitor
 from skema.program_analysis.CAST2GrFN.cast import CAST
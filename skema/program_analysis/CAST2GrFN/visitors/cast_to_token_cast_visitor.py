@@ -1,7 +1,6 @@
 import networkx as nx
 
 from functools import singledispatchmethod
-from skema.utils.misc import uuid
 
 from .cast_visitor import CASTVisitor
 from skema.program_analysis.CAST2GrFN.cast import CAST
@@ -0,0 +1,503 @@
+"""
+A static index of the modules that can be imported, and of the names they
+export.
+
+PyAST2CAST needs to know whether an imported module exists, and ToGrometPass
+needs to know which names a 'from x import *' brings in. Answering that by
+importing the modules runs the import-time code of every package the analyzed
+program imports, inside the analysis, and takes seconds for large packages.
+The index instead finds a module by looking for its file on the search path,
+the way the path based finder of the import system does, and reads the names it
+defines from its source (or its .pyi stub) with the ast module, without running
+anything. The only modules that are imported are the builtin and extension
+modules of the standard library, which have no source to read.
+
+Entries are computed on first use, and stored in a cache directory as one JSON
+file per module, so that later processes only have to read them. An entry
+records the files it was computed from, and is computed again when one of them
+changes. Running this module builds the entries of every top level module on
+the search path ahead of time.
+"""
+
+import argparse
+import ast
+import hashlib
+import importlib
+import json
+import os
+import sys
+import sysconfig
+import tempfile
+from importlib.machinery import EXTENSION_SUFFIXES
+
+INDEX_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "SKEMA_MODULE_INDEX_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "skema", "module_index"),
+)
+
+# In the order the import system tries them, except that stubs come first,
+# because they list the names of a module more completely than its source
+SOURCE_SUFFIXES = [".pyi", ".py"]
+
+# The directories of the standard library, without the site-packages inside
+# them
+STDLIB_PATHS = {
+    os.path.normpath(sysconfig.get_paths()[key])
+    for key in ("stdlib", "platstdlib")
+}
+SITE_PATHS = {
+    os.path.normpath(sysconfig.get_paths()[key])
+    for key in ("purelib", "platlib")
+}
+
+
+def is_stdlib_file(path: str) -> bool:
+    path = os.path.normpath(path)
+
+    def is_under(directory):
+        return path.startswith(directory + os.sep)
+
+    return any(map(is_under, STDLIB_PATHS)) and not any(
+        map(is_under, SITE_PATHS)
+    )
+
+
+def default_search_path():
+    """The directories of sys.path. The current working directory is left out,
+    local modules are found by find_local_module."""
+    return [
+        os.path.abspath(p) for p in sys.path if p and os.path.isdir(p)
+    ]
+
+
+def find_module_location(module_name: str, search_path):
+    """Finds the file of a module without importing it.
+
+    Returns:
+        None if the module cannot be found, or a (kind, path) tuple, where kind
+        is "builtin", "source", "stub", "extension" or "namespace". path is the
+        file of the module (the __init__ file of a package), or None for
+        builtin modules and namespace packages.
+    """
+    if module_name in sys.builtin_module_names:
+        return "builtin", None
+
+    directories = list(search_path)
+    parts = module_name.split(".")
+    for i, part in enumerate(parts):
+        is_last = i == len(parts) - 1
+        location = None
+        namespace = []
+        for directory in directories:
+            package = os.path.join(directory, part)
+            if os.path.isdir(package):
+                for suffix in SOURCE_SUFFIXES:
+                    init = os.path.join(package, "__init__" + suffix)
+                    if os.path.isfile(init):
+                        location = (suffix, init, [package])
+                        break
+                if location is not None:
+                    break
+                namespace.append(package)
+
+            for suffix in SOURCE_SUFFIXES + EXTENSION_SUFFIXES:
+                path = os.path.join(directory, part + suffix)
+                if os.path.isfile(path):
+                    location = (suffix, path, None)
+                    break
+            if location is not None:
+                break
+
+        if location is None and namespace:
+            location = (None, None, namespace)
+        if location is None:
+            return None
+
+        suffix, path, package_directories = location
+        if is_last:
+            if suffix is None:
+                return "namespace", None
+            elif suffix == ".pyi":
+                return "stub", path
+            elif suffix == ".py":
+                return "source", path
+            return "extension", path
+        elif package_directories is None:
+            # A module that is not a package has no submodules
+            return None
+        directories = package_directories
+    return None
+
+
+def assigned_names(target):
+    """Yields the names bound by an assignment target."""
+    if isinstance(target, ast.Name):
+        yield target.id
+    elif isinstance(target, (ast.Tuple, ast.List)):
+        for element in target.elts:
+            yield from assigned_names(element)
+    elif isinstance(target, ast.Starred):
+        yield from assigned_names(target.value)
+
+
+def string_list(node):
+    """Returns the strings of a list or tuple literal of strings, or None if
+    node is not one."""
+    if isinstance(node, (ast.List, ast.Tuple)) and all(
+        isinstance(e, ast.Constant) and isinstance(e.value, str)
+        for e in node.elts
+    ):
+        return [e.value for e in node.elts]
+    return None
+
+
+class ModuleDefinitions(ast.NodeVisitor):
+    """Collects the names bound at the top level of a module, its star imports
+    and its __all__, if that is a literal.
+
+    Attributes:
+        names: The names bound at the top level.
+        star_imports: (module, level) for every 'from module import *'.
+        all_names: The names in __all__, or None if the module does not define
+            __all__ as a list of string literals.
+    """
+
+    def __init__(self):
+        self.names = set()
+        self.star_imports = []
+        self.all_names = None
+        self.dynamic_all = False
+
+    def set_all(self, names):
+        if names is None:
+            self.dynamic_all = True
+        elif not self.dynamic_all:
+            self.all_names = names
+
+    def extend_all(self, names):
+        if names is None or self.all_names is None:
+            self.dynamic_all = True
+        elif not self.dynamic_all:
+            self.all_names = self.all_names + names
+
+    def visit_FunctionDef(self, node):
+        self.names.add(node.name)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    visit_ClassDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        pass
+
+    def visit_Assign(self, node):
+        for target in node.targets:
+            names = set(assigned_names(target))
+            if "__all__" in names:
+                self.set_all(
+                    string_list(node.value)
+                    if isinstance(target, ast.Name)
+                    else None
+                )
+            self.names.update(names)
+
+    def visit_AnnAssign(self, node):
+        if isinstance(node.target, ast.Name):
+            self.names.add(node.target.id)
+            if node.target.id == "__all__" and node.value is not None:
+                self.set_all(string_list(node.value))
+
+    def visit_AugAssign(self, node):
+        if isinstance(node.target, ast.Name) and node.target.id == "__all__":
+            self.extend_all(string_list(node.value))
+
+    def visit_Expr(self, node):
+        # __all__.extend([...]) and __all__.append("...")
+        call = node.value
+        if (
+            isinstance(call, ast.Call)
+            and isinstance(call.func, ast.Attribute)
+            and isinstance(call.func.value, ast.Name)
+            and call.func.value.id == "__all__"
+        ):
+            argument = call.args[0] if len(call.args) == 1 else None
+            if call.func.attr == "extend":
+                self.extend_all(string_list(argument))
+            elif call.func.attr == "append" and isinstance(
+                argument, ast.Constant
+            ):
+                self.extend_all([argument.value])
+            else:
+                self.dynamic_all = True
+
+    def visit_For(self, node):
+        self.names.update(assigned_names(node.target))
+        self.generic_visit(node)
+
+    visit_AsyncFor = visit_For
+
+    def visit_With(self, node):
+        for item in node.items:
+            if item.optional_vars is not None:
+                self.names.update(assigned_names(item.optional_vars))
+        self.generic_visit(node)
+
+    visit_AsyncWith = visit_With
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.names.add(alias.asname or alias.name.split(".")[0])
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            if alias.name == "*":
+                self.star_imports.append((node.module, node.level))
+            else:
+                self.names.add(alias.asname or alias.name)
+
+    def visit_NamedExpr(self, node):
+        self.names.update(assigned_names(node.target))
+
+    def generic_visit(self, node):
+        # Only statements at the top level of the module (including the ones
+        # in if, try, with and loop blocks) bind module names
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.stmt, ast.excepthandler, ast.expr)):
+                self.visit(child)
+
+    def visit_ExceptHandler(self, node):
+        if node.name:
+            self.names.add(node.name)
+        self.generic_visit(node)
+
+
+class ModuleIndex:
+    """The modules on a search path, and the names they export.
+
+    Args:
+        search_path: The directories to look for modules in, by default the
+            ones on sys.path.
+        cache_dir: The directory the entries are stored in. If None, entries
+            are only kept in memory.
+    """
+
+    def __init__(self, search_path=None, cache_dir=DEFAULT_CACHE_DIR):
+        if search_path is None:
+            search_path = default_search_path()
+        self.search_path = list(search_path)
+        self.entries = {}
+        self.cache_dir = None
+        if cache_dir is not None:
+            # Indexes of different interpreters or search paths do not share
+            # entries
+            key = hashlib.sha256(
+                json.dumps([sys.version, self.search_path]).encode()
+            ).hexdigest()[:16]
+            self.cache_dir = os.path.join(cache_dir, key)
+
+    def entry_path(self, module_name: str) -> str:
+        return os.path.join(self.cache_dir, module_name + ".json")
+
+    def entry(self, module_name: str):
+        """Returns the entry of a module, or None if it cannot be found. An
+        entry is a dict with the keys name, kind, file, exports (a list of
+        names, or None if they are not known) and sources (the files the entry
+        was computed from)."""
+        if module_name in self.entries:
+            return self.entries[module_name]
+
+        entry = self.read_entry(module_name)
+        if entry is None:
+            entry = self.compute_entry(module_name, set())
+            if entry is not None:
+                self.write_entry(entry)
+        self.entries[module_name] = entry
+        return entry
+
+    def has_module(self, module_name: str) -> bool:
+        """Checks whether module_name can be imported."""
+        return self.entry(module_name) is not None
+
+    def exports(self, module_name: str) -> frozenset:
+        """Returns the names that 'from module_name import *' binds. It is
+        empty if the module cannot be found, or has no source to read."""
+        entry = self.entry(module_name)
+        if entry is None or entry["exports"] is None:
+            return frozenset()
+        return frozenset(entry["exports"])
+
+    def read_entry(self, module_name: str):
+        """Reads the stored entry of a module, if there is one and the files
+        it was computed from did not change."""
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self.entry_path(module_name)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != INDEX_VERSION:
+            return None
+        for path, mtime, size in entry["sources"]:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            if stat.st_mtime_ns != mtime or stat.st_size != size:
+                return None
+        return entry
+
+    def write_entry(self, entry: dict):
+        if self.cache_dir is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Written to a temporary file first, so that a concurrent reader
+            # never sees a partial entry
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, self.entry_path(entry["name"]))
+        except OSError:
+            pass
+
+    def compute_entry(self, module_name: str, visiting: set):
+        """Computes the entry of a module. visiting holds the modules whose
+        star imports are being resolved, to break import cycles."""
+        location = find_module_location(module_name, self.search_path)
+        if location is None:
+            # Modules that only exist in sys.modules, like os.path, which os
+            # sets to posixpath or ntpath
+            module = sys.modules.get(module_name)
+            path = getattr(module, "__file__", None)
+            if path is None or not is_stdlib_file(path):
+                return None
+            location = ("source", path)
+        kind, path = location
+
+        entry = {
+            "version": INDEX_VERSION,
+            "name": module_name,
+            "kind": kind,
+            "file": path,
+            "exports": None,
+            "sources": [],
+        }
+        if path is not None:
+            stat = os.stat(path)
+            entry["sources"].append([path, stat.st_mtime_ns, stat.st_size])
+
+        if kind in ("source", "stub"):
+            self.read_exports(entry, visiting | {module_name})
+        elif kind == "builtin" or (
+            kind == "extension" and is_stdlib_file(path)
+        ):
+            # Standard library modules without source have no import time
+            # side effects, so they are imported to list their names
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError:
+                return entry
+            exports = getattr(module, "__all__", None)
+            if exports is None:
+                exports = [n for n in dir(module) if not n.startswith("_")]
+            entry["exports"] = sorted(exports)
+        return entry
+
+    def read_exports(self, entry: dict, visiting: set):
+        """Sets the exports of the entry of a module with source, and adds the
+        files of the modules it star imports to its sources."""
+        try:
+            with open(entry["file"], "rb") as f:
+                tree = ast.parse(f.read(), entry["file"])
+        except (SyntaxError, ValueError, OSError):
+            return
+
+        definitions = ModuleDefinitions()
+        definitions.visit(tree)
+        names = set(definitions.names)
+
+        is_package = os.path.basename(entry["file"]).startswith("__init__.")
+        for module, level in definitions.star_imports:
+            if level > 0:
+                package = entry["name"]
+                if not is_package:
+                    package = package.rpartition(".")[0]
+                for _ in range(level - 1):
+                    package = package.rpartition(".")[0]
+                module = f"{package}.{module}" if module else package
+            if module in visiting:
+                continue
+
+            imported = self.entries.get(module)
+            if imported is None:
+                imported = self.compute_entry(module, visiting)
+            if imported is not None:
+                names.update(imported["exports"] or [])
+                entry["sources"].extend(imported["sources"])
+
+        if definitions.all_names is not None and not definitions.dynamic_all:
+            exports = definitions.all_names
+        else:
+            exports = [n for n in names if not n.startswith("_")]
+        entry["exports"] = sorted(set(exports))
+
+    def build(self) -> int:
+        """Computes and stores the entries of every top level module on the
+        search path. Returns the number of modules indexed."""
+        module_names = set(sys.builtin_module_names)
+        for directory in self.search_path:
+            try:
+                file_names = os.listdir(directory)
+            except OSError:
+                continue
+            for file_name in file_names:
+                path = os.path.join(directory, file_name)
+                name, suffix = os.path.splitext(file_name)
+                if os.path.isdir(path):
+                    name = file_name
+                elif suffix not in SOURCE_SUFFIXES:
+                    name = next(
+                        (
+                            file_name[: -len(s)]
+                            for s in EXTENSION_SUFFIXES
+                            if file_name.endswith(s)
+                        ),
+                        None,
+                    )
+                if name and name.isidentifier():
+                    module_names.add(name)
+
+        count = 0
+        for name in sorted(module_names):
+            if self.entry(name) is not None:
+                count += 1
+        return count
+
+
+default_index = None
+
+
+def get_module_index() -> ModuleIndex:
+    """Returns the index of the modules on sys.path, which is created on first
+    use."""
+    global default_index
+    if default_index is None:
+        default_index = ModuleIndex()
+    return default_index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Builds the module index of the modules on sys.path"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help="Directory the index is stored in",
+    )
+    args = parser.parse_args()
+    index = ModuleIndex(cache_dir=args.cache_dir)
+    print(f"Indexed {index.build()} modules in {index.cache_dir}")
@@ -292,18 +292,84 @@ BUILTINS = [
     "zlib",
     "zoneinfo",
 ]
-import importlib
+import ast
+import os
+
+from skema.program_analysis.PyAST2CAST.module_index import get_module_index
+
+
+def virtual_file_tree(file_paths):
+    """Given the paths of the files of a system that only exists in memory,
+    returns the set of those paths and of all their parent directories, which
+    find_local_module can resolve imports against."""
+    tree = set()
+    for path in file_paths:
+        path = os.path.normpath(path)
+        while path and path not in tree:
+            tree.add(path)
+            path = os.path.dirname(path)
+    return tree
+
+
+def find_local_module(module_name, search_path, virtual_files=None):
+    """Checks whether module_name can be imported from one of the directories
+    in search_path. This only looks for the module's source file (or package
+    directory), it does not import anything, and it does not depend on
+    the current working directory unless search_path contains relative paths.
+    If virtual_files is given (see virtual_file_tree), the module is looked up
+    in it instead of on disk.
+    """
+    parts = module_name.split(".")
+    for directory in search_path:
+        base = os.path.normpath(os.path.join(directory, *parts))
+        if virtual_files is not None:
+            if f"{base}.py" in virtual_files or base in virtual_files:
+                return True
+        elif os.path.isfile(f"{base}.py") or os.path.isdir(base):
+            return True
+    return False
 
 
 def find_std_lib_module(module_name):
-    try:
-        library = importlib.util.find_spec(module_name)
-        if library == None:
-            return False
-        print(f"found {library.name}")
-        return True
-    except:
+    """Checks whether module_name is a standard library or installed module.
+    This looks the module up in the static module index, it does not import
+    it.
+    """
+    return get_module_index().has_module(module_name)
+
+
+def is_known_module(module_name, search_path, virtual_files=None):
+    """Checks whether an imported module can be resolved, either as a
+    builtin, as a module in one of the directories of search_path (see
+    find_local_module), or as an installed module. The conversion to CAST
+    drops the imports of the modules that cannot be resolved.
+    """
+    if module_name is None:
         return False
+    return bool(
+        module_name in BUILTINS
+        or find_local_module(module_name, search_path, virtual_files)
+        or find_std_lib_module(module_name)
+    )
+
+
+def resolve_imports(source, search_path, virtual_files=None):
+    """Returns whether every module imported by the Python source can be
+    resolved (see is_known_module), as a dict sorted by module name. The CAST
+    of a file depends on these, as well as on its source.
+    """
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module is not None:
+            names.add(node.module)
+            # the module of a later import from can be an alias of these
+            names.update(alias.name for alias in node.names)
+    return {
+        name: is_known_module(name, search_path, virtual_files)
+        for name in sorted(names)
+    }
 
 
 def find_func_in_module(module_name, func_name):
@@ -311,11 +377,8 @@ def find_func_in_module(module_name, func_name):
     'from x import *', all the functions for module x
     then become bound to the namespace but don't have their attributes attached to the module x
     That is, they're called using just their name as opposed to x.func_name().
-    This function attempts to find a function in such a module by importing it and then
-    using 'dir' to determine if func_name is within module_name's list of functions
+    This function checks whether func_name is one of the names that
+    'from module_name import *' binds, according to the static module index,
+    without importing the module.
     """
-    # TODO: Metapath finder, find_spec
-    # TODO: cache the module objects to look back so we dont do multiple imports in a map
-    module_import = importlib.import_module(module_name)
-    funcs = list(dir(module_import))
-    return func_name in funcs
+    return func_name in get_module_index().exports(module_name)
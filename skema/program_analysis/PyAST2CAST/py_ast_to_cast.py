@@ -4,8 +4,8 @@ import os
 import copy
 import sys
 from functools import singledispatchmethod
+from types import GeneratorType
 
-from skema.utils.misc import uuid
 from skema.program_analysis.astpp import parseprint
 from skema.program_analysis.CAST2GrFN.model.cast import (
     AstNode,
@@ -46,10 +46,7 @@ from skema.program_analysis.CAST2GrFN.model.cast import (
     source_code_data_type,
     source_ref,
 )
-from skema.program_analysis.PyAST2CAST.modules_list import (
-    BUILTINS,
-    find_std_lib_module,
-)
+from skema.program_analysis.PyAST2CAST.modules_list import is_known_module
 
 
 def merge_dicts(prev_scope, curr_scope):
@@ -179,9 +176,17 @@ class PyASTToCAST:
         - Classes
         - Var_Count
         - global_identifier_dict
+        - module_search_path
     """
 
-    def __init__(self, file_name: str, legacy: Boolean = False):
+    def __init__(
+        self,
+        file_name: str,
+        legacy: Boolean = False,
+        root_path: str = None,
+        module_search_path: list = None,
+        virtual_files: set = None,
+    ):
         """Initializes any auxiliary data structures that are used
         for generating CAST.
         The current data structures are:
@@ -198,6 +203,12 @@ class PyASTToCAST:
         - global_identifier_dict: A dictionary used to map global variables to unique identifiers
         - legacy: A flag used to determine whether we generate old style CAST (uses strings for function def names)
                   or new style CAST (uses Name CAST nodes for function def names)
+        - module_search_path: A list of directories that imports are resolved against, starting with
+                  root_path (usually the directory of the file being converted). Resolving imports against
+                  this list, instead of the current working directory, allows multiple conversions to run
+                  concurrently in the same process
+        - virtual_files: If set, the paths of a system that only exists in memory. Imports are then resolved
+                  against these paths instead of the file system
         """
 
         self.aliases = {}
@@ -209,6 +220,10 @@ class PyASTToCAST:
         self.global_identifier_dict = {}
         self.id_count = 0
         self.legacy = legacy
+        self.module_search_path = list(module_search_path or [])
+        if root_path is not None:
+            self.module_search_path.insert(0, root_path)
+        self.virtual_files = virtual_files
 
     def insert_next_id(self, scope_dict: Dict, dict_key: str):
         """Given a scope_dictionary and a variable name as a key,
@@ -226,6 +241,15 @@ class PyASTToCAST:
         self.id_count += 1
         return new_id_to_insert
 
+    def is_known_module(self, module_name: str):
+        """Checks whether an imported module can be resolved, either as a
+        builtin, as a module on the module search path, or as an installed
+        module.
+        """
+        return is_known_module(
+            module_name, self.module_search_path, self.virtual_files
+        )
+
     def insert_alias(self, originString, alias: String):
         """Inserts an alias into a dictionary that keeps track of aliases for
             names that are aliased. For example, the following import
@@ -328,16 +352,70 @@ class PyASTToCAST:
 
         return None
 
-    @singledispatchmethod
     def visit(
         self, node: AstNode, prev_scope_id_dict: Dict, curr_scope_id_dict: Dict
+    ):
+        """Visits node, and returns the CAST generated for it.
+
+        The visitors that visit the children of their node are generators.
+        To visit a child, they yield the arguments of the visit, i.e.
+            (yield child, prev_scope_id_dict, curr_scope_id_dict)
+        evaluates to the CAST of the child, and they return their own CAST.
+        The visitors are run here with an explicit stack instead of calling
+        each other, so that deeply nested code (long elif chains, long
+        expressions) does not reach the recursion limit.
+        """
+        dispatch = self._visit
+        result = dispatch(node, prev_scope_id_dict, curr_scope_id_dict)
+        if not isinstance(result, GeneratorType):
+            return result
+
+        # the visitors that are waiting for the CAST of a child
+        stack = [result]
+        value = None
+        error = None
+        while stack:
+            try:
+                if error is None:
+                    child_args = stack[-1].send(value)
+                else:
+                    child_args = stack[-1].throw(error)
+            except StopIteration as stop:
+                stack.pop()
+                value, error = stop.value, None
+                continue
+            except Exception as e:
+                # raised to the visitor of the parent node
+                stack.pop()
+                if not stack:
+                    raise
+                error = e
+                continue
+
+            error = None
+            try:
+                result = dispatch(*child_args)
+            except Exception as e:
+                error = e
+                continue
+            if isinstance(result, GeneratorType):
+                stack.append(result)
+                value = None
+            else:
+                value = result
+
+        return value
+
+    @singledispatchmethod
+    def _visit(
+        self, node: AstNode, prev_scope_id_dict: Dict, curr_scope_id_dict: Dict
     ):
         # print(f"Trying to visit a node of type {type(node)} but a visitor doesn't exist")
         # if(node != None):
         #    print(f"This is at line {node.lineno}")
         pass
 
-    @visit.register
+    @_visit.register
     def visit_JoinedStr(
         self,
         node: ast.JoinedStr,
@@ -364,7 +442,7 @@ class PyASTToCAST:
                     )
                 )
             else:
-                f_string_val = self.visit(
+                f_string_val = (yield 
                     s.value, prev_scope_id_dict, curr_scope_id_dict
                 )
                 str_pieces.append(
@@ -399,7 +477,7 @@ class PyASTToCAST:
             )
         ]
 
-    @visit.register
+    @_visit.register
     def visit_GeneratorExp(
         self,
         node: ast.GeneratorExp,
@@ -421,9 +499,9 @@ class PyASTToCAST:
             end_col_offset=ref[1],
         )
 
-        return self.visit(to_visit, prev_scope_id_dict, curr_scope_id_dict)
+        return (yield to_visit, prev_scope_id_dict, curr_scope_id_dict)
 
-    @visit.register
+    @_visit.register
     def visit_Delete(
         self,
         node: ast.Delete,
@@ -450,7 +528,7 @@ class PyASTToCAST:
             )
         ]
 
-    @visit.register
+    @_visit.register
     def visit_Ellipsis(
         self,
         node: ast.Ellipsis,
@@ -473,7 +551,7 @@ class PyASTToCAST:
             )
         ]
 
-    @visit.register
+    @_visit.register
     def visit_Slice(
         self,
         node: ast.Slice,
@@ -500,7 +578,7 @@ class PyASTToCAST:
             )
         ]
 
-    @visit.register
+    @_visit.register
     def visit_ExtSlice(
         self,
         node: ast.ExtSlice,
@@ -527,7 +605,7 @@ class PyASTToCAST:
             )
         ]
 
-    @visit.register
+    @_visit.register
     def visit_Assign(
         self,
         node: ast.Assign,
@@ -587,12 +665,12 @@ class PyASTToCAST:
                         prev_scope_id_dict[
                             unique_name
                         ] = self.global_identifier_dict[unique_name]
-                    idx = self.visit(
+                    idx = (yield 
                         node.value.slice,
                         prev_scope_id_dict,
                         curr_scope_id_dict,
                     )[0]
-                    val = self.visit(
+                    val = (yield 
                         node.value.value,
                         prev_scope_id_dict,
                         curr_scope_id_dict,
@@ -609,14 +687,14 @@ class PyASTToCAST:
                         source_refs=ref,
                     )
                 else:
-                    val = self.visit(
+                    val = (yield 
                         node.value, prev_scope_id_dict, curr_scope_id_dict
                     )[0]
 
-                idx = self.visit(
+                idx = (yield 
                     sub_node.slice, prev_scope_id_dict, curr_scope_id_dict
                 )[0]
-                list_name = self.visit(
+                list_name = (yield 
                     sub_node.value, prev_scope_id_dict, curr_scope_id_dict
                 )[0]
                 # print("-------------")
@@ -636,8 +714,8 @@ class PyASTToCAST:
                             self.insert_next_id(self.global_identifier_dict, unique_name)
 
                         prev_scope_id_dict[unique_name] = self.global_identifier_dict[unique_name]
-                    idx = self.visit(arg.slice, prev_scope_id_dict, curr_scope_id_dict)[0]
-                    val = self.visit(arg.value, prev_scope_id_dict, curr_scope_id_dict)[0]
+                    idx = (yield arg.slice, prev_scope_id_dict, curr_scope_id_dict)[0]
+                    val = (yield arg.value, prev_scope_id_dict, curr_scope_id_dict)[0]
                     args = [val, idx]
 
                     func_args.extend([Call(Name("_List_get", id=prev_scope_id_dict[unique_name], source_refs=ref), args, source_refs=ref)])
@@ -699,13 +777,13 @@ class PyASTToCAST:
                         unique_name
                     ] = self.global_identifier_dict[unique_name]
 
-                var_name = self.visit(
+                var_name = (yield 
                     node.targets[0], prev_scope_id_dict, curr_scope_id_dict
                 )[0]
-                idx = self.visit(
+                idx = (yield 
                     node.value.slice, prev_scope_id_dict, curr_scope_id_dict
                 )[0]
-                val = self.visit(
+                val = (yield 
                     node.value.value, prev_scope_id_dict, curr_scope_id_dict
                 )[0]
                 args = [val, idx]
@@ -755,7 +833,7 @@ class PyASTToCAST:
                         if get_op(binop.op) == "Add"
                         else None
                     )
-                    cons.size = self.visit(
+                    cons.size = (yield 
                         operand, prev_scope_id_dict, curr_scope_id_dict
                     )[0]
                     cons.initial_value = LiteralValue(
@@ -807,16 +885,16 @@ class PyASTToCAST:
                     )
 
                     # print(to_ret)
-                    l_visit = self.visit(
+                    l_visit = (yield 
                         node.targets[0], prev_scope_id_dict, curr_scope_id_dict
                     )
                     left.extend(l_visit)
                     return [Assignment(left[0], to_ret, source_refs=ref)]
 
-            l_visit = self.visit(
+            l_visit = (yield 
                 node.targets[0], prev_scope_id_dict, curr_scope_id_dict
             )
-            r_visit = self.visit(
+            r_visit = (yield 
                 node.value, prev_scope_id_dict, curr_scope_id_dict
             )
             left.extend(l_visit)
@@ -825,13 +903,13 @@ class PyASTToCAST:
             len(node.targets) > 1
         ):  # x = y = z = ... {Expression} (multiple assignments in one line)
             left.extend(
-                self.visit(
+                (yield 
                     node.targets[0], prev_scope_id_dict, curr_scope_id_dict
                 )
             )
             node.targets = node.targets[1:]
             right.extend(
-                self.visit(node, prev_scope_id_dict, curr_scope_id_dict)
+                (yield node, prev_scope_id_dict, curr_scope_id_dict)
             )
         else:
             raise ValueError(
@@ -875,7 +953,7 @@ class PyASTToCAST:
         else:
             return [Assignment(left[0], right[0], source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_Attribute(
         self,
         node: ast.Attribute,
@@ -911,7 +989,7 @@ class PyASTToCAST:
             )
         ]
 
-        value_cast = self.visit(
+        value_cast = (yield 
             node.value, prev_scope_id_dict, curr_scope_id_dict
         )
         unique_name = (
@@ -949,7 +1027,7 @@ class PyASTToCAST:
 
         return [Attribute(value_cast[0], attr_cast, source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_AugAssign(
         self,
         node: ast.AugAssign,
@@ -1032,9 +1110,9 @@ class PyASTToCAST:
                 end_lineno=node.end_lineno,
             )
 
-        return self.visit(convert, prev_scope_id_dict, curr_scope_id_dict)
+        return (yield convert, prev_scope_id_dict, curr_scope_id_dict)
 
-    @visit.register
+    @_visit.register
     def visit_BinOp(
         self,
         node: ast.BinOp,
@@ -1052,9 +1130,9 @@ class PyASTToCAST:
                       operation (arithmetic or bitwise)
         """
 
-        left = self.visit(node.left, prev_scope_id_dict, curr_scope_id_dict)
+        left = (yield node.left, prev_scope_id_dict, curr_scope_id_dict)
         op = get_op(node.op)
-        right = self.visit(node.right, prev_scope_id_dict, curr_scope_id_dict)
+        right = (yield node.right, prev_scope_id_dict, curr_scope_id_dict)
 
         ref = [
             SourceRef(
@@ -1079,7 +1157,7 @@ class PyASTToCAST:
             + [BinaryOp(op, left[-1], right[-1], source_refs=ref)]
         )
 
-    @visit.register
+    @_visit.register
     def visit_Break(
         self,
         node: ast.Break,
@@ -1109,7 +1187,7 @@ class PyASTToCAST:
         ]
         return [ModelBreak(source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_BoolOp(
         self,
         node: ast.BoolOp,
@@ -1147,9 +1225,9 @@ class PyASTToCAST:
             lineno=node.lineno,
             end_lineno=node.end_lineno,
         )
-        return self.visit(compare_op, prev_scope_id_dict, curr_scope_id_dict)
+        return (yield compare_op, prev_scope_id_dict, curr_scope_id_dict)
 
-    @visit.register
+    @_visit.register
     def visit_Call(
         self,
         node: ast.Call,
@@ -1202,10 +1280,10 @@ class PyASTToCAST:
                         prev_scope_id_dict[
                             unique_name
                         ] = self.global_identifier_dict[unique_name]
-                    idx = self.visit(
+                    idx = (yield 
                         arg.slice, prev_scope_id_dict, curr_scope_id_dict
                     )[0]
-                    val = self.visit(
+                    val = (yield 
                         arg.value, prev_scope_id_dict, curr_scope_id_dict
                     )[0]
                     args = [val, idx]
@@ -1235,7 +1313,7 @@ class PyASTToCAST:
                             Name(name=arg.value.id, id=-1, source_refs=ref)
                         )
                 else:
-                    res = self.visit(
+                    res = (yield 
                         arg, prev_scope_id_dict, curr_scope_id_dict
                     )
                     if res != None:
@@ -1247,7 +1325,7 @@ class PyASTToCAST:
                 # print(prev_scope_id_dict)
                 # print(curr_scope_id_dict)
                 if arg.arg != None:
-                    val = self.visit(
+                    val = (yield 
                         arg.value, prev_scope_id_dict, curr_scope_id_dict
                     )[0]
                     assign_node = Assignment(
@@ -1260,7 +1338,7 @@ class PyASTToCAST:
                         source_refs=ref,
                     )
                 elif isinstance(arg.value, ast.Dict):
-                    val = self.visit(
+                    val = (yield 
                         arg.value, prev_scope_id_dict, curr_scope_id_dict
                     )[0]
                     assign_node = val
@@ -1285,7 +1363,7 @@ class PyASTToCAST:
         args = func_args + kw_args
 
         if isinstance(node.func, ast.Attribute):
-            res = self.visit(node.func, prev_scope_id_dict, curr_scope_id_dict)
+            res = (yield node.func, prev_scope_id_dict, curr_scope_id_dict)
             return [Call(res[0], args, source_refs=ref)]
         else:
             # In the case we're calling a function that doesn't have an identifier already
@@ -1453,7 +1531,7 @@ class PyASTToCAST:
 
         return fields
 
-    @visit.register
+    @_visit.register
     def visit_ClassDef(
         self,
         node: ast.ClassDef,
@@ -1478,7 +1556,7 @@ class PyASTToCAST:
         bases = []
         for base in node.bases:
             bases.extend(
-                self.visit(base, prev_scope_id_dict, curr_scope_id_dict)
+                (yield base, prev_scope_id_dict, curr_scope_id_dict)
             )
 
         fields = []
@@ -1492,7 +1570,7 @@ class PyASTToCAST:
                         )
                     )
                 funcs.extend(
-                    self.visit(func, prev_scope_id_dict, curr_scope_id_dict)
+                    (yield func, prev_scope_id_dict, curr_scope_id_dict)
                 )
                 # if isinstance(func,ast.FunctionDef):
                 self.classes[name].append(func.name)
@@ -1546,7 +1624,7 @@ class PyASTToCAST:
         ]
         return [RecordDef(name, bases, funcs, fields, source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_Compare(
         self,
         node: ast.Compare,
@@ -1601,11 +1679,11 @@ class PyASTToCAST:
                 row_end=node.end_lineno,
             )
         ]
-        l = self.visit(left, prev_scope_id_dict, curr_scope_id_dict)
-        r = self.visit(right, prev_scope_id_dict, curr_scope_id_dict)
+        l = (yield left, prev_scope_id_dict, curr_scope_id_dict)
+        r = (yield right, prev_scope_id_dict, curr_scope_id_dict)
         return [BinaryOp(op, l[0], r[0], source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_Constant(
         self,
         node: ast.Constant,
@@ -1673,7 +1751,7 @@ class PyASTToCAST:
         else:
             raise TypeError(f"Type {str(type(node.value))} not supported")
 
-    @visit.register
+    @_visit.register
     def visit_Continue(
         self,
         node: ast.Continue,
@@ -1701,7 +1779,7 @@ class PyASTToCAST:
         ]
         return [ModelContinue(source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_Dict(
         self,
         node: ast.Dict,
@@ -1724,7 +1802,7 @@ class PyASTToCAST:
             for piece in node.keys:
                 if piece != None:
                     keys.extend(
-                        self.visit(
+                        (yield 
                             piece, prev_scope_id_dict, curr_scope_id_dict
                         )
                     )
@@ -1733,7 +1811,7 @@ class PyASTToCAST:
             for piece in node.values:
                 if piece != None:
                     values.extend(
-                        self.visit(
+                        (yield 
                             piece, prev_scope_id_dict, curr_scope_id_dict
                         )
                     )
@@ -1771,7 +1849,7 @@ class PyASTToCAST:
             )
         ]
 
-    @visit.register
+    @_visit.register
     def visit_Expr(
         self,
         node: ast.Expr,
@@ -1799,12 +1877,12 @@ class PyASTToCAST:
                 row_end=node.end_lineno,
             )
         ]
-        val = self.visit(node.value, prev_scope_id_dict, curr_scope_id_dict)
+        val = (yield node.value, prev_scope_id_dict, curr_scope_id_dict)
         if len(val) > 1:
             return val
         return [Expr(val[0], source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_For(
         self, node: ast.For, prev_scope_id_dict: Dict, curr_scope_id_dict: Dict
     ):
@@ -1833,10 +1911,10 @@ class PyASTToCAST:
             )
         ]
 
-        target = self.visit(
+        target = (yield 
             node.target, prev_scope_id_dict, curr_scope_id_dict
         )[0]
-        iterable = self.visit(
+        iterable = (yield 
             node.iter, prev_scope_id_dict, curr_scope_id_dict
         )[0]
 
@@ -1853,7 +1931,7 @@ class PyASTToCAST:
         body = []
         for piece in node.body + node.orelse:
             body.extend(
-                self.visit(piece, curr_scope_id_dict, loop_scope_id_dict)
+                (yield piece, curr_scope_id_dict, loop_scope_id_dict)
             )
 
         # Once we're out of the loop body we can copy the current scope back
@@ -1966,7 +2044,7 @@ class PyASTToCAST:
             )
         ]
 
-    @visit.register
+    @_visit.register
     def visit_FunctionDef(
         self,
         node: ast.FunctionDef,
@@ -2033,7 +2111,7 @@ class PyASTToCAST:
                 if arg_count == default_val_count:
                     for i, arg in enumerate(node.args.args, 0):
                         self.insert_next_id(curr_scope_id_dict, arg.arg)
-                        val = self.visit(
+                        val = (yield 
                             node.args.defaults[i],
                             prev_scope_id_dict,
                             curr_scope_id_dict,
@@ -2111,7 +2189,7 @@ class PyASTToCAST:
                         # unique_name = construct_unique_name(self.filenames[-1], arg.arg)
                         arg = node.args.args[pos_idx]
                         self.insert_next_id(curr_scope_id_dict, arg.arg)
-                        val = self.visit(
+                        val = (yield 
                             node.args.defaults[default_index],
                             prev_scope_id_dict,
                             curr_scope_id_dict,
@@ -2235,7 +2313,7 @@ class PyASTToCAST:
                 # These asserts will keep us from visiting them from now
                 # assert not isinstance(piece, ast.Import)
                 # assert not isinstance(piece, ast.ImportFrom)
-                to_add = self.visit(
+                to_add = (yield 
                     piece, prev_scope_id_dict, curr_scope_id_dict
                 )
 
@@ -2256,7 +2334,7 @@ class PyASTToCAST:
 
             # Visit the deferred functions
             for piece in functions_to_visit:
-                to_add = self.visit(piece, curr_scope_id_dict, {})
+                to_add = (yield piece, curr_scope_id_dict, {})
                 body.extend(to_add)
 
         # TODO: Decorators? Returns? Type_comment?
@@ -2329,7 +2407,7 @@ class PyASTToCAST:
                     )
                 ]
 
-    @visit.register
+    @_visit.register
     def visit_Lambda(
         self,
         node: ast.Lambda,
@@ -2385,7 +2463,7 @@ class PyASTToCAST:
                     )
                 )
 
-        body = self.visit(node.body, prev_scope_id_dict, curr_scope_id_dict)
+        body = (yield node.body, prev_scope_id_dict, curr_scope_id_dict)
 
         ref = [
             SourceRef(
@@ -2404,7 +2482,7 @@ class PyASTToCAST:
                 FunctionDef(Name("LAMBDA", id=-1), args, body, source_refs=ref)
             ]
 
-    @visit.register
+    @_visit.register
     def visit_ListComp(
         self,
         node: ast.ListComp,
@@ -2604,10 +2682,10 @@ class PyASTToCAST:
             loop_collection.insert(0, next_loop)
             i = i - 1
 
-        temp_cast = self.visit(
+        temp_cast = (yield 
             temp_assign, prev_scope_id_dict, curr_scope_id_dict
         )
-        loop_cast = self.visit(
+        loop_cast = (yield 
             loop_collection[0], prev_scope_id_dict, curr_scope_id_dict
         )
 
@@ -2617,7 +2695,7 @@ class PyASTToCAST:
 
         return to_ret
 
-    @visit.register
+    @_visit.register
     def visit_DictComp(
         self,
         node: ast.DictComp,
@@ -2797,10 +2875,10 @@ class PyASTToCAST:
             loop_collection.insert(0, next_loop)
             i = i - 1
 
-        temp_cast = self.visit(
+        temp_cast = (yield 
             temp_assign, prev_scope_id_dict, curr_scope_id_dict
         )
-        loop_cast = self.visit(
+        loop_cast = (yield 
             loop_collection[0], prev_scope_id_dict, curr_scope_id_dict
         )
 
@@ -2810,7 +2888,7 @@ class PyASTToCAST:
 
         return to_ret
 
-    @visit.register
+    @_visit.register
     def visit_If(
         self, node: ast.If, prev_scope_id_dict: Dict, curr_scope_id_dict: Dict
     ):
@@ -2826,7 +2904,7 @@ class PyASTToCAST:
             ModelIf: A CAST If statement node.
         """
 
-        node_test = self.visit(
+        node_test = (yield 
             node.test, prev_scope_id_dict, curr_scope_id_dict
         )
 
@@ -2834,14 +2912,14 @@ class PyASTToCAST:
         if len(node.body) > 0:
             for piece in node.body:
                 node_body.extend(
-                    self.visit(piece, prev_scope_id_dict, curr_scope_id_dict)
+                    (yield piece, prev_scope_id_dict, curr_scope_id_dict)
                 )
 
         node_orelse = []
         if len(node.orelse) > 0:
             for piece in node.orelse:
                 node_orelse.extend(
-                    self.visit(piece, prev_scope_id_dict, curr_scope_id_dict)
+                    (yield piece, prev_scope_id_dict, curr_scope_id_dict)
                 )
 
         ref = [
@@ -2856,7 +2934,7 @@ class PyASTToCAST:
 
         return [ModelIf(node_test[0], node_body, node_orelse, source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_Global(
         self,
         node: ast.Global,
@@ -2884,7 +2962,7 @@ class PyASTToCAST:
             ]
         return []
 
-    @visit.register
+    @_visit.register
     def visit_IfExp(
         self,
         node: ast.IfExp,
@@ -2905,13 +2983,13 @@ class PyASTToCAST:
             node (ast.IfExp): [description]
         """
 
-        node_test = self.visit(
+        node_test = (yield 
             node.test, prev_scope_id_dict, curr_scope_id_dict
         )
-        node_body = self.visit(
+        node_body = (yield 
             node.body, prev_scope_id_dict, curr_scope_id_dict
         )
-        node_orelse = self.visit(
+        node_orelse = (yield 
             node.orelse, prev_scope_id_dict, curr_scope_id_dict
         )
         ref = [
@@ -2926,7 +3004,7 @@ class PyASTToCAST:
 
         return [ModelIf(node_test[0], node_body, node_orelse, source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_Import(
         self,
         node: ast.Import,
@@ -2973,7 +3051,7 @@ class PyASTToCAST:
                 name = alias.asname
 
             # TODO: Could use a flag to mark a Module as an import (old)
-            if orig_name in BUILTINS or find_std_lib_module(orig_name):
+            if self.is_known_module(orig_name):
                 self.insert_next_id(self.global_identifier_dict, name)
                 to_ret.append(
                     ModelImport(
@@ -2986,7 +3064,7 @@ class PyASTToCAST:
                 )
         return to_ret
 
-    @visit.register
+    @_visit.register
     def visit_ImportFrom(
         self,
         node: ast.ImportFrom,
@@ -3031,7 +3109,7 @@ class PyASTToCAST:
             if alias.asname is not None:
                 self.aliases[alias.asname] = alias.name
 
-            if name in BUILTINS or find_std_lib_module(name):
+            if self.is_known_module(name):
                 if alias.name == "*":
                     to_ret.append(
                         ModelImport(
@@ -3076,7 +3154,7 @@ class PyASTToCAST:
 
         return to_ret
 
-    @visit.register
+    @_visit.register
     def visit_List(
         self,
         node: ast.List,
@@ -3107,7 +3185,7 @@ class PyASTToCAST:
             to_ret = []
             for piece in node.elts:
                 to_ret.extend(
-                    self.visit(piece, prev_scope_id_dict, curr_scope_id_dict)
+                    (yield piece, prev_scope_id_dict, curr_scope_id_dict)
                 )
             # TODO: How to represent computations like '[0.0] * 1000' in some kind of type constructing system
             # and then how could we store that in these LiteralValue nodes?
@@ -3125,7 +3203,7 @@ class PyASTToCAST:
             ]
             # return [List([],source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_Module(
         self,
         node: ast.Module,
@@ -3169,7 +3247,7 @@ class PyASTToCAST:
                 funcs.append(piece)
                 continue
 
-            to_add = self.visit(piece, prev_scope_id_dict, curr_scope_id_dict)
+            to_add = (yield piece, prev_scope_id_dict, curr_scope_id_dict)
 
             # Global variables (which come about from assignments at the module level)
             # need to have their identifier names set correctly so they can be
@@ -3208,7 +3286,7 @@ class PyASTToCAST:
 
         # Visit all the functions
         for piece in funcs:
-            to_add = self.visit(piece, curr_scope_id_dict, {})
+            to_add = (yield piece, curr_scope_id_dict, {})
             body.extend(to_add)
 
         self.module_stack.pop()
@@ -3216,7 +3294,7 @@ class PyASTToCAST:
             name=self.filenames[-1].split(".")[0], body=body, source_refs=ref
         )
 
-    @visit.register
+    @_visit.register
     def visit_Name(
         self,
         node: ast.Name,
@@ -3322,7 +3400,7 @@ class PyASTToCAST:
             # TODO: At some point..
             raise NotImplementedError()
 
-    @visit.register
+    @_visit.register
     def visit_Pass(
         self,
         node: ast.Pass,
@@ -3349,7 +3427,7 @@ class PyASTToCAST:
             )
         ]
 
-    @visit.register
+    @_visit.register
     def visit_Raise(
         self,
         node: ast.Raise,
@@ -3401,7 +3479,7 @@ class PyASTToCAST:
             )
         ]
 
-    @visit.register
+    @_visit.register
     def visit_Return(
         self,
         node: ast.Return,
@@ -3432,7 +3510,7 @@ class PyASTToCAST:
         if node.value != None:
             return [
                 ModelReturn(
-                    self.visit(
+                    (yield 
                         node.value, prev_scope_id_dict, curr_scope_id_dict
                     )[0],
                     source_refs=ref,
@@ -3443,7 +3521,7 @@ class PyASTToCAST:
             val = LiteralValue(None, None, source_code_data_type, ref)
             return [ModelReturn(val, source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_UnaryOp(
         self,
         node: ast.UnaryOp,
@@ -3469,7 +3547,7 @@ class PyASTToCAST:
         op = ops[type(node.op)]
         operand = node.operand
 
-        opd = self.visit(operand, prev_scope_id_dict, curr_scope_id_dict)
+        opd = (yield operand, prev_scope_id_dict, curr_scope_id_dict)
 
         ref = [
             SourceRef(
@@ -3482,7 +3560,7 @@ class PyASTToCAST:
         ]
         return [UnaryOp(op, opd[0], source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_Set(
         self, node: ast.Set, prev_scope_id_dict: Dict, curr_scope_id_dict: Dict
     ):
@@ -3510,7 +3588,7 @@ class PyASTToCAST:
             to_ret = []
             for piece in node.elts:
                 to_ret.extend(
-                    self.visit(piece, prev_scope_id_dict, curr_scope_id_dict)
+                    (yield piece, prev_scope_id_dict, curr_scope_id_dict)
                 )
             return [
                 LiteralValue(
@@ -3524,7 +3602,7 @@ class PyASTToCAST:
                 )
             ]
 
-    @visit.register
+    @_visit.register
     def visit_Subscript(
         self,
         node: ast.Subscript,
@@ -3565,7 +3643,7 @@ class PyASTToCAST:
 
         if isinstance(slc, ast.Slice):
             if slc.lower is not None:
-                start = self.visit(
+                start = (yield 
                     slc.lower, prev_scope_id_dict, curr_scope_id_dict
                 )[0]
             else:
@@ -3577,7 +3655,7 @@ class PyASTToCAST:
                 )
 
             if slc.upper is not None:
-                stop = self.visit(
+                stop = (yield 
                     slc.upper, prev_scope_id_dict, curr_scope_id_dict
                 )[0]
             else:
@@ -3602,7 +3680,7 @@ class PyASTToCAST:
                     )
                 else:
                     if isinstance(node.value, ast.Subscript):
-                        id = self.visit(
+                        id = (yield 
                             node.value, prev_scope_id_dict, curr_scope_id_dict
                         )
                     else:
@@ -3614,7 +3692,7 @@ class PyASTToCAST:
                     )
 
             if slc.step is not None:
-                step = self.visit(
+                step = (yield 
                     slc.step, prev_scope_id_dict, curr_scope_id_dict
                 )[0]
             else:
@@ -3649,7 +3727,7 @@ class PyASTToCAST:
                 source_refs=ref,
             )
 
-            val = self.visit(
+            val = (yield 
                 node.value, prev_scope_id_dict, curr_scope_id_dict
             )[0]
 
@@ -3679,10 +3757,10 @@ class PyASTToCAST:
             return [get_call]
         elif isinstance(slc, ast.Index):
 
-            val = self.visit(
+            val = (yield 
                 node.value, prev_scope_id_dict, curr_scope_id_dict
             )[0]
-            slice_val = self.visit(
+            slice_val = (yield 
                 slc.value, prev_scope_id_dict, curr_scope_id_dict
             )[0]
             unique_name = construct_unique_name(self.filenames[-1], "_get")
@@ -3731,12 +3809,12 @@ class PyASTToCAST:
         """
         if isinstance(slc,ast.Slice):
             if slc.lower is not None:
-                lower = self.visit(slc.lower, prev_scope_id_dict, curr_scope_id_dict)[0]
+                lower = (yield slc.lower, prev_scope_id_dict, curr_scope_id_dict)[0]
             else:
                 lower = LiteralValue(value_type=ScalarType.INTEGER, value=0, source_code_data_type=["Python","3.8","Float"], source_refs=ref)
 
             if slc.upper is not None:
-                upper = self.visit(slc.upper, prev_scope_id_dict, curr_scope_id_dict)[0]
+                upper = (yield slc.upper, prev_scope_id_dict, curr_scope_id_dict)[0]
             else:
                 if isinstance(node.value,ast.Call):
                     if isinstance(node.value.func,ast.Attribute):
@@ -3747,13 +3825,13 @@ class PyASTToCAST:
                     upper = Call(Name("len", source_refs=ref), [Name(node.value.attr, source_refs=ref)], source_refs=ref)
                 else:
                     if isinstance(node.value, ast.Subscript):
-                        id = self.visit(node.value, prev_scope_id_dict, curr_scope_id_dict)
+                        id = (yield node.value, prev_scope_id_dict, curr_scope_id_dict)
                     else:
                         id = node.value.id
                     upper = Call(Name("len", source_refs=ref), [Name(id, source_refs=ref)], source_refs=ref)
 
             if slc.step is not None:
-                step = self.visit(slc.step, prev_scope_id_dict, curr_scope_id_dict)[0]
+                step = (yield slc.step, prev_scope_id_dict, curr_scope_id_dict)[0]
             else:
                 step = LiteralValue(value_type=ScalarType.INTEGER, value=1, source_code_data_type=["Python","3.8","Float"], source_refs=ref)
 
@@ -3852,12 +3930,12 @@ class PyASTToCAST:
                     # the slice bounds to the new temp list
                     # Append the cast and temp list accordingly
                     if dim.lower is not None:
-                        lower = self.visit(dim.lower, prev_scope_id_dict, curr_scope_id_dict)[0]
+                        lower = (yield dim.lower, prev_scope_id_dict, curr_scope_id_dict)[0]
                     else:
                         lower = Number(0, source_refs=ref)
 
                     if dim.upper is not None:
-                        upper = self.visit(dim.upper, prev_scope_id_dict, curr_scope_id_dict)[0]
+                        upper = (yield dim.upper, prev_scope_id_dict, curr_scope_id_dict)[0]
                     else:
                         if isinstance(node.value,ast.Call):
                             if isinstance(node.value.func,ast.Attribute):
@@ -3870,7 +3948,7 @@ class PyASTToCAST:
                             upper = Call(Name("len", source_refs=ref), [Name(node.value.id, source_refs=ref)], source_refs=ref)
 
                     if dim.step is not None:
-                        step = self.visit(dim.step, prev_scope_id_dict, curr_scope_id_dict)[0]
+                        step = (yield dim.step, prev_scope_id_dict, curr_scope_id_dict)[0]
                     else:
                         step = Number(1, source_refs=ref)
 
@@ -3906,7 +3984,7 @@ class PyASTToCAST:
                     # and copies the elements according to the index number
                     # Append that new temp list and its corresponding CAST
                     # to our result
-                    curr_dim = self.visit(dim, prev_scope_id_dict, curr_scope_id_dict)[0]
+                    curr_dim = (yield dim, prev_scope_id_dict, curr_scope_id_dict)[0]
 
                     loop_cond = BinaryOp(
                         BinaryOperator.LT,
@@ -3938,7 +4016,7 @@ class PyASTToCAST:
         # else:
         #   sl = self.visit(slc, prev_scope_id_dict, curr_scope_id_dict)
 
-    @visit.register
+    @_visit.register
     def visit_Index(
         self,
         node: ast.Index,
@@ -3957,9 +4035,9 @@ class PyASTToCAST:
                      different CAST nodes are returned.
         """
 
-        return self.visit(node.value, prev_scope_id_dict, curr_scope_id_dict)
+        return (yield node.value, prev_scope_id_dict, curr_scope_id_dict)
 
-    @visit.register
+    @_visit.register
     def visit_Tuple(
         self,
         node: ast.Tuple,
@@ -3989,13 +4067,13 @@ class PyASTToCAST:
         to_ret = []
         for piece in node.elts:
             to_ret.extend(
-                self.visit(piece, prev_scope_id_dict, curr_scope_id_dict)
+                (yield piece, prev_scope_id_dict, curr_scope_id_dict)
             )
         return [Tuple(to_ret, source_refs=ref)]
         # else:
         #   return [LiteralValue(StructureType.TUPLE, [], source_code_data_type, source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_Try(
         self, node: ast.Try, prev_scope_id_dict: Dict, curr_scope_id_dict: Dict
     ):
@@ -4010,12 +4088,12 @@ class PyASTToCAST:
         body = []
         for piece in node.body:
             body.extend(
-                self.visit(piece, prev_scope_id_dict, curr_scope_id_dict)
+                (yield piece, prev_scope_id_dict, curr_scope_id_dict)
             )
 
         return body
 
-    @visit.register
+    @_visit.register
     def visit_While(
         self,
         node: ast.While,
@@ -4032,7 +4110,7 @@ class PyASTToCAST:
                   loops and While loops.
         """
 
-        test = self.visit(node.test, prev_scope_id_dict, curr_scope_id_dict)[0]
+        test = (yield node.test, prev_scope_id_dict, curr_scope_id_dict)[0]
 
         # Loops have their own enclosing scopes
         curr_scope_copy = copy.deepcopy(curr_scope_id_dict)
@@ -4040,7 +4118,7 @@ class PyASTToCAST:
         loop_body_scope = {}
         body = []
         for piece in node.body + node.orelse:
-            to_add = self.visit(piece, curr_scope_id_dict, loop_body_scope)
+            to_add = (yield piece, curr_scope_id_dict, loop_body_scope)
             body.extend(to_add)
 
         curr_scope_id_dict = copy.deepcopy(curr_scope_copy)
@@ -4058,7 +4136,7 @@ class PyASTToCAST:
         # return [Loop(init=[], expr=test, body=loop_body_fn_def, source_refs=ref)]
         return [Loop(init=[], expr=test, body=body, source_refs=ref)]
 
-    @visit.register
+    @_visit.register
     def visit_With(
         self,
         node: ast.With,
@@ -4094,10 +4172,10 @@ class PyASTToCAST:
                 )
             ]
             if item.optional_vars != None:
-                l = self.visit(
+                l = (yield 
                     item.optional_vars, prev_scope_id_dict, curr_scope_id_dict
                 )
-                r = self.visit(
+                r = (yield 
                     item.context_expr, prev_scope_id_dict, curr_scope_id_dict
                 )
                 variables.extend(
@@ -4106,7 +4184,7 @@ class PyASTToCAST:
             else:
                 variables.extend(
                     [
-                        self.visit(
+                        (yield 
                             item.context_expr,
                             prev_scope_id_dict,
                             curr_scope_id_dict,
@@ -4117,7 +4195,7 @@ class PyASTToCAST:
         body = []
         for piece in node.body:
             body.extend(
-                self.visit(piece, prev_scope_id_dict, curr_scope_id_dict)
+                (yield piece, prev_scope_id_dict, curr_scope_id_dict)
             )
 
         return variables + body
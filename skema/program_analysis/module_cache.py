@@ -0,0 +1,175 @@
+"""
+On-disk cache for the GroMEt modules generated by the multi file ingester.
+
+Every entry is a dill pickled GrometFNModule, stored under a content address
+built from the source of the file, the modules it imports that can be
+resolved, the skema version and the flags that the pipeline was run with.
+Re-ingesting a system where most of the files did not change then only has to
+run the pipeline on the files that did.
+
+The cache is bounded in size. When it grows past its limit, the least
+recently used entries are evicted. Reading an entry counts as a use.
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+
+import dill
+from importlib.metadata import version, PackageNotFoundError
+
+from skema.gromet.fn import GrometFNModule
+
+CACHE_ENTRY_SUFFIX = ".gromet.pkl"
+
+# 1 GiB
+DEFAULT_MAX_CACHE_SIZE = 1 << 30
+
+
+def skema_version() -> str:
+    """Returns the version of the installed skema package, which is part of
+    every cache key so that upgrading skema invalidates the cache."""
+    try:
+        return version("skema")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+class GrometModuleCache:
+    """A size bounded, least recently used cache of GrometFNModules.
+
+    Attributes:
+        cache_dir: The directory the entries are stored in.
+        max_size: The maximum total size of the entries, in bytes.
+        hits: The number of successful lookups.
+        misses: The number of lookups that did not find an entry.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_MAX_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.last_use = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.size = sum(os.path.getsize(p) for p in self.entry_paths())
+
+    def entry_paths(self):
+        return [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(CACHE_ENTRY_SUFFIX)
+        ]
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_ENTRY_SUFFIX)
+
+    def key(
+        self, source: str, file_name: str, imports: dict = None, **flags
+    ) -> str:
+        """Computes the cache key of a source file.
+
+        The file name is part of the key because the generated GroMEt refers
+        to the module by name, so two identical files at different paths do not
+        produce the same module. The imports are part of it because the
+        imports of modules that cannot be resolved are left out of the CAST,
+        so adding a module to the system changes the files importing it.
+
+        Args:
+            source: The contents of the source file.
+            file_name: The path of the file, relative to the system root.
+            imports: Whether every module the file imports can be resolved,
+                see resolve_imports.
+            flags: The pipeline options the module is generated with.
+        """
+        h = hashlib.sha256()
+        h.update(skema_version().encode())
+        h.update(b"\0")
+        h.update(file_name.encode())
+        h.update(b"\0")
+        for module_name, known in sorted((imports or {}).items()):
+            h.update(f"{module_name}={known};".encode())
+        h.update(b"\0")
+        for flag, value in sorted(flags.items()):
+            h.update(f"{flag}={value};".encode())
+        h.update(b"\0")
+        h.update(source.encode())
+        return h.hexdigest()
+
+    def get(self, key: str):
+        """Returns the GrometFNModule stored for key, or None if there isn't
+        one."""
+        path = self.entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                module = dill.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # A truncated or otherwise unreadable entry is treated as a miss
+            self.remove(path)
+            self.misses += 1
+            return None
+
+        if not isinstance(module, GrometFNModule):
+            self.remove(path)
+            self.misses += 1
+            return None
+
+        self.touch(path)
+        self.hits += 1
+        return module
+
+    def put(self, key: str, module: GrometFNModule):
+        """Stores module under key, then evicts the least recently used
+        entries if the cache is over its size limit."""
+        path = self.entry_path(key)
+        if os.path.exists(path):
+            self.size -= os.path.getsize(path)
+
+        # Write to a temporary file first, so that concurrent readers never see
+        # a partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                dill.dump(module, f)
+            os.replace(tmp_path, path)
+            self.touch(path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.size += os.path.getsize(path)
+        if self.size > self.max_size:
+            self.evict()
+
+    def touch(self, path: str):
+        """Sets the modification time of an entry, which the eviction policy
+        uses as its time of last use. The file system clock can be too coarse
+        to order entries used in quick succession, so the times are kept
+        strictly increasing."""
+        now = max(time.time_ns(), self.last_use + 1)
+        self.last_use = now
+        os.utime(path, ns=(now, now))
+
+    def remove(self, path: str):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self.size -= size
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """Removes entries, least recently used first, until the cache fits in
+        max_size."""
+        entries = sorted(self.entry_paths(), key=os.path.getmtime)
+        self.size = sum(os.path.getsize(p) for p in entries)
+        for path in entries:
+            if self.size <= self.max_size:
+                break
+            self.remove(path)
@@ -1,15 +1,35 @@
 import argparse
+import contextlib
 import glob
+import traceback
 
 import os.path
+from concurrent.futures import ProcessPoolExecutor
 
 from skema.gromet.fn import (
     GrometFNModuleCollection,
 )
 
 from skema.program_analysis.run_ann_cast_pipeline import ann_cast_pipeline
-from skema.program_analysis.python2cast import python_to_cast
-from skema.utils.fold import dictionary_to_gromet_json, del_nulls
+from skema.program_analysis.CAST2GrFN.ann_cast.to_gromet_pass import (
+    METADATA_FULL,
+    METADATA_MODES,
+)
+from skema.program_analysis.python2cast import (
+    python_to_cast,
+    python_source_to_cast,
+)
+from skema.program_analysis.PyAST2CAST.modules_list import (
+    resolve_imports,
+    virtual_file_tree,
+)
+from skema.program_analysis.module_cache import (
+    GrometModuleCache,
+    DEFAULT_MAX_CACHE_SIZE,
+)
+from skema.utils import packing
+from skema.utils.fold import write_gromet_json
+from skema.utils.pipeline_metrics import PipelineInstrumentation
 
 
 def get_args():
@@ -30,17 +50,270 @@ def get_args():
         action="store_true",
         help="If true, the script write the output to a JSON file"
     )
+    parser.add_argument(
+        "--packed",
+        action="store_true",
+        help="Write the output in the compact binary format of "
+        "skema.utils.packing instead of JSON. It decodes faster than the JSON "
+        "only where the msgpack package is installed",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes used to convert the files",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Directory of an on-disk cache of the generated GroMEt modules. "
+        "Files that did not change since they were cached are not converted "
+        "again",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_CACHE_SIZE >> 20,
+        help="Maximum size of the module cache in MB",
+    )
+
+    parser.add_argument(
+        "--id-seed",
+        type=str,
+        help="Seed of the uids in the generated GroMEt. With a seed, "
+        "ingesting the same system gives the same uids, whatever the number "
+        "of workers",
+    )
+    parser.add_argument(
+        "--gromet-metadata",
+        choices=METADATA_MODES,
+        default=METADATA_FULL,
+        help="Metadata attached to the boxes and ports of the GroMEt: all of "
+        "it, interned (identical metadata stored once), or none, for runs "
+        "that only need the function networks",
+    )
+
+    parser.add_argument(
+        "--metrics",
+        type=str,
+        help="Write the wall time, memory and node count of every pass on "
+        "every file to this file",
+    )
+    parser.add_argument(
+        "--metrics-format",
+        choices=["json", "prometheus"],
+        default="json",
+        help="Format of the --metrics file",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Measure the peak memory allocated by every pass. This slows "
+        "the passes down considerably",
+    )
+    parser.add_argument(
+        "--profile-pass",
+        type=str,
+        help="Run the pass with this name (e.g. ToGrometPass) under cProfile",
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=str,
+        help="File to write the cProfile stats of --profile-pass to, by "
+        "default <sysname>--<pass>.prof",
+    )
 
     options = parser.parse_args()
     return options
 
 
-def process_file_system(
-    system_name, path, files, write_to_file=False
-) -> GrometFNModuleCollection:
-    root_dir = path.strip()
-    file_list = open(files, "r").readlines()
+def process_file(
+    root_dir,
+    f,
+    source=None,
+    virtual_files=None,
+    instrumentation=None,
+    id_seed=None,
+    gromet_metadata=METADATA_FULL,
+):
+    """Runs the Python -> CAST -> GroMEt pipeline on a single file of a
+    system and returns its GrometFNModule.
+    If source is given, the file is not read from disk, and its imports are
+    resolved against virtual_files.
+    If a PipelineInstrumentation is given, the metrics of the conversion to
+    CAST and of every pass are recorded in it.
+    If id_seed is given, the uids of the module are seeded with it and the
+    file name, so they do not depend on the other files converted in the
+    same process.
+    gromet_metadata is the metadata attached to the GroMEt (see
+    ToGrometPass).
+    This is a module level function so that it can be sent to the workers of
+    a process pool.
+    """
+    file_name = f.strip("\n")
+    full_file = os.path.join(os.path.normpath(root_dir), file_name)
+
+    measure = contextlib.nullcontext()
+    if instrumentation is not None:
+        measure = instrumentation.measure(file_name, "PythonToCast")
+    with measure:
+        if source is None:
+            cast = python_to_cast(full_file, cast_obj=True)
+        else:
+            cast = python_source_to_cast(
+                source, full_file, virtual_files=virtual_files
+            )
+    return ann_cast_pipeline(
+        cast,
+        gromet=True,
+        to_file=False,
+        from_obj=True,
+        instrumentation=instrumentation,
+        file_name=file_name,
+        id_seed=None if id_seed is None else f"{id_seed}:{file_name}",
+        gromet_metadata=gromet_metadata,
+    )
+
+
+def process_file_with_metrics(instrumentation, *args, **kwargs):
+    """Runs process_file in a worker process. Returns the module, and the
+    instrumentation with the metrics recorded for it, to be merged into the
+    instrumentation of the parent process."""
+    module = process_file(*args, instrumentation=instrumentation, **kwargs)
+    return module, instrumentation
+
+
+def generate_modules(
+    root_dir,
+    file_list,
+    workers=1,
+    cache=None,
+    sources=None,
+    instrumentation=None,
+    id_seed=None,
+    gromet_metadata=METADATA_FULL,
+):
+    """Generates the GroMEt module for every file in file_list.
+    Yields (file, module, error) tuples in the same order as file_list,
+    regardless of the order in which the workers finish. If a file fails to
+    convert, module is None and error holds the formatted traceback.
+    If a GrometModuleCache is given, the files that have an entry in it are
+    not converted again, and newly converted modules are added to it.
+    If sources is given, it holds the contents of every file in file_list,
+    and nothing is read from disk.
+    If a PipelineInstrumentation is given, the metrics of every file that is
+    converted are recorded in it, including the files converted by workers.
+    If id_seed is given, the uids of the modules are seeded with it (see
+    process_file), and the GroMEt has the metadata of gromet_metadata.
+    """
+    virtual_files = None
+    if sources is not None:
+        virtual_files = virtual_file_tree(
+            os.path.join(root_dir, f) for f in file_list
+        )
+
+    keys = [None] * len(file_list)
+    modules = [None] * len(file_list)
+    if cache is not None:
+        for i, f in enumerate(file_list):
+            file_name = f.strip("\n")
+            full_file = os.path.join(os.path.normpath(root_dir), file_name)
+            try:
+                if sources is not None:
+                    source = sources[i]
+                    search_path = [os.path.dirname(full_file)]
+                else:
+                    with open(full_file) as source_file:
+                        source = source_file.read()
+                    search_path = [os.path.dirname(os.path.abspath(full_file))]
+                # resolved as python_to_cast resolves them
+                imports = resolve_imports(source, search_path, virtual_files)
+            except (OSError, SyntaxError, ValueError):
+                # Let the pipeline report the error for this file
+                continue
+            keys[i] = cache.key(
+                source,
+                file_name,
+                imports,
+                gromet=True,
+                id_seed=id_seed,
+                gromet_metadata=gromet_metadata,
+            )
+            modules[i] = cache.get(keys[i])
+    tasks = [
+        (root_dir, f)
+        if sources is None
+        else (root_dir, f, sources[i], virtual_files)
+        for i, f in enumerate(file_list)
+    ]
+
+    # the options of process_file that are set
+    options = {}
+    if id_seed is not None:
+        options["id_seed"] = id_seed
+    if gromet_metadata != METADATA_FULL:
+        options["gromet_metadata"] = gromet_metadata
+
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [None] * len(file_list)
+        for i, task in enumerate(tasks):
+            if executor is None or modules[i] is not None:
+                continue
+            if instrumentation is not None:
+                futures[i] = executor.submit(
+                    process_file_with_metrics,
+                    instrumentation.fork(),
+                    *task,
+                    **options,
+                )
+            else:
+                futures[i] = executor.submit(process_file, *task, **options)
+
+        for i, f in enumerate(file_list):
+            if modules[i] is not None:
+                yield f, modules[i], None
+                continue
+
+            try:
+                if executor is None and instrumentation is not None:
+                    module = process_file(
+                        *tasks[i], instrumentation=instrumentation, **options
+                    )
+                elif executor is None:
+                    module = process_file(*tasks[i], **options)
+                elif instrumentation is not None:
+                    module, worker_instrumentation = futures[i].result()
+                    instrumentation.merge(worker_instrumentation)
+                else:
+                    module = futures[i].result()
+            except Exception:
+                yield f, None, traceback.format_exc()
+                continue
 
+            if cache is not None and keys[i] is not None:
+                cache.put(keys[i], module)
+            yield f, module, None
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def build_module_collection(
+    system_name,
+    root_dir,
+    file_list,
+    workers=1,
+    cache=None,
+    sources=None,
+    instrumentation=None,
+    id_seed=None,
+    gromet_metadata=METADATA_FULL,
+) -> GrometFNModuleCollection:
+    """Generates the GroMEt modules of the files in file_list (see
+    generate_modules) and collects them in a GrometFNModuleCollection."""
     module_collection = GrometFNModuleCollection(
         schema_version="0.1.5",
         name=system_name,
@@ -49,59 +322,152 @@ def process_file_system(
         executables=[],
     )
 
-    for f in file_list:
-        full_file = os.path.join(os.path.normpath(root_dir), f.strip("\n"))
+    failures = []
+    for f, generated_gromet, error in generate_modules(
+        root_dir,
+        file_list,
+        workers,
+        cache,
+        sources,
+        instrumentation,
+        id_seed,
+        gromet_metadata,
+    ):
+        if error is not None:
+            failures.append((f.strip("\n"), error))
+            continue
 
-        try:
-            cast = python_to_cast(full_file, cast_obj=True)
-            generated_gromet = ann_cast_pipeline(
-                cast, gromet=True, to_file=False, from_obj=True
-            )
+        # Then, after we generate the GroMEt we store it in the 'modules' field
+        # and store its path in the 'module_index' field
+        module_collection.modules.append(generated_gromet)
 
-            # Then, after we generate the GroMEt we store it in the 'modules' field
-            # and store its path in the 'module_index' field
-            module_collection.modules.append(generated_gromet)
-
-            # DONE: Change this so that it's the dotted path from the root
-            # i.e. like model.view.sir" like it shows up in Python
-            source_directory = os.path.basename(
-                os.path.normpath(root_dir)
-            )  # We just need the last directory of the path, not the complete path
-            os_module_path = os.path.join(source_directory, f)
-            python_module_path = os_module_path.replace("/", ".").replace(
-                ".py", ""
-            )
-            module_collection.module_index.append(python_module_path)
-
-            # Done: Determine how we know a gromet goes in the 'executable' field
-            # We do this by finding all user_defined top level functions in the Gromet
-            # and check if the name 'main' is among them
-            function_networks = [
-                fn.value
-                for fn in generated_gromet.attributes
-                if fn.type == "FN"
-            ]
-            defined_functions = [
-                fn.b[0].name
-                for fn in function_networks
-                if fn.b[0].function_type == "FUNCTION"
-            ]
-            if "main" in defined_functions:
-                module_collection.executables.append(len(module_collection.module_index))
-
-        except ImportError:
-            print("FAILURE")
-
-    if write_to_file:
+        # DONE: Change this so that it's the dotted path from the root
+        # i.e. like model.view.sir" like it shows up in Python
+        source_directory = os.path.basename(
+            os.path.normpath(root_dir)
+        )  # We just need the last directory of the path, not the complete path
+        os_module_path = os.path.join(source_directory, f)
+        python_module_path = os_module_path.replace("/", ".").replace(
+            ".py", ""
+        )
+        module_collection.module_index.append(python_module_path)
+
+        # Done: Determine how we know a gromet goes in the 'executable' field
+        # We do this by finding all user_defined top level functions in the Gromet
+        # and check if the name 'main' is among them
+        function_networks = [
+            fn.value
+            for fn in generated_gromet.attributes
+            if fn.type == "FN"
+        ]
+        defined_functions = [
+            fn.b[0].name
+            for fn in function_networks
+            if fn.b[0].function_type == "FUNCTION"
+        ]
+        if "main" in defined_functions:
+            module_collection.executables.append(len(module_collection.module_index))
+
+    # Report every file that could not be ingested, instead of stopping at
+    # the first failure
+    for f, error in failures:
+        print(f"Unable to ingest {f}:\n{error}")
+    if failures:
+        print(
+            f"{len(failures)} of {len(file_list)} files in {system_name} "
+            "could not be ingested"
+        )
+    if cache is not None:
+        print(f"Module cache: {cache.hits} hits, {cache.misses} misses")
+
+    return module_collection
+
+
+def process_file_system(
+    system_name,
+    path,
+    files,
+    write_to_file=False,
+    workers=1,
+    cache_dir=None,
+    cache_size=DEFAULT_MAX_CACHE_SIZE,
+    packed=False,
+    instrumentation=None,
+    id_seed=None,
+    gromet_metadata=METADATA_FULL,
+) -> GrometFNModuleCollection:
+    root_dir = path.strip()
+    file_list = open(files, "r").readlines()
+    cache = (
+        GrometModuleCache(cache_dir, cache_size)
+        if cache_dir is not None
+        else None
+    )
+
+    module_collection = build_module_collection(
+        system_name,
+        root_dir,
+        file_list,
+        workers,
+        cache,
+        None,
+        instrumentation,
+        id_seed,
+        gromet_metadata,
+    )
+
+    if write_to_file and packed:
+        with open(f"{system_name}--Gromet-FN-auto.msgpack", "wb") as f:
+            packing.dump(module_collection, f)
+    elif write_to_file:
         with open(f"{system_name}--Gromet-FN-auto.json", "w") as f:
-            gromet_collection_dict = module_collection.to_dict()
-            f.write(
-                dictionary_to_gromet_json(del_nulls(gromet_collection_dict))
-            )
+            write_gromet_json(module_collection, f)
 
     return module_collection
 
 
+def process_file_sources(
+    system_name,
+    root_name,
+    files,
+    workers=1,
+    cache_dir=None,
+    cache_size=DEFAULT_MAX_CACHE_SIZE,
+    instrumentation=None,
+    id_seed=None,
+    gromet_metadata=METADATA_FULL,
+) -> GrometFNModuleCollection:
+    """Ingests a system that only exists in memory, without writing it to
+    disk first.
+
+    Args:
+        system_name: The name of the system
+        root_name: The name of the root directory of the system
+        files: A list of (path, source) pairs, where path is relative to the
+                root directory. Imports between the files are resolved against
+                these paths.
+    """
+    file_list = [path for path, _ in files]
+    sources = [source for _, source in files]
+    cache = (
+        GrometModuleCache(cache_dir, cache_size)
+        if cache_dir is not None
+        else None
+    )
+
+    return build_module_collection(
+        system_name,
+        root_name,
+        file_list,
+        workers,
+        cache,
+        sources,
+        instrumentation,
+        id_seed,
+        gromet_metadata,
+    )
+
+
 if __name__ == "__main__":
     args = get_args()
 
@@ -113,4 +479,32 @@ if __name__ == "__main__":
     print(f"With root directory as specified in: {path}")
     print(f"Ingesting the files as specified in: {files}")
 
-    process_file_system(system_name, path, files, args.write)
+    instrumentation = None
+    if args.metrics or args.profile_pass:
+        instrumentation = PipelineInstrumentation(
+            args.trace_memory, args.profile_pass
+        )
+
+    process_file_system(
+        system_name,
+        path,
+        files,
+        args.write,
+        args.jobs,
+        args.cache_dir,
+        args.cache_size << 20,
+        args.packed,
+        instrumentation,
+        args.id_seed,
+        args.gromet_metadata,
+    )
+
+    if args.metrics:
+        instrumentation.write(args.metrics, args.metrics_format)
+        print(f"Wrote pass metrics to {args.metrics}")
+    if args.profile_pass:
+        profile_output = (
+            args.profile_output or f"{system_name}--{args.profile_pass}.prof"
+        )
+        instrumentation.write_profile(profile_output)
+        print(f"Wrote the profile of {args.profile_pass} to {profile_output}")
@@ -1,3 +1,4 @@
+import io
 import os
 import sys
 import ast
@@ -46,6 +47,57 @@ def get_args():
     return options
 
 
+def python_source_to_cast(
+    source: str,
+    pyfile_path: str,
+    legacy=False,
+    root_path=None,
+    module_search_path=None,
+    virtual_files=None,
+) -> CAST:
+    """Create a CAST object from the source code of a Python file. Together
+    with virtual_files, this can be used on systems that only exist in memory.
+
+    Args:
+        source: The contents of the Python source file
+        pyfile_path: Path of the Python source file. The file name is used to
+                name the CAST module.
+        legacy: If true, generate CAST for GrFN 2.2 pipeline.
+        root_path: The directory that imports are resolved against. Defaults
+                to the directory of pyfile_path.
+        module_search_path: Additional directories that imports are resolved
+                against, after root_path.
+        virtual_files: If given, a set of paths (built with
+                virtual_file_tree) that imports are resolved against instead of
+                the file system.
+
+    Returns:
+        The CAST of the source.
+    """
+    file_name = pyfile_path.split("/")[-1]
+
+    # Count the number of lines in the file
+    line_count = len(io.StringIO(source, newline=None).readlines())
+
+    # Create a PyASTToCAST Object
+    if root_path is None:
+        root_path = os.path.dirname(pyfile_path)
+    convert = py_ast_to_cast.PyASTToCAST(
+        file_name,
+        legacy=legacy,
+        root_path=root_path,
+        module_search_path=module_search_path,
+        virtual_files=virtual_files,
+    )
+
+    # Parse the Python program's AST and create the CAST
+    contents = ast.parse(source)
+    C = convert.visit(contents, {}, {})
+    C.source_refs = [SourceRef(file_name, None, None, 1, line_count)]
+
+    return cast.CAST([C], "python")
+
+
 def python_to_cast(
     pyfile_path,
     agraph=False,
@@ -54,6 +106,8 @@ def python_to_cast(
     rawjson=False,
     legacy=False,
     cast_obj=False,
+    root_path=None,
+    module_search_path=None,
 ) -> Optional[CAST]:
     """Create a CAST object from a Python file and serialize it to JSON.
 
@@ -67,6 +121,10 @@ def python_to_cast(
         legacy: If true, generate CAST for GrFN 2.2 pipeline.
         cast_obj: If true, returns the CAST as an object instead of printing to
                 stdout.
+        root_path: The directory that imports are resolved against. Defaults
+                to the directory of the source file.
+        module_search_path: Additional directories that imports are resolved
+                against, after root_path.
 
     Returns:
         If cast_obj is set to True, returns the CAST as an object. Else,
@@ -77,46 +135,25 @@ def python_to_cast(
     with open(pyfile_path) as f:
         file_contents = f.read()
 
-    file_name = pyfile_path.split("/")[-1]
-
-    # Count the number of lines in the file
-    with open(pyfile_path) as f:
-        file_list = f.readlines()
-        line_count = 0
-        for l in file_list:
-            line_count += 1
-
-    # Create a PyASTToCAST Object
-    if legacy:
-        convert = py_ast_to_cast.PyASTToCAST(file_name, legacy=True)
-    else:
-        convert = py_ast_to_cast.PyASTToCAST(file_name)
-
     # Additional option to allow us to view the PyAST
     # using the astpp module
     if astprint:
         astpp.parseprint(file_contents)
 
-    # 'Root' the current working directory so that it's where the
-    # Source file we're generating CAST for is (for Import statements)
-    old_path = os.getcwd()
-    try:
-        idx = pyfile_path.rfind("/")
-
-        if idx > -1:
-            curr_path = pyfile_path[0:idx]
-            os.chdir(curr_path)
-        else:
-            curr_path = "./" + pyfile_path
-
-        # Parse the Python program's AST and create the CAST
-        contents = ast.parse(file_contents)
-        C = convert.visit(contents, {}, {})
-        C.source_refs = [SourceRef(file_name, None, None, 1, line_count)]
-    finally:
-        os.chdir(old_path)
-
-    out_cast = cast.CAST([C], "python")
+    # Imports are resolved against the directory of the source file (and the
+    # directories in module_search_path) rather than the current working
+    # directory, so that conversions can run concurrently
+    if root_path is None:
+        root_path = os.path.dirname(os.path.abspath(pyfile_path))
+
+    out_cast = python_source_to_cast(
+        file_contents,
+        pyfile_path,
+        legacy=legacy,
+        root_path=root_path,
+        module_search_path=module_search_path,
+    )
+    file_name = pyfile_path.split("/")[-1]
 
     if agraph:
         V = CASTToAGraphVisitor(out_cast)
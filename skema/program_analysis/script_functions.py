@@ -1,5 +1,6 @@
 import sys
 import ast
+import contextlib
 import dill
 import os.path
 import json
@@ -10,7 +11,8 @@ from skema.gromet.fn import (
     GrometFNModuleCollection,
 )
 
-from skema.utils.fold import dictionary_to_gromet_json, del_nulls
+from skema.utils.fold import write_gromet_json
+from skema.utils.pipeline_metrics import count_nodes
 from skema.program_analysis.PyAST2CAST import py_ast_to_cast
 from skema.program_analysis.CAST2GrFN import cast
 from skema.program_analysis.CAST2GrFN.model.cast import SourceRef
@@ -21,27 +23,8 @@ from skema.program_analysis.CAST2GrFN.visitors.cast_to_agraph_visitor import (
 from skema.program_analysis.CAST2GrFN.ann_cast.cast_to_annotated_cast import (
     CastToAnnotatedCastVisitor,
 )
-from skema.program_analysis.CAST2GrFN.ann_cast.id_collapse_pass import (
-    IdCollapsePass,
-)
-from skema.program_analysis.CAST2GrFN.ann_cast.container_scope_pass import (
-    ContainerScopePass,
-)
-from skema.program_analysis.CAST2GrFN.ann_cast.variable_version_pass import (
-    VariableVersionPass,
-)
-from skema.program_analysis.CAST2GrFN.ann_cast.grfn_var_creation_pass import (
-    GrfnVarCreationPass,
-)
-from skema.program_analysis.CAST2GrFN.ann_cast.grfn_assignment_pass import (
-    GrfnAssignmentPass,
-)
-from skema.program_analysis.CAST2GrFN.ann_cast.lambda_expression_pass import (
-    LambdaExpressionPass,
-)
-from skema.program_analysis.CAST2GrFN.ann_cast.to_grfn_pass import ToGrfnPass
-from skema.program_analysis.CAST2GrFN.ann_cast.to_gromet_pass import (
-    ToGrometPass,
+from skema.program_analysis.CAST2GrFN.ann_cast.pass_manager import (
+    PassManager,
 )
 
 
@@ -110,10 +93,7 @@ def process_file_system(system_name, path, files, write_to_file=False):
     # After we go through the whole system, we can then write out the module_collection
     if write_to_file:
         with open(f"{system_name}--Gromet-FN-auto.json", "w") as f:
-            gromet_collection_dict = module_collection.to_dict()
-            f.write(
-                dictionary_to_gromet_json(del_nulls(gromet_collection_dict))
-            )
+            write_gromet_json(module_collection, f)
 
     return module_collection
 
@@ -126,6 +106,8 @@ def python_to_cast(
     rawjson=False,
     legacy=False,
     cast_obj=False,
+    root_path=None,
+    module_search_path=None,
 ):
     # Open Python file as a giant string
     file_handle = open(pyfile_path)
@@ -142,10 +124,17 @@ def python_to_cast(
     file_handle.close()
 
     # Create a PyASTToCAST Object
-    if legacy:
-        convert = py_ast_to_cast.PyASTToCAST(file_name, legacy=True)
-    else:
-        convert = py_ast_to_cast.PyASTToCAST(file_name)
+    # Imports are resolved against the directory of the source file (and the
+    # directories in module_search_path) rather than the current working
+    # directory, so that conversions can run concurrently
+    if root_path is None:
+        root_path = os.path.dirname(os.path.abspath(pyfile_path))
+    convert = py_ast_to_cast.PyASTToCAST(
+        file_name,
+        legacy=legacy,
+        root_path=root_path,
+        module_search_path=module_search_path,
+    )
 
     # Additional option to allow us to view the PyAST
     # using the astpp module
@@ -154,26 +143,10 @@ def python_to_cast(
         print("AST Printing Currently Disabled")
         pass
 
-    # 'Root' the current working directory so that it's where the
-    # Source file we're generating CAST for is (for Import statements)
-    old_path = os.getcwd()
-    try:
-        idx = pyfile_path.rfind("/")
-
-        if idx > -1:
-            curr_path = pyfile_path[0:idx]
-            os.chdir(curr_path)
-        else:
-            curr_path = "./" + pyfile_path
-
-        # os.chdir(curr_path)
-
-        # Parse the python program's AST and create the CAST
-        contents = ast.parse(file_contents)
-        C = convert.visit(contents, {}, {})
-        C.source_refs = [SourceRef(file_name, None, None, 1, line_count)]
-    finally:
-        os.chdir(old_path)
+    # Parse the python program's AST and create the CAST
+    contents = ast.parse(file_contents)
+    C = convert.visit(contents, {}, {})
+    C.source_refs = [SourceRef(file_name, None, None, 1, line_count)]
 
     out_cast = cast.CAST([C], "python")
 
@@ -219,6 +192,10 @@ def ann_cast_pipeline(
     a_graph=False,
     from_obj=False,
     indent_level=0,
+    instrumentation=None,
+    file_name=None,
+    id_seed=None,
+    gromet_metadata="full",
 ):
     """cast_to_annotated.py
 
@@ -231,6 +208,17 @@ def ann_cast_pipeline(
     contains the CAST data.
     TODO: Update this docstring as the program has been tweaked so that this is a function instead of
     the program
+
+    If a PipelineInstrumentation is given, the metrics of every pass are
+    recorded in it, under file_name (by default the name of the CAST JSON
+    file).
+
+    If id_seed is given, the uids of the generated GrFN or GroMEt are the
+    same every time the pipeline is run on the same CAST.
+
+    gromet_metadata is the metadata attached to the generated GroMEt, see
+    ToGrometPass: "full", "interned" (identical metadata stored once) or
+    "none".
     """
 
     if from_obj:
@@ -244,59 +232,45 @@ def ann_cast_pipeline(
         cast_json = CAST([], "python")
         cast = cast_json.from_json_str(file_contents)
 
-    visitor = CastToAnnotatedCastVisitor(cast)
-    # The Annotated Cast is an attribute of the PipelineState object
-    pipeline_state = visitor.generate_annotated_cast(grfn_2_2)
+    if file_name is None:
+        file_name = f_name
+    node_count = None
 
-    # TODO: make filename creation more resilient
+    def measure(pass_name):
+        if instrumentation is None:
+            return contextlib.nullcontext()
+        return instrumentation.measure(file_name, pass_name, node_count)
 
-    print("Calling IdCollapsePass------------------------")
-    IdCollapsePass(pipeline_state)
+    with measure("CastToAnnotatedCastVisitor"):
+        visitor = CastToAnnotatedCastVisitor(cast)
+        # The Annotated Cast is an attribute of the PipelineState object
+        pipeline_state = visitor.generate_annotated_cast(grfn_2_2, id_seed)
+    pipeline_state.gromet_metadata = gromet_metadata
+    if instrumentation is not None:
+        node_count = count_nodes(pipeline_state.nodes)
 
-    print("\nCalling ContainerScopePass-------------------")
-    ContainerScopePass(pipeline_state)
-
-    print("\nCalling VariableVersionPass-------------------")
-    VariableVersionPass(pipeline_state)
+    # TODO: make filename creation more resilient
 
-    # NOTE: CASTToAGraphVisitor uses misc.uuid, so placing it here means
-    # that the generated GrFN uuids will not be consistent with GrFN uuids
-    # created during test runtime. So, do not use these GrFN jsons as expected
-    # json for testing
     f_name = f_name.replace("--CAST.json", "")
-    if a_graph:
-        agraph = CASTToAGraphVisitor(pipeline_state)
-        pdf_file_name = f"{f_name}-AnnCast.pdf"
-        agraph.to_pdf(pdf_file_name)
-
-    print("\nCalling GrfnVarCreationPass-------------------")
-    GrfnVarCreationPass(pipeline_state)
 
-    print("\nCalling GrfnAssignmentPass-------------------")
-    GrfnAssignmentPass(pipeline_state)
+    def after_pass(pass_name):
+        if a_graph and pass_name == "VariableVersionPass":
+            agraph = CASTToAGraphVisitor(pipeline_state)
+            pdf_file_name = f"{f_name}-AnnCast.pdf"
+            agraph.to_pdf(pdf_file_name)
 
-    print("\nCalling LambdaExpressionPass-------------------")
-    LambdaExpressionPass(pipeline_state)
+    pass_manager = PassManager("ToGrometPass" if gromet else "ToGrfnPass")
+    pass_manager.run(pipeline_state, measure, after_pass)
 
     if gromet:
-        print("\nCalling ToGrometPass-----------------------")
-        ToGrometPass(pipeline_state)
-
         if to_file:
             with open(f"{f_name}--Gromet-FN-auto.json", "w") as f:
-                gromet_collection_dict = (
-                    pipeline_state.gromet_collection.to_dict()
-                )
-                f.write(
-                    dictionary_to_gromet_json(
-                        del_nulls(gromet_collection_dict), level=indent_level
-                    )
+                write_gromet_json(
+                    pipeline_state.gromet_collection, f, level=indent_level
                 )
         else:
             return pipeline_state.gromet_collection
     else:
-        print("\nCalling ToGrfnPass-------------------")
-        ToGrfnPass(pipeline_state)
         grfn = pipeline_state.get_grfn()
         grfn.to_json_file(f"{f_name}--AC-GrFN.json")
 
@@ -1,7 +1,56 @@
+import dataclasses
 import json
+import pstats
+import re
+import pytest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from skema.program_analysis.multi_file_ingester import process_file_system
+from skema.program_analysis.multi_file_ingester import (
+    build_module_collection,
+    process_file_system,
+)
 from skema.gromet.fn import GrometFNModuleCollection
+from skema.utils.fold import gromet_to_json
+from skema.program_analysis.python2cast import python_source_to_cast
+from skema.program_analysis.CAST2GrFN.ann_cast.annotated_cast import (
+    AnnCastCall,
+    AnnCastName,
+    node_attributes,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.ann_cast_helpers import (
+    SubtreePruning,
+    SubtreeTypes,
+    active_pruning,
+    func_def_instances,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.cast_to_annotated_cast import (
+    CastToAnnotatedCastVisitor,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.id_collapse_pass import (
+    IdCollapsePass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.container_scope_pass import (
+    ContainerScopePass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.variable_version_pass import (
+    VariableVersionPass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.pass_manager import (
+    ANN_CAST_PASSES,
+    PassManager,
+    PassSpec,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.grfn_var_creation_pass import (
+    GrfnVarCreationPass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.grfn_assignment_pass import (
+    GrfnAssignmentPass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.lambda_expression_pass import (
+    LambdaExpressionPass,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.to_grfn_pass import ToGrfnPass
+from skema.utils.pipeline_metrics import PipelineInstrumentation
 
 
 def test_code2fn():
@@ -19,3 +68,245 @@ def test_code2fn():
         str(data_dir / "epidemiology/Bucky/code/bucky_v2"),
         str(data_dir / "epidemiology/Bucky/code/system_filepaths.txt"),
     )
+
+
+def test_code2fn_parallel():
+    """Checks that ingesting a system with a process pool assembles the
+    module collection in the same order as the serial ingestion."""
+
+    data_dir = Path(__file__).parents[3] / "data"
+    path = str(data_dir / "epidemiology/Bucky/code/bucky_v2")
+    files = str(data_dir / "epidemiology/Bucky/code/system_filepaths.txt")
+
+    serial = process_file_system("chime_penn", path, files)
+    parallel = process_file_system("chime_penn", path, files, workers=2)
+
+    assert parallel.module_index == serial.module_index
+    assert parallel.executables == serial.executables
+    assert len(parallel.modules) == len(serial.modules)
+
+
+def test_pipeline_instrumentation(tmp_path):
+    """Checks that every pass run on every file is recorded, including in
+    worker processes, and that a single pass can be profiled."""
+
+    data_dir = Path(__file__).parents[3] / "data"
+    root_dir = str(data_dir / "epidemiology/CHIME")
+    files = [
+        "CHIME_SIR_model/code/CHIME_SIR_while_loop.py",
+        "CHIME_SVIIvR_model/code/CHIME_SVIIvR.py",
+    ]
+    passes = [
+        "PythonToCast",
+        "CastToAnnotatedCastVisitor",
+        "IdCollapsePass",
+        "ContainerScopePass",
+        "VariableVersionPass",
+        "ToGrometPass",
+    ]
+
+    for workers in (1, 2):
+        instrumentation = PipelineInstrumentation(
+            trace_memory=True, profile_pass="ToGrometPass"
+        )
+        build_module_collection(
+            "chime", root_dir, files, workers, instrumentation=instrumentation
+        )
+
+        records = instrumentation.records
+        assert [(r["file"], r["pass"]) for r in records] == [
+            (f, p) for f in files for p in passes
+        ]
+        assert all(r["seconds"] > 0 for r in records)
+        assert all(r["peak_memory_bytes"] > 0 for r in records)
+        assert all(r["nodes"] > 0 for r in records if r["pass"] in passes[2:])
+        assert instrumentation.totals()["ToGrometPass"]["count"] == 2
+
+        profile = tmp_path / "to_gromet.prof"
+        instrumentation.write_profile(str(profile))
+        assert pstats.Stats(str(profile)).total_calls > 0
+
+    prometheus = instrumentation.to_prometheus()
+    assert (
+        'skema_pass_seconds{file="CHIME_SVIIvR_model/code/CHIME_SVIIvR.py",'
+        'pass="ToGrometPass"}' in prometheus
+    )
+    assert json.loads(instrumentation.to_json())["passes"] == records
+
+
+def test_grfn_2_2_func_def_instances():
+    """Checks that every GrFN 2.2 Call node gets its own instance of the
+    FunctionDef it calls, which shares the body of the FunctionDef and has its
+    own annotations of the nodes of the body."""
+
+    source = (
+        "def sq(x):\n"
+        "    return x * x\n"
+        "\n"
+        "def norm(a, b):\n"
+        "    return sq(a) + sq(b)\n"
+        "\n"
+        "def main():\n"
+        "    return norm(1, 2) + norm(3, 4)\n"
+    )
+    cast = python_source_to_cast(source, "norm.py")
+    pipeline_state = CastToAnnotatedCastVisitor(cast).generate_annotated_cast(
+        True
+    )
+    for grfn_pass in (
+        IdCollapsePass,
+        ContainerScopePass,
+        VariableVersionPass,
+        GrfnVarCreationPass,
+        GrfnAssignmentPass,
+        LambdaExpressionPass,
+        ToGrfnPass,
+    ):
+        grfn_pass(pipeline_state)
+
+    # the instances of the Call nodes, and the ids of the FunctionDefs they
+    # instantiate
+    instances = {}
+    for func_def in list(pipeline_state.func_id_to_def.values()):
+        with func_def_instances([func_def]):
+            stack = list(func_def.body)
+            scopes = set()
+            while stack:
+                node = stack.pop()
+                if isinstance(node, AnnCastCall) and node.is_grfn_2_2:
+                    copy = node.func_def_copy
+                    instances[id(copy)] = (copy, node.func.id)
+                if isinstance(node, AnnCastName):
+                    scopes.add(tuple(node.con_scope))
+                stack.extend(
+                    v
+                    for v in node_attributes(node).values()
+                    if hasattr(v, "source_refs")
+                )
+            if func_def.overlays is not None:
+                assert scopes == {tuple(func_def.con_scope)}
+
+    assert len(instances) >= 6
+    names = set()
+    for copy, func_id in instances.values():
+        func_def = pipeline_state.func_def_node_from_id(func_id)
+        assert copy is not func_def
+        assert copy.body is func_def.body
+        assert copy.template is func_def.template
+        assert copy.source_refs[0] is func_def.source_refs[0]
+        names.add(copy.name.id)
+    assert len(names) == len(instances)
+    assert pipeline_state.get_grfn() is not None
+
+
+def test_pass_manager():
+    """Checks that only the passes a target pass depends on are scheduled,
+    in dependency order."""
+
+    gromet = PassManager("ToGrometPass")
+    assert [spec.name for spec in gromet.schedule] == [
+        "IdCollapsePass",
+        "ContainerScopePass",
+        "VariableVersionPass",
+        "ToGrometPass",
+    ]
+    assert gromet.skipped == [
+        "GrfnVarCreationPass",
+        "GrfnAssignmentPass",
+        "LambdaExpressionPass",
+    ]
+    assert [spec.name for spec in PassManager("ToGrfnPass").schedule] == [
+        spec.name for spec in ANN_CAST_PASSES if spec.name != "ToGrometPass"
+    ]
+    assert AnnCastCall in gromet.schedule[0].node_types
+
+    cyclic = ANN_CAST_PASSES + (
+        PassSpec("A", IdCollapsePass, ("B",)),
+        PassSpec("B", IdCollapsePass, ("A",)),
+    )
+    with pytest.raises(ValueError):
+        PassManager("A", cyclic)
+
+
+def test_pass_manager_pruning():
+    """Checks that the passes do not visit the subtrees with only node types
+    they descend through, e.g. literals, and that the GrFN is the same as when
+    every node is visited."""
+
+    source = (
+        "def f(a):\n"
+        "    b = (1, 2)\n"
+        "    c = (1 + 2) * -3\n"
+        "    return a * c\n"
+        "\n"
+        "x = f(2.5)\n"
+    )
+
+    def grfn_json(passes):
+        cast = python_source_to_cast(source, "literals.py")
+        pipeline_state = CastToAnnotatedCastVisitor(
+            cast
+        ).generate_annotated_cast(True, id_seed="s")
+        pass_manager = PassManager("ToGrfnPass", passes)
+        pass_manager.run(pipeline_state)
+        grfn = re.sub(
+            r'"(timestamp|date_created)": ?"[^"]*"',
+            "",
+            pipeline_state.get_grfn().to_json(),
+        )
+        return grfn, pass_manager.pruned
+
+    pruned_grfn, pruned = grfn_json(ANN_CAST_PASSES)
+    full_grfn, not_pruned = grfn_json(
+        [
+            dataclasses.replace(spec, descending_types=frozenset())
+            for spec in ANN_CAST_PASSES
+        ]
+    )
+    assert pruned_grfn == full_grfn
+    assert not_pruned == {}
+    assert set(pruned) == {
+        "IdCollapsePass",
+        "VariableVersionPass",
+        "GrfnVarCreationPass",
+        "GrfnAssignmentPass",
+        "ToGrfnPass",
+    }
+    for subtrees, nodes in pruned.values():
+        assert 0 < subtrees <= nodes
+
+    # the pruning is per context: a pipeline run in another thread neither
+    # uses nor ends the pruning active in this one
+    with SubtreePruning(SubtreeTypes([]), 0).pruning(
+        ToGrfnPass._visit
+    ) as pruning:
+        with ThreadPoolExecutor(1) as pool:
+            assert pool.submit(grfn_json, ANN_CAST_PASSES).result() == (
+                pruned_grfn,
+                pruned,
+            )
+        assert active_pruning.get() is pruning
+    assert active_pruning.get() is None
+
+
+def test_seeded_uids():
+    """Checks that the uids of a system ingested with an id seed do not depend
+    on the number of workers."""
+
+    data_dir = Path(__file__).parents[3] / "data"
+    root_dir = str(data_dir / "epidemiology/CHIME")
+    files = ["CHIME_SIR_model/code/CHIME_SIR_while_loop.py"]
+
+    def uids(collection):
+        return re.findall(
+            r'"uid": ?"([^"]*)"', gromet_to_json(collection)
+        )
+
+    serial = build_module_collection("chime", root_dir, files, id_seed="s")
+    parallel = build_module_collection(
+        "chime", root_dir, files, workers=2, id_seed="s"
+    )
+    assert uids(serial) and uids(serial) == uids(parallel)
+    other = build_module_collection("chime", root_dir, files, id_seed="t")
+    assert uids(other) != uids(serial)
+
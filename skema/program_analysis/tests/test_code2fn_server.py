@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from skema.code2fn import server
+
+SYSTEM = {
+    "files": ["main.py"],
+    "blobs": ["x = 1\n"],
+    "system_name": "main",
+    "root_name": "main",
+}
+
+PASS_RECORD = {
+    "file": "main.py",
+    "pass": "IdCollapsePass",
+    "seconds": 0.25,
+    "peak_memory_bytes": None,
+    "max_rss_bytes": None,
+    "nodes": 12,
+}
+
+
+def exit_worker(system):
+    """Kills the worker process it runs in, like the OOM killer would."""
+    os._exit(1)
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, "WORKERS", 1)
+    monkeypatch.setattr(server, "MAX_QUEUE_SIZE", 1)
+    monkeypatch.setattr(server, "metrics", server.Metrics())
+    with TestClient(server.app, raise_server_exceptions=False) as client:
+        yield client
+
+
+@pytest.fixture
+def thread_pool(client):
+    """Runs the pipeline in a thread of the server, so that the tests can
+    replace it."""
+    server.executor.shutdown()
+    server.executor = ThreadPoolExecutor(max_workers=1)
+
+
+def assert_idle(metrics):
+    assert metrics.queued == 0
+    assert metrics.running == 0
+    assert not server.worker_slots.locked()
+
+
+def test_server_queue_full(client, thread_pool, monkeypatch):
+    """Checks that a request is rejected with a 503 while the worker is busy
+    and the queue is full, and that the counters go back down once the
+    requests are processed."""
+
+    release = threading.Event()
+
+    def run_pipeline(system):
+        release.wait()
+        return system["system_name"], {"pipeline": 0.5}, []
+
+    monkeypatch.setattr(server, "run_pipeline", run_pipeline)
+    metrics = server.metrics
+    post = lambda: client.post("/fn-given-filepaths", json=SYSTEM)
+    with ThreadPoolExecutor(max_workers=2) as requests:
+        running = requests.submit(post)
+        wait_for(lambda: metrics.running == 1)
+        queued = requests.submit(post)
+        wait_for(lambda: metrics.queued == 1)
+
+        response = post()
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(server.RETRY_AFTER)
+
+        release.set()
+        for response in (running.result(), queued.result()):
+            assert response.status_code == 200
+            assert response.json() == "main"
+
+    assert_idle(metrics)
+    assert (metrics.requests, metrics.rejected, metrics.failed) == (2, 1, 0)
+
+
+def test_server_failure(client, thread_pool, monkeypatch):
+    """Checks that the counters go back down after the pipeline fails."""
+
+    def run_pipeline(system):
+        raise ValueError(system["system_name"])
+
+    monkeypatch.setattr(server, "run_pipeline", run_pipeline)
+    for _ in range(2):
+        response = client.post("/fn-given-filepaths", json=SYSTEM)
+        assert response.status_code == 500
+    assert_idle(server.metrics)
+    assert (server.metrics.requests, server.metrics.failed) == (2, 2)
+
+
+def test_server_worker_died(client, monkeypatch):
+    """Checks that a request whose worker process dies fails with a 500, and
+    that the next request runs in a new pool."""
+
+    run_pipeline = server.run_pipeline
+    pool = server.executor
+    monkeypatch.setattr(server, "run_pipeline", exit_worker)
+    response = client.post("/fn-given-filepaths", json=SYSTEM)
+    assert response.status_code == 500
+    assert server.executor is not pool
+    assert_idle(server.metrics)
+    assert (server.metrics.failed, server.metrics.restarts) == (1, 1)
+
+    monkeypatch.setattr(server, "run_pipeline", run_pipeline)
+    response = client.post("/fn-given-filepaths", json=SYSTEM)
+    assert response.status_code == 200
+    assert json.loads(response.json())["name"] == "main"
+    assert_idle(server.metrics)
+    assert (server.metrics.failed, server.metrics.restarts) == (1, 1)
+
+
+def test_server_metrics(client, thread_pool, monkeypatch):
+    """Checks the metrics reported after a request, as JSON and in the
+    Prometheus text format."""
+
+    def run_pipeline(system):
+        return "", {"pipeline": 0.5, "serialize": 0.125}, [PASS_RECORD]
+
+    monkeypatch.setattr(server, "run_pipeline", run_pipeline)
+    assert client.post("/fn-given-filepaths", json=SYSTEM).status_code == 200
+
+    payload = client.get("/metrics").json()
+    assert payload["stages"].pop("queue_wait")["count"] == 1
+    assert payload == {
+        "workers": 1,
+        "max_queue_size": 1,
+        "queue_depth": 0,
+        "running": 0,
+        "requests_total": 1,
+        "rejected_total": 0,
+        "failed_total": 0,
+        "worker_restarts_total": 0,
+        "stages": {
+            "pipeline": {
+                "count": 1,
+                "total_seconds": 0.5,
+                "max_seconds": 0.5,
+            },
+            "serialize": {
+                "count": 1,
+                "total_seconds": 0.125,
+                "max_seconds": 0.125,
+            },
+        },
+        "passes": {
+            "IdCollapsePass": {
+                "count": 1,
+                "total_seconds": 0.25,
+                "max_seconds": 0.25,
+                "total_nodes": 12,
+                "max_peak_memory_bytes": None,
+            }
+        },
+    }
+
+    text = client.get("/metrics", params={"format": "prometheus"}).text
+    lines = text.splitlines()
+    assert "code2fn_requests_total 1" in lines
+    assert "code2fn_queue_depth 0" in lines
+    assert 'code2fn_stage_total_seconds{stage="pipeline"} 0.5' in lines
+    assert 'code2fn_pass_total_nodes{pass="IdCollapsePass"} 12' in lines
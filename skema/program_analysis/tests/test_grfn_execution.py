@@ -0,0 +1,221 @@
+import contextlib
+import io
+
+import networkx as nx
+import numpy as np
+from networkx.algorithms.simple_paths import all_simple_paths
+
+from skema.model_assembly.metadata import LambdaType
+from skema.model_assembly.model_dynamics import get_nodes_on_paths
+from skema.model_assembly.networks import (
+    GrFNLoopSubgraph,
+    simple_paths_subgraph,
+)
+from skema.model_assembly.sandbox import is_vectorizable
+from skema.program_analysis.python2cast import python_source_to_cast
+from skema.program_analysis.CAST2GrFN.ann_cast.cast_to_annotated_cast import (
+    CastToAnnotatedCastVisitor,
+)
+from skema.program_analysis.CAST2GrFN.ann_cast.pass_manager import (
+    PassManager,
+)
+
+SIR_STEP = """
+def get_beta(intrinsic_growth_rate, gamma, susceptible, relative_contact_rate):
+    inv_contact_rate = 1.0 - relative_contact_rate
+    updated_growth_rate = intrinsic_growth_rate + gamma
+    beta = updated_growth_rate / susceptible * inv_contact_rate
+    return beta
+
+
+def sir(s, i, r, beta, gamma, n):
+    s_n = (-beta * s * i) + s
+    i_n = (beta * s * i - gamma * i) + i
+    r_n = gamma * i + r
+    scale = n / (s_n + i_n + r_n)
+    return i_n * scale
+
+
+infected = sir(
+    990.0, 10.0, 0.0, get_beta(0.19, 0.07, 990.0, 0.05), 0.07, 1000.0
+)
+"""
+
+
+def source_to_grfn(source):
+    with contextlib.redirect_stdout(io.StringIO()):
+        cast = python_source_to_cast(source, "sir_step.py")
+        pipeline_state = CastToAnnotatedCastVisitor(
+            cast
+        ).generate_annotated_cast(grfn_2_2=True)
+        PassManager("ToGrfnPass").run(pipeline_state)
+    return pipeline_state.get_grfn()
+
+
+def sir_inputs(grfn, size, susceptible):
+    rng = np.random.default_rng(0)
+    names = {i.var_name: str(i) for i in grfn.input_names}
+    return {
+        names["get_beta_id1_call0_arg0"]: rng.uniform(0.1, 0.3, size),
+        names["get_beta_id1_call0_arg2"]: rng.choice(susceptible, size),
+    }
+
+
+def test_is_vectorizable():
+    assert is_vectorizable("lambda a, b: ((a * b) - (2 ** a)) / -b")
+    assert is_vectorizable("lambda a, b: (a < b)")
+    assert is_vectorizable("lambda a, b: (a, b + 1)", allow_tuple=True)
+    assert not is_vectorizable("lambda a, b: (a, b + 1)")
+    assert not is_vectorizable("lambda a, b: a if b else 0")
+    assert not is_vectorizable("lambda a, b: a < b < 1")
+    assert not is_vectorizable("lambda a: exp(a)")
+    assert not is_vectorizable("lambda a: a[0]")
+    assert not is_vectorizable("lambda a: a + 'x'")
+
+
+def test_vectorized_lambdas():
+    """Checks that the lambdas called on whole arrays of samples give the
+    same outputs as the lambdas called once per sample."""
+
+    grfn = source_to_grfn(SIR_STEP)
+    assert all(node.vectorizable for node in grfn.lambdas)
+    inputs = sir_inputs(grfn, 1000, [900.0, 990.0])
+    # a susceptible population of 0 divides by 0 in get_beta, which is then
+    # called once per sample
+    zero_inputs = sir_inputs(grfn, 1000, [0.0, 990.0])
+    vectorized = grfn(inputs)["infected"]
+    zero_vectorized = grfn(zero_inputs)["infected"]
+    assert isinstance(vectorized, np.ndarray)
+    assert vectorized.shape == (1000,)
+
+    for node in grfn.lambdas:
+        node.vectorizable = False
+    np.testing.assert_array_equal(vectorized, grfn(inputs)["infected"])
+    np.testing.assert_array_equal(
+        zero_vectorized, grfn(zero_inputs)["infected"]
+    )
+
+
+COUNTDOWN = """
+def countdown(n):
+    total = 0.0
+    i = 0
+    while i < n:
+        if i > 2:
+            total = total + i * 2
+        else:
+            total = total + 1
+        i = i + 1
+    return total
+
+
+result = countdown(4)
+"""
+
+
+def test_execution_plan():
+    """Checks that the compiled plan gives the outputs of the GrFN"""
+
+    grfn = source_to_grfn(SIR_STEP)
+    plan = grfn.compile()
+    # the GrFN keeps the inputs it is given, so the call with no inputs is
+    # made first
+    for inputs in ({}, sir_inputs(grfn, 100, [0.0, 990.0])):
+        expected = grfn(inputs)
+        outputs = plan(inputs)
+        assert outputs.keys() == expected.keys()
+        for name, value in expected.items():
+            np.testing.assert_array_equal(outputs[name], value)
+        desired = plan(inputs, desired_outputs=["infected"])
+        np.testing.assert_array_equal(
+            desired["infected"], expected["infected"]
+        )
+
+
+def test_execution_plan_loop():
+    """Checks a loop that the samples leave after different numbers of
+    iterations, compiled and executed by the GrFN"""
+
+    grfn = source_to_grfn(COUNTDOWN)
+    (n,) = [str(i) for i in grfn.input_names]
+    for execute in (grfn.compile(), grfn):
+        assert execute({})["result"].tolist() == [9.0]
+        outputs = execute({n: np.array([0, 1, 3, 5, 6])})
+        assert outputs["result"].tolist() == [0.0, 1.0, 3.0, 17.0, 27.0]
+
+    # the GrFN compiles the plan of the loop once, and reuses it
+    (loop,) = [s for s in grfn.subgraphs if isinstance(s, GrFNLoopSubgraph)]
+    plan = loop.plan
+    assert plan is not None and plan.grfn is grfn
+    assert grfn({n: np.array([2])})["result"].tolist() == [2.0]
+    assert loop.plan is plan
+
+
+def test_nodes_on_paths():
+    """Checks that the nodes and edges on the paths between the nodes of a
+    cyclic graph are those on its simple paths"""
+
+    graph = nx.DiGraph([("S", "A"), ("A", "S"), ("S", "T")])
+    assert get_nodes_on_paths(graph, "S", "T") == ["S", "T"]
+    assert simple_paths_subgraph(graph, "S", "T") == (
+        {"S", "T"},
+        {("S", "T")},
+    )
+
+    grfn = source_to_grfn(COUNTDOWN)
+    assert not nx.is_directed_acyclic_graph(grfn)
+    for source in grfn.nodes:
+        for target in grfn.nodes:
+            if source == target:
+                continue
+            paths = list(all_simple_paths(grfn, source, target))
+            nodes, edges = simple_paths_subgraph(grfn, source, target)
+            assert nodes == {n for path in paths for n in path}
+            assert edges == {e for path in paths for e in zip(path, path[1:])}
+            assert set(get_nodes_on_paths(grfn, source, target)) == nodes
+
+
+def test_output_distances():
+    """Checks the execution of a GrFN whose root subgraph has nothing to
+    execute, which starts from the literal furthest from the outputs"""
+
+    grfn = source_to_grfn(
+        "def main():\n"
+        "    a = 1.0\n"
+        "    b = a * 2.0\n"
+        "    c = b + 3.0\n"
+        "    return c\n"
+        "\n"
+        "\n"
+        "main()\n"
+    )
+    distances = grfn.output_distances()
+    literals = {
+        e.lambda_fn: e.lambda_fn.func_str
+        for e in grfn.hyper_edges
+        if e.lambda_fn.func_type == LambdaType.LITERAL
+    }
+    assert literals[max(literals, key=distances.get)] == "lambda : 1.0"
+    (value,) = [v for v in grfn({}).values() if v is not None]
+    assert value.tolist() == [5.0]
+
+
+def test_execute_batched():
+    """Checks that executing the chunks of samples in worker processes gives
+    the outputs of executing all the samples at once, in order"""
+
+    grfn = source_to_grfn(SIR_STEP)
+    inputs = sir_inputs(grfn, 1000, [900.0, 990.0])
+    expected = grfn.compile()(inputs)["infected"]
+    for workers in (1, 2):
+        outputs = grfn.execute_batched(inputs, chunk_size=300, workers=workers)
+        np.testing.assert_array_equal(outputs["infected"], expected)
+    chunks = list(grfn.iter_batched(inputs, chunk_size=300, workers=2))
+    assert [len(c["infected"]) for c in chunks] == [300, 300, 300, 100]
+
+    grfn = source_to_grfn(COUNTDOWN)
+    (n,) = [str(i) for i in grfn.input_names]
+    outputs = grfn.execute_batched(
+        {n: np.array([6, 0, 5, 1, 3])}, chunk_size=2, workers=2
+    )
+    assert outputs["result"].tolist() == [27.0, 0.0, 17.0, 1.0, 3.0]
@@ -0,0 +1,242 @@
+import io
+import json
+import sys
+from pathlib import Path
+
+from skema.gromet.fn import GrometFN, GrometFNModuleCollection
+from skema.gromet.metadata import SourceCodeReference
+from skema.program_analysis.CAST2GrFN.cast import CAST
+from skema.program_analysis.CAST2GrFN.model.cast import Expr, UnaryOp
+from skema.program_analysis.JSON2GroMEt.json2gromet import json_to_gromet
+from skema.program_analysis.multi_file_ingester import process_file
+from skema.program_analysis.python2cast import python_to_cast
+from skema.utils.fold import (
+    dictionary_to_gromet_json,
+    del_nulls,
+    gromet_to_json,
+    write_gromet_json,
+)
+from skema.utils import json_stream, packing
+from skema.utils.module_to_fn_collection import module_to_fn_collection
+from skema.utils.serializers import GROMET_SCHEMA
+
+DATA_DIR = Path(__file__).parents[3] / "data"
+
+
+def chime_collection() -> GrometFNModuleCollection:
+    module = process_file(
+        str(DATA_DIR / "demo"), "CHIME_SIR_while_loop_section.py"
+    )
+    return module_to_fn_collection(module, "CHIME_SIR")
+
+
+def test_write_gromet_json():
+    """Checks that the streaming GroMEt JSON writer produces exactly the same
+    output as converting the collection to a dictionary first."""
+
+    collection = chime_collection()
+
+    expected = dictionary_to_gromet_json(del_nulls(collection.to_dict()))
+    assert gromet_to_json(collection) == expected
+
+    out = io.StringIO()
+    write_gromet_json(collection, out, level=2)
+    assert out.getvalue() == dictionary_to_gromet_json(
+        del_nulls(collection.to_dict()), level=2
+    )
+
+
+def test_compiled_to_dict():
+    """Checks that the compiled to_dict returns exactly what the generated
+    to_dict of the GroMEt classes does."""
+
+    collection = chime_collection()
+    compiled = collection.to_dict()
+    GROMET_SCHEMA.use_compiled(False)
+    try:
+        assert collection.to_dict() == compiled
+    finally:
+        GROMET_SCHEMA.use_compiled(True)
+
+
+def test_json_to_gromet(tmp_path):
+    """Checks that GroMEt JSON read back with json_to_gromet is written out
+    unchanged."""
+
+    gromet_json = gromet_to_json(chime_collection())
+    path = tmp_path / "CHIME_SIR.json"
+    path.write_text(gromet_json)
+
+    collection = json_to_gromet(str(path))
+    module = collection.modules[0]
+    assert isinstance(module.attributes[0].value, GrometFN)
+    assert isinstance(module.metadata_collection[1][0], SourceCodeReference)
+    assert json.loads(gromet_to_json(collection)) == json.loads(gromet_json)
+
+
+def test_gromet_metadata_modes():
+    """Checks that interning the metadata shares the indices of identical
+    metadata without changing what the boxes and ports refer to, and that no
+    metadata is generated when it is turned off."""
+
+    def element_metadata(module):
+        metadata = []
+        for attribute in module.attributes:
+            for table in attribute.value.to_dict().values():
+                if isinstance(table, list):
+                    metadata.extend(
+                        row.get("metadata")
+                        for row in table
+                        if isinstance(row, dict)
+                    )
+        return metadata
+
+    def resolve(module, index):
+        # the metadata an element refers to, without the uids and timestamps
+        # that differ between runs
+        if index is None:
+            return None
+        resolved = []
+        for md in module.metadata_collection[index - 1]:
+            md = md.to_dict() if md is not None else {}
+            md.pop("provenance", None)
+            md.pop("code_file_reference_uid", None)
+            resolved.append(md)
+        return resolved
+
+    code = str(DATA_DIR / "epidemiology" / "CHIME")
+    file_name = "CHIME_SIR_model/code/CHIME_SIR_while_loop.py"
+    full = process_file(code, file_name)
+    interned = process_file(code, file_name, gromet_metadata="interned")
+    none = process_file(code, file_name, gromet_metadata="none")
+
+    assert len(interned.metadata_collection) < len(full.metadata_collection)
+    assert [resolve(interned, i) for i in element_metadata(interned)] == [
+        resolve(full, i) for i in element_metadata(full)
+    ]
+
+    assert none.metadata_collection == []
+    assert none.metadata is None
+    assert set(element_metadata(none)) == {None}
+
+
+def test_cast_json_round_trip(tmp_path):
+    cast = python_to_cast(
+        str(DATA_DIR / "demo" / "CHIME_SIR_while_loop_section.py"),
+        cast_obj=True,
+    )
+    assert CAST.from_json_str(cast.to_json_str()) == cast
+
+    path = tmp_path / "CHIME_SIR.json"
+    path.write_text(cast.to_json_str())
+    assert CAST.from_json_file(str(path)) == cast
+    assert CAST.from_json_file(str(path), stream=True) == cast
+
+
+def test_parse_deep_cast_json():
+    """Checks that CAST nested deeper than the recursion limit can be
+    decoded."""
+
+    data = {"node_type": "Name", "name": "x", "id": 0, "source_refs": []}
+    for _ in range(sys.getrecursionlimit() + 100):
+        data = {"node_type": "Expr", "expr": data, "source_refs": []}
+
+    node = CAST.parse_cast_json(data)
+    while isinstance(node, Expr):
+        node = node.expr
+    assert node.name == "x"
+
+
+def test_deep_cast_json_file(tmp_path):
+    """Checks that a CAST file nested deeper than the recursion limit can be
+    loaded from the file with the streaming decoder."""
+
+    depth = sys.getrecursionlimit() * 3
+    unary_op = '{"node_type": "UnaryOp", "op": "USub", "source_refs": [], "value": '
+    path = tmp_path / "deep.json"
+    path.write_text(
+        '{"nodes": [{"node_type": "Module", "name": "deep", "source_refs": [], "body": ['
+        + unary_op * depth
+        + '{"node_type": "Name", "name": "x", "id": 0, "source_refs": []}'
+        + "}" * depth
+        + "]}]}"
+    )
+
+    (module,) = CAST.from_json_file(str(path), stream=True).nodes
+    (node,) = module.body
+    for _ in range(depth):
+        assert isinstance(node, UnaryOp)
+        node = node.value
+    assert node.name == "x"
+
+
+def test_json_stream_load():
+    """Checks that decoding JSON a few characters at a time gives the same
+    result as json.loads."""
+
+    document = json.dumps(
+        {
+            "nodes": [
+                {"a": [1, -2.5e-3, "x\\\"y\u00e9", None, True, False, {}]},
+                [],
+                12345678901234567890,
+            ],
+            "other": {"b": "c"},
+        },
+        indent=2,
+    )
+    for chunk_size in (1, 3, 7, 1 << 16):
+        for hook_depth in (0, 1, 2, 3, 10):
+            assert json_stream.load(
+                io.StringIO(document),
+                object_hook=dict,
+                hook_depth=hook_depth,
+                chunk_size=chunk_size,
+            ) == json.loads(document)
+
+
+def test_packing():
+    values = [
+        None,
+        True,
+        -1,
+        -(1 << 63),
+        1 << 64,
+        -(1 << 70),
+        0.1,
+        "",
+        "x" * 70000,
+        "\u00e9t\u00e9",
+        [list(range(20)), {str(i): i for i in range(20)}],
+        ["name", "name", "name"] + [f"string_{i}" for i in range(300)],
+        {str(i): list(range(i)) for i in range(100)},
+    ]
+    data = packing.packb(values)
+    assert packing.unpack_python(data) == values
+    assert packing.unpackb(data) == values
+
+    # Arrays nested deeper than the recursion limit
+    depth = sys.getrecursionlimit() + 100
+    value = packing.unpack_python(b"\x91" * depth + packing.packb("x"))
+    for _ in range(depth):
+        (value,) = value
+    assert value == "x"
+
+    cast = python_to_cast(
+        str(DATA_DIR / "demo" / "CHIME_SIR_while_loop_section.py"),
+        cast_obj=True,
+    )
+    assert packing.loads(packing.dumps(cast)) == cast
+
+    collection = chime_collection()
+    data = packing.dumps(collection)
+    assert len(data) < len(gromet_to_json(collection)) / 2
+    for compress in (True, False):
+        assert dictionary_to_gromet_json(
+            packing.unpack_document(packing.dumps(collection, compress))[
+                "data"
+            ]
+        ) == gromet_to_json(collection)
+    assert packing.loads(data).to_dict() == GrometFNModuleCollection.from_dict(
+        json.loads(gromet_to_json(collection))
+    ).to_dict()
@@ -0,0 +1,97 @@
+import re
+from pathlib import Path
+
+from skema.program_analysis import multi_file_ingester
+from skema.program_analysis.multi_file_ingester import process_file_system
+from skema.program_analysis.module_cache import GrometModuleCache
+from skema.utils.fold import gromet_to_json
+
+
+def test_module_cache(tmp_path, monkeypatch):
+    """Ingests a small system twice with a module cache, and checks that the
+    second ingestion only converts the file that changed."""
+
+    root = tmp_path / "system"
+    root.mkdir()
+    (root / "a.py").write_text("x = 1\n")
+    (root / "b.py").write_text("def main():\n    return 2\n")
+    files = tmp_path / "system_filepaths.txt"
+    files.write_text("a.py\nb.py\n")
+    cache_dir = str(tmp_path / "cache")
+
+    first = process_file_system(
+        "sys", str(root), str(files), cache_dir=cache_dir
+    )
+    assert len(GrometModuleCache(cache_dir).entry_paths()) == 2
+
+    converted = []
+    process_file = multi_file_ingester.process_file
+
+    def counting_process_file(root_dir, f):
+        converted.append(f.strip())
+        return process_file(root_dir, f)
+
+    monkeypatch.setattr(
+        multi_file_ingester, "process_file", counting_process_file
+    )
+    (root / "a.py").write_text("x = 3\n")
+    second = process_file_system(
+        "sys", str(root), str(files), cache_dir=cache_dir
+    )
+
+    assert converted == ["a.py"]
+    assert second.module_index == first.module_index
+    assert second.executables == first.executables
+
+
+def test_module_cache_new_module(tmp_path):
+    """Checks that adding a module that a cached file imports invalidates its
+    entry, as the CAST only keeps the imports of the modules it can
+    resolve."""
+
+    root = tmp_path / "system"
+    root.mkdir()
+    (root / "a.py").write_text("import zz_mod\n\nx = zz_mod.f(1)\n")
+    files = tmp_path / "system_filepaths.txt"
+    files.write_text("a.py\n")
+    cache_dir = str(tmp_path / "cache")
+
+    def ingest(cache_dir):
+        collection = process_file_system(
+            "sys", str(root), str(files), cache_dir=cache_dir, id_seed="s"
+        )
+        return re.sub(
+            r'"(timestamp|date_created)": ?"[^"]*"',
+            "",
+            gromet_to_json(collection),
+        )
+
+    before = ingest(cache_dir)
+    (root / "zz_mod.py").write_text("def f(a):\n    return a\n")
+    after = ingest(cache_dir)
+    assert after == ingest(None)
+    assert after != before
+    assert len(GrometModuleCache(cache_dir).entry_paths()) == 2
+
+
+def test_module_cache_eviction(tmp_path):
+    """Checks that the least recently used entries are evicted first once
+    the cache grows past its size limit."""
+
+    cache = GrometModuleCache(str(tmp_path))
+    root = tmp_path / "system"
+    root.mkdir()
+    (root / "a.py").write_text("x = 1\n")
+    module = multi_file_ingester.process_file(str(root), "a.py")
+
+    keys = [cache.key(f"x = {i}\n", "a.py") for i in range(3)]
+    cache.put(keys[0], module)
+    entry_size = cache.size
+    cache.max_size = 2 * entry_size
+    cache.put(keys[1], module)
+    assert cache.get(keys[0]) is not None
+    cache.put(keys[2], module)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
@@ -0,0 +1,66 @@
+import os
+import sys
+
+from skema.program_analysis.PyAST2CAST.module_index import ModuleIndex
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_module_index(tmp_path):
+    """Indexes a small site directory, and checks that its modules and their
+    exports are found without importing them."""
+
+    site = tmp_path / "site"
+    write(
+        site / "pkg" / "__init__.py",
+        "raise RuntimeError('imported')\n"
+        "from .core import *\n"
+        "from . import helpers\n"
+        "def top(): pass\n"
+        "_private = 1\n",
+    )
+    write(
+        site / "pkg" / "core.py",
+        "__all__ = ['solve']\n"
+        "__all__ += ['Model']\n"
+        "def solve(): pass\n"
+        "class Model: pass\n"
+        "def unlisted(): pass\n",
+    )
+    write(site / "pkg" / "helpers.py", "from pkg import *\n")
+    write(site / "stubbed.pyi", "def typed(x: int) -> int: ...\n")
+    write(site / "stubbed.py", "def untyped(x): pass\n")
+    write(site / "nspkg" / "mod.py", "if True:\n    a, (b, c) = 1, (2, 3)\n")
+
+    cache_dir = str(tmp_path / "cache")
+    index = ModuleIndex([str(site)], cache_dir)
+
+    assert index.exports("pkg") == {"solve", "Model", "helpers", "top"}
+    assert index.exports("pkg.core") == {"solve", "Model"}
+    assert index.exports("pkg.helpers") == index.exports("pkg")
+    assert index.exports("stubbed") == {"typed"}
+    assert index.has_module("nspkg")
+    assert index.exports("nspkg.mod") == {"a", "b", "c"}
+    assert not index.has_module("missing")
+    assert not index.has_module("pkg.core.solve")
+    assert "pkg" not in sys.modules
+
+    # A new index reads the stored entries, until a source file changes
+    stored = ModuleIndex([str(site)], cache_dir)
+    assert stored.read_entry("pkg")["exports"] == sorted(index.exports("pkg"))
+    core = site / "pkg" / "core.py"
+    core.write_text("def solve(): pass\ndef other(): pass\n")
+    os.utime(core, ns=(0, 0))
+    assert stored.read_entry("pkg") is None
+    assert "other" in stored.exports("pkg")
+
+
+def test_module_index_stdlib(tmp_path):
+    index = ModuleIndex(cache_dir=None)
+    assert "sqrt" in index.exports("math")
+    assert "join" in index.exports("os.path")
+    assert "OrderedDict" in index.exports("collections")
+    assert index.has_module("xml.etree.ElementTree")
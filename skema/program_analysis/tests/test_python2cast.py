@@ -0,0 +1,78 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from skema.program_analysis.python2cast import (
+    python_to_cast,
+    python_source_to_cast,
+)
+from skema.program_analysis.PyAST2CAST.modules_list import virtual_file_tree
+from skema.program_analysis.CAST2GrFN.model.cast import ModelIf, ModelImport
+
+
+def test_python_to_cast_threads():
+    """Converts several files concurrently from a thread pool, and checks
+    that the results match the serial conversion and that the working
+    directory of the process is never changed."""
+
+    data_dir = Path(__file__).parents[3] / "data"
+    root = data_dir / "epidemiology/Bucky/code/bucky_v2"
+    paths = [
+        str(root / f)
+        for f in ("model/vacc.py", "model/npi.py", "util/util.py", "config.py")
+    ]
+
+    cwd = os.getcwd()
+    serial = [python_to_cast(p, cast_obj=True).to_json_str() for p in paths]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        threaded = list(
+            executor.map(
+                lambda p: python_to_cast(p, cast_obj=True).to_json_str(),
+                paths,
+            )
+        )
+
+    assert threaded == serial
+    assert os.getcwd() == cwd
+
+
+def test_python_source_to_cast_virtual_files():
+    """Checks that imports between the files of a system that only exists in
+    memory are resolved against its virtual file tree."""
+
+    virtual_files = virtual_file_tree(
+        ["system/main.py", "system/helpers.py", "system/pkg/__init__.py"]
+    )
+    source = "import helpers\nimport pkg\nimport missing\n"
+    cast = python_source_to_cast(
+        source, "system/main.py", virtual_files=virtual_files
+    )
+
+    imports = [
+        node.name
+        for node in cast.nodes[0].body
+        if isinstance(node, ModelImport)
+    ]
+    assert imports == ["helpers", "pkg"]
+
+
+def test_python_source_to_cast_deep_nesting():
+    """Converts an elif chain and an expression nested deeper than the
+    recursion limit."""
+
+    branches = "".join(
+        f"elif x == {i}:\n    y = {i}\n" for i in range(1, 2000)
+    )
+    source = (
+        "x = 1\n"
+        f"y = {' + '.join(['x'] * 2000)}\n"
+        f"if x == 0:\n    y = 0\n{branches}"
+    )
+    module = python_source_to_cast(source, "deep.py").nodes[0]
+
+    depth = 0
+    node = module.body[-1]
+    while isinstance(node, ModelIf):
+        depth += 1
+        node = node.orelse[0] if node.orelse else None
+    assert depth == 2000
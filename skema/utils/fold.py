@@ -18,6 +18,7 @@ Example:
 }
 """
 
+import io
 import json
 
 
@@ -103,3 +104,144 @@ def del_nulls(d):
             del d[key]
 
     return d
+
+
+def is_gromet_object(o):
+    """Checks whether o is an instance of one of the Swagger generated GroMEt
+    classes, whose fields can be read directly from swagger_types instead of
+    calling to_dict(). Other objects (e.g. AnnCAST nodes stored as port
+    default values) may override to_dict(), so they are still converted with
+    it."""
+    return hasattr(o, "swagger_types") and type(o).__module__.startswith(
+        "skema.gromet."
+    )
+
+
+class GrometJsonWriter:
+    """Writes GroMEt objects to a file-like object with the same folded layout
+    as dictionary_to_gromet_json(del_nulls(o.to_dict())).
+
+    The writer walks the Swagger objects directly instead of first converting
+    them with to_dict(), and it skips null fields as it goes, so it never holds
+    a copy of the whole collection in memory. Output is buffered, and passed to
+    out.write() once roughly buffer_size pieces have accumulated.
+    """
+
+    def __init__(self, out, fold_level=5, indent=4, buffer_size=1 << 14):
+        self.out = out
+        self.fold_level = fold_level
+        self.indent = indent
+        self.buffer_size = buffer_size
+        self.parts = []
+
+    def flush(self):
+        if self.parts:
+            self.out.write("".join(self.parts))
+            self.parts.clear()
+
+    def write(self, o, level=0):
+        self.write_value(o, self.fold_level, level, "", True)
+        self.flush()
+
+    def write_value(self, o, fold_level, level, parent_key, clean):
+        """Writes a single value.
+        The `clean` flag tells whether the null fields of o (if it is a
+        dictionary) are skipped. It mirrors which dictionaries del_nulls()
+        reaches: GroMEt objects, dictionaries nested in them, and dictionaries
+        directly inside their lists, but not inside lists of lists.
+        """
+        if isinstance(o, str):
+            self.parts.append(json.dumps(o))
+        elif isinstance(o, bool):
+            self.parts.append("true" if o else "false")
+        elif isinstance(o, float):
+            self.parts.append("%.7g" % o)
+        elif isinstance(o, int):
+            self.parts.append(str(o))
+        elif isinstance(o, list):
+            self.write_list(o, fold_level, level, parent_key, clean)
+        elif isinstance(o, dict):
+            self.write_items(o.items(), fold_level, level, parent_key, clean)
+        elif o is None:
+            self.parts.append("null")
+        elif is_gromet_object(o):
+            items = [(attr, getattr(o, attr)) for attr in o.swagger_types]
+            self.write_items(items, fold_level, level, parent_key, True)
+        elif hasattr(o, "to_dict"):
+            temp = del_nulls(o.to_dict())
+            self.write_value(temp, fold_level, level, parent_key, True)
+        else:
+            self.parts.append(str(o))
+
+    def write_list(self, o, fold_level, level, parent_key, clean):
+        if level < fold_level:
+            newline = "\n"
+            space = " " * self.indent
+        else:
+            newline = ""
+            space = ""
+        emit = self.parts.append
+        emit("[" + newline)
+        separator = "," + newline + space * (level + 1)
+        first = True
+        for e in o:
+            emit(space * (level + 1) if first else separator)
+            first = False
+            self.write_value(
+                e,
+                fold_level,
+                level + 1,
+                parent_key,
+                clean and not isinstance(e, list),
+            )
+        emit(newline + space * level + "]")
+        if len(self.parts) >= self.buffer_size:
+            self.flush()
+
+    def write_items(self, items, fold_level, level, parent_key, clean):
+        if level < fold_level:
+            newline = "\n"
+            space = " " * self.indent
+            colon = '": '
+        else:
+            newline = ""
+            space = ""
+            colon = '":'
+        emit = self.parts.append
+        emit("{" + newline)
+        separator = "," + newline + space * (level + 1) + '"'
+        first = True
+        for k, v in items:
+            if clean and v is None:
+                continue
+            emit(space * (level + 1) + '"' if first else separator)
+            first = False
+            emit(str(k) + colon)
+            if k == "fn":
+                self.write_value(v, 4, level + 1, k, clean)
+            elif k == "attributes":
+                self.write_value(v, 6, level + 1, k, clean)
+            elif k == "bf" and parent_key == "fn":
+                self.write_value(v, 5, level + 1, k, clean)
+            elif k == "bf" and parent_key == "value":
+                self.write_value(v, 7, level + 1, k, clean)
+            else:
+                self.write_value(v, fold_level, level + 1, k, clean)
+        emit(newline + space * level + "}")
+        if len(self.parts) >= self.buffer_size:
+            self.flush()
+
+
+def write_gromet_json(o, out, fold_level=5, indent=4, level=0):
+    """Writes a GroMEt object (e.g. a GrometFNModuleCollection) as folded JSON
+    to the file-like object out. The output is the same as
+    dictionary_to_gromet_json(del_nulls(o.to_dict()))."""
+    GrometJsonWriter(out, fold_level, indent).write(o, level)
+
+
+def gromet_to_json(o, fold_level=5, indent=4, level=0):
+    """Returns a GroMEt object as a folded JSON string (see
+    write_gromet_json)."""
+    out = io.StringIO()
+    write_gromet_json(o, out, fold_level, indent, level)
+    return out.getvalue()
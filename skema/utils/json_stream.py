@@ -0,0 +1,237 @@
+"""
+A JSON decoder that reads its input incrementally.
+
+json.load reads the whole document into a string, then builds the whole tree of
+Python objects, before the caller gets to look at any of it. load here reads
+the file in chunks, and decodes it a token at a time. Every object nested at
+least hook_depth levels deep is passed to object_hook as soon as it is
+complete. A caller that turns the objects into something else, like
+CAST.from_json_file(stream=True) does with CAST nodes, then only holds a chunk
+of the text and the objects that have not been converted yet, instead of the
+text and the dictionaries of the whole document. It is several times slower
+than json.load, so it is meant for documents too deep or too large for it.
+
+Objects and lists are decoded with an explicit stack, so a document nested
+deeper than the recursion limit can be decoded.
+"""
+
+import re
+from json import JSONDecodeError
+from json.decoder import scanstring
+from json.scanner import NUMBER_RE
+
+# 64 KiB
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# The next token: a string without escapes and, for keys, the colon after it,
+# a delimiter, or a number or literal, which runs up to the next delimiter or
+# whitespace
+TOKEN = re.compile(
+    r'[ \t\n\r]*(?:"([^"\\]*)"([ \t\n\r]*:)?|([{}\[\],])|([^,:\[\]{}\s"]+))'
+)
+
+LITERALS = {
+    "true": True,
+    "false": False,
+    "null": None,
+    "NaN": float("nan"),
+    "Infinity": float("inf"),
+    "-Infinity": float("-inf"),
+}
+
+
+class JSONReader:
+    """Reads JSON tokens from a text file, a chunk at a time.
+
+    Attributes:
+        buffer: The text read from the file that has not been consumed yet,
+            starting at the last chunk boundary.
+        pos: The position of the next character in buffer.
+        eof: Whether the whole file has been read.
+    """
+
+    def __init__(self, fp, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Drops the consumed text from the buffer and reads the next chunk,
+        or as much again as is buffered, so that retrying to read a long token
+        after every chunk takes linear time in total. Returns False if there
+        was nothing left to read."""
+        size = max(self.chunk_size, len(self.buffer) - self.pos)
+        chunk = "" if self.eof else self.fp.read(size)
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+        return bool(chunk)
+
+    def error(self, message: str):
+        return JSONDecodeError(message, self.buffer, self.pos)
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next character, without consuming
+        it. Returns "" at the end of the file."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def read_string(self) -> str:
+        """Reads a string. The next character must be its opening quote."""
+        while True:
+            try:
+                value, self.pos = scanstring(self.buffer, self.pos + 1)
+                return value
+            except JSONDecodeError:
+                # The string may continue in the next chunk
+                if not self.fill():
+                    raise
+
+    def scalar(self, token: str):
+        """The value of a number or literal token."""
+        if token in LITERALS:
+            return LITERALS[token]
+        match = NUMBER_RE.fullmatch(token)
+        if not match:
+            raise self.error("Expecting value")
+        integer, frac, exp = match.groups()
+        if frac or exp:
+            return float(integer + (frac or "") + (exp or ""))
+        return int(integer)
+
+    def next_token(self):
+        """
+        Reads the next token. Returns a tuple of:
+            - the delimiter if the token is one of {}[], and "" at the end of
+              the file, None otherwise
+            - the value of the string, number or literal
+            - whether the token is a string followed by a colon, i.e. a key
+        """
+        while True:
+            match = TOKEN.match(self.buffer, self.pos)
+            # A token that reaches the end of the buffer may continue in the
+            # next chunk
+            if match is not None and match.end() < len(self.buffer):
+                break
+            if not self.fill():
+                break
+
+        if match is None:
+            # A string with escapes, or the end of the file
+            c = self.peek()
+            if c != '"':
+                if c == "":
+                    return "", None, False
+                raise self.error("Expecting value")
+            value = self.read_string()
+            is_key = self.peek() == ":"
+            if is_key:
+                self.pos += 1
+            return None, value, is_key
+
+        self.pos = match.end()
+        string, colon, delimiter, token = match.groups()
+        if string is not None:
+            return None, string, colon is not None
+        if delimiter is not None:
+            return delimiter, None, False
+        return None, self.scalar(token), False
+
+    def read_key(self) -> str:
+        """Reads the key of an object member and the colon after it."""
+        delimiter, key, is_key = self.next_token()
+        if not is_key:
+            raise self.error("Expecting property name enclosed in double quotes")
+        return key
+
+
+def load(
+    fp,
+    object_hook=None,
+    hook_depth: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+):
+    """Decodes the JSON document in the text file fp.
+
+    Args:
+        fp: The file to read.
+        object_hook: If given, called with every decoded object (as a dict)
+            nested at least hook_depth levels deep. Its return value is used
+            in place of the dict. The top level value of the document is at
+            depth 0.
+        hook_depth: The depth of the shallowest objects passed to object_hook.
+        chunk_size: The number of characters read from fp at a time.
+    """
+    reader = JSONReader(fp, chunk_size)
+    next_token = reader.next_token
+
+    # Each frame is an open object or list, and for objects, the key of the
+    # member being decoded
+    stack = []
+    delimiter, value, is_key = next_token()
+    while True:
+        # Decode a scalar, or open a new object or list
+        if delimiter == "{":
+            delimiter, key, is_key = next_token()
+            if delimiter != "}":
+                if not is_key:
+                    raise reader.error(
+                        "Expecting property name enclosed in double quotes"
+                    )
+                stack.append([{}, key])
+                delimiter, value, is_key = next_token()
+                continue
+            value = {}
+            if object_hook is not None and len(stack) >= hook_depth:
+                value = object_hook(value)
+        elif delimiter == "[":
+            delimiter, value, is_key = next_token()
+            if delimiter != "]":
+                stack.append([[], None])
+                continue
+            value = []
+        elif delimiter is not None or is_key:
+            raise reader.error("Expecting value")
+
+        # Add the value to its parent, and close the objects and lists that
+        # have no members left
+        while True:
+            if not stack:
+                if next_token()[0] != "":
+                    raise reader.error("Extra data")
+                return value
+
+            frame = stack[-1]
+            container = frame[0]
+            is_object = container.__class__ is dict
+            if is_object:
+                container[frame[1]] = value
+            else:
+                container.append(value)
+
+            delimiter = next_token()[0]
+            if delimiter == ",":
+                if is_object:
+                    frame[1] = reader.read_key()
+                delimiter, value, is_key = next_token()
+                break
+            elif delimiter == ("}" if is_object else "]"):
+                stack.pop()
+                value = container
+                if (
+                    is_object
+                    and object_hook is not None
+                    and len(stack) >= hook_depth
+                ):
+                    value = object_hook(value)
+            else:
+                raise reader.error("Expecting ',' delimiter")
@@ -1,16 +1,66 @@
+import contextlib
+import contextvars
 import sys
 import platform
 import random
-import uuid
-
-# -------------------------------------------
-# Remove this block to generate different
-# UUIDs everytime you run this code.
-# This block should be right below the uuid
-# import.
-rd = random.Random()
-uuid.uuid4 = lambda: uuid.UUID(int=rd.getrandbits(128))
-# -------------------------------------------
+import typing
+
+
+class IdAllocator:
+    """
+    Allocates the uids of the GrFN nodes, subgraphs and metadata created by one
+    run of the pipeline.
+    An allocator without a seed draws random 128 bit ids, like uuid4. An
+    allocator with a seed counts up from a base drawn from the seed, so that a
+    run creates the same uids every time, whatever else runs in the process.
+    The ids are rendered in the format of UUID strings, without creating UUID
+    objects.
+    """
+
+    def __init__(self, seed: typing.Hashable = None):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.next_id = None
+        if seed is not None:
+            self.next_id = self.random.getrandbits(64) << 64
+
+    def new_int(self) -> int:
+        if self.next_id is None:
+            return self.random.getrandbits(128)
+        self.next_id += 1
+        return self.next_id
+
+    def new_uid(self) -> str:
+        return uid_string(self.new_int())
+
+
+def uid_string(value: int) -> str:
+    """Returns the string of `uuid.UUID(int=value)`"""
+    h = "%032x" % value
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+# the allocator of the pipeline that is running, see use_id_allocator()
+active_id_allocator = contextvars.ContextVar(
+    "active_id_allocator", default=IdAllocator()
+)
+
+
+@contextlib.contextmanager
+def use_id_allocator(allocator: IdAllocator):
+    """Allocates the uids created by new_uid() with `allocator` in this
+    context."""
+    token = active_id_allocator.set(allocator)
+    try:
+        yield allocator
+    finally:
+        active_id_allocator.reset(token)
+
+
+def new_uid() -> str:
+    """Returns a new uid from the allocator in use, see IdAllocator"""
+    return active_id_allocator.get().new_uid()
+
 
 def test_pygraphviz(error_message):
     """Tests whether the pygraphviz package is installed.
@@ -0,0 +1,410 @@
+"""
+A compact binary encoding of CAST and GroMEt FN modules and collections.
+
+The encoding is MessagePack (https://msgpack.org) of the JSON form of the
+objects, compressed with zlib. Port names, function types, file names and the
+keys of every object are repeated many times in CAST and GroMEt. The deflate
+back-references of zlib replace every repeated string with a reference to its
+previous occurrence, so the strings are interned without the decoder having to
+resolve them one by one: decompressing and decoding both run in C.
+
+Decoding a packed document gives exactly the JSON form it was packed from,
+except that floats keep their full precision. unpackb uses the msgpack package
+if it is installed, which decodes faster than json.loads decodes the JSON form.
+Without it, unpackb falls back to a pure Python decoder, which is several
+times slower than json.loads, so the packed format only saves space then.
+"""
+
+import struct
+import zlib
+
+from skema.gromet.fn import GrometFNModule, GrometFNModuleCollection
+from skema.program_analysis.CAST2GrFN.cast import CAST
+from skema.utils.fold import del_nulls
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMAT_NAME = "skema-packed"
+FORMAT_VERSION = 2
+
+# Extension types
+BIG_INTEGER = 2
+
+# The first byte of the zlib streams written by dumps (deflate with a 32 KiB
+# window). The packed documents, which are MessagePack maps, never start with
+# it.
+ZLIB_HEADER = 0x78
+
+INT64_MIN = -(1 << 63)
+UINT64_MAX = (1 << 64) - 1
+
+# The first byte of the fixext types, by the size of their data
+FIXEXT_TYPES = {1: 0xD4, 2: 0xD5, 4: 0xD6, 8: 0xD7, 16: 0xD8}
+
+# The MessagePack types whose first byte is followed by a fixed size value
+UNPACK_FORMATS = {
+    0xCA: (">f", "value"),
+    0xCB: (">d", "value"),
+    0xCC: (">B", "value"),
+    0xCD: (">H", "value"),
+    0xCE: (">I", "value"),
+    0xCF: (">Q", "value"),
+    0xD0: (">b", "value"),
+    0xD1: (">h", "value"),
+    0xD2: (">i", "value"),
+    0xD3: (">q", "value"),
+    0xD9: (">B", "str"),
+    0xDA: (">H", "str"),
+    0xDB: (">I", "str"),
+    0xDC: (">H", "array"),
+    0xDD: (">I", "array"),
+    0xDE: (">H", "map"),
+    0xDF: (">I", "map"),
+    0xC4: (">B", "bin"),
+    0xC5: (">H", "bin"),
+    0xC6: (">I", "bin"),
+    0xC7: (">B", "ext"),
+    0xC8: (">H", "ext"),
+    0xC9: (">I", "ext"),
+}
+
+
+class PackingError(Exception):
+    """Raised when a value cannot be packed, or packed data cannot be
+    decoded."""
+
+    pass
+
+
+def gromet_default(o):
+    """Converts the objects that to_dict leaves in the JSON form of GroMEt
+    (e.g. metadata in lists of lists) the same way the GroMEt JSON writer
+    does."""
+    if hasattr(o, "to_dict"):
+        return del_nulls(o.to_dict())
+    return str(o)
+
+
+def ext_header(ext_type: int, n: int) -> bytes:
+    """Returns the bytes that start an extension object of n bytes."""
+    if n in FIXEXT_TYPES:
+        return bytes((FIXEXT_TYPES[n], ext_type))
+    elif n < 0x100:
+        return bytes((0xC7, n, ext_type))
+    elif n < 0x10000:
+        return struct.pack(">BHB", 0xC8, n, ext_type)
+    return struct.pack(">BIB", 0xC9, n, ext_type)
+
+
+def packb(value, default=None) -> bytes:
+    """Encodes a JSON value as MessagePack.
+
+    Args:
+        value: The value to encode.
+        default: Called with values that are not JSON values. It should return
+            a JSON value to encode in their place.
+
+    Raises:
+        PackingError: If value contains a value that is not a JSON value, and
+            default is not given.
+    """
+    parts = []
+    emit = parts.append
+    pack = struct.pack
+
+    def pack_string(s):
+        data = s.encode("utf-8")
+        n = len(data)
+        if n < 32:
+            emit(bytes((0xA0 | n,)))
+        elif n < 0x100:
+            emit(bytes((0xD9, n)))
+        elif n < 0x10000:
+            emit(pack(">BH", 0xDA, n))
+        else:
+            emit(pack(">BI", 0xDB, n))
+        emit(data)
+
+    def pack_int(i):
+        if 0 <= i <= UINT64_MAX:
+            if i < 0x100:
+                emit(bytes((0xCC, i)))
+            elif i < 0x10000:
+                emit(pack(">BH", 0xCD, i))
+            elif i < 0x100000000:
+                emit(pack(">BI", 0xCE, i))
+            else:
+                emit(pack(">BQ", 0xCF, i))
+        elif INT64_MIN <= i < 0:
+            if i >= -0x80:
+                emit(pack(">Bb", 0xD0, i))
+            elif i >= -0x8000:
+                emit(pack(">Bh", 0xD1, i))
+            elif i >= -0x80000000:
+                emit(pack(">Bi", 0xD2, i))
+            else:
+                emit(pack(">Bq", 0xD3, i))
+        else:
+            data = str(i).encode("ascii")
+            emit(ext_header(BIG_INTEGER, len(data)))
+            emit(data)
+
+    def pack_value(value):
+        cls = value.__class__
+        if cls is str:
+            pack_string(value)
+        elif cls is dict:
+            n = len(value)
+            if n < 16:
+                emit(bytes((0x80 | n,)))
+            elif n < 0x10000:
+                emit(pack(">BH", 0xDE, n))
+            else:
+                emit(pack(">BI", 0xDF, n))
+            for k, v in value.items():
+                pack_value(k)
+                pack_value(v)
+        elif cls is list or cls is tuple:
+            n = len(value)
+            if n < 16:
+                emit(bytes((0x90 | n,)))
+            elif n < 0x10000:
+                emit(pack(">BH", 0xDC, n))
+            else:
+                emit(pack(">BI", 0xDD, n))
+            for v in value:
+                pack_value(v)
+        elif value is None:
+            emit(b"\xc0")
+        elif cls is bool:
+            emit(b"\xc3" if value else b"\xc2")
+        elif cls is int:
+            if 0 <= value < 0x80:
+                emit(bytes((value,)))
+            elif -32 <= value < 0:
+                emit(bytes((value & 0xFF,)))
+            else:
+                pack_int(value)
+        elif cls is float:
+            emit(pack(">Bd", 0xCB, value))
+        elif isinstance(value, (str, bool, int, float, dict, list, tuple)):
+            # Subclasses of the JSON types, e.g. enums
+            for json_type in (str, bool, int, float, dict, list):
+                if isinstance(value, json_type):
+                    pack_value(json_type(value))
+                    break
+        elif default is not None:
+            pack_value(default(value))
+        else:
+            raise PackingError(f"Cannot pack a value of type {cls.__name__}")
+
+    pack_value(value)
+    return b"".join(parts)
+
+
+def unpack_extension(ext_type: int, data: bytes):
+    """Decodes an extension object."""
+    if ext_type == BIG_INTEGER:
+        return int(data.decode("ascii"))
+    raise PackingError(f"Unknown extension type {ext_type}")
+
+
+def unpack_python(data: bytes):
+    """Decodes the output of packb in pure Python. Arrays and maps are decoded
+    with an explicit stack, so deeply nested values do not hit the recursion
+    limit."""
+    pos = 0
+    unpack_from = struct.unpack_from
+    calcsize = struct.calcsize
+
+    # Each frame is an open array or map: the values decoded so far (keys and
+    # values alternate for maps), the number of values left, and whether it
+    # is a map
+    stack = []
+    try:
+        while True:
+            # Decode a scalar, or the size of a new array or map. The cases
+            # are ordered by how common they are in CAST and GroMEt.
+            b = data[pos]
+            pos += 1
+            size = None
+            if 0xA0 <= b < 0xC0:
+                end = pos + (b & 0x1F)
+                value = data[pos:end].decode("utf-8")
+                pos = end
+            elif b < 0x80:
+                value = b
+            elif b < 0x90:
+                size, is_map = (b & 0x0F) * 2, True
+            elif b < 0xA0:
+                size, is_map = b & 0x0F, False
+            elif b >= 0xE0:
+                value = b - 0x100
+            elif b == 0xC0:
+                value = None
+            elif b == 0xC2:
+                value = False
+            elif b == 0xC3:
+                value = True
+            elif 0xD4 <= b <= 0xD8:
+                # fixext of 1, 2, 4, 8 or 16 bytes
+                start = pos + 1
+                pos = start + (1 << (b - 0xD4))
+                if pos > len(data):
+                    raise IndexError
+                value = unpack_extension(data[start - 1], data[start:pos])
+            elif b in UNPACK_FORMATS:
+                fmt, kind = UNPACK_FORMATS[b]
+                (n,) = unpack_from(fmt, data, pos)
+                pos += calcsize(fmt)
+                if kind == "value":
+                    value = n
+                elif kind == "array":
+                    size, is_map = n, False
+                elif kind == "map":
+                    size, is_map = n * 2, True
+                else:
+                    if kind == "ext":
+                        pos += 1
+                    start = pos
+                    pos += n
+                    if pos > len(data):
+                        raise IndexError
+                    if kind == "str":
+                        value = data[start:pos].decode("utf-8")
+                    elif kind == "ext":
+                        value = unpack_extension(
+                            data[start - 1], data[start:pos]
+                        )
+                    else:
+                        value = data[start:pos]
+            else:
+                raise PackingError(
+                    f"Unsupported type byte {b:#x} at {pos - 1}"
+                )
+
+            if size:
+                stack.append([[], size, is_map])
+                continue
+            elif size == 0:
+                value = {} if is_map else []
+
+            # Add the value to its parent, and close the arrays and maps that
+            # have no values left
+            while stack:
+                frame = stack[-1]
+                frame[0].append(value)
+                frame[1] -= 1
+                if frame[1]:
+                    break
+                stack.pop()
+                value = frame[0]
+                if frame[2]:
+                    value = dict(zip(value[0::2], value[1::2]))
+            else:
+                break
+    except (IndexError, struct.error):
+        raise PackingError("Unexpected end of the packed data")
+    if pos != len(data):
+        raise PackingError(f"Unexpected data after the end of the value at {pos}")
+    return value
+
+
+def unpackb(data: bytes):
+    """Decodes a JSON value encoded with packb.
+
+    Raises:
+        PackingError: If data is not a valid encoding of a value.
+    """
+    if msgpack is None:
+        return unpack_python(data)
+
+    try:
+        return msgpack.unpackb(
+            data,
+            ext_hook=unpack_extension,
+            raw=False,
+            strict_map_key=False,
+        )
+    except (ValueError, msgpack.UnpackException) as e:
+        raise PackingError(str(e)) from e
+
+
+def dumps(obj, compress: bool = True) -> bytes:
+    """Encodes a CAST, GrometFNModule or GrometFNModuleCollection. If compress
+    is False, the output is plain MessagePack, which is about fifteen times as
+    large, and decodes a few milliseconds faster."""
+    if isinstance(obj, CAST):
+        document = {
+            "type": "CAST",
+            "cast_source_language": obj.cast_source_language,
+            "data": obj.to_json_object(),
+        }
+    elif isinstance(obj, (GrometFNModule, GrometFNModuleCollection)):
+        document = {
+            "type": type(obj).__name__,
+            "data": del_nulls(obj.to_dict()),
+        }
+    else:
+        raise PackingError(f"Cannot pack a {type(obj).__name__}")
+
+    document["format"] = FORMAT_NAME
+    document["version"] = FORMAT_VERSION
+    data = packb(document, default=gromet_default)
+    return zlib.compress(data) if compress else data
+
+
+def unpack_document(data: bytes) -> dict:
+    """Decodes the output of dumps into a dict holding the JSON form of the
+    object it encodes ("data"), its "type", and the "format" and "version".
+
+    Raises:
+        PackingError: If data is not a packed CAST or GroMEt document.
+    """
+    if data[:1] == bytes((ZLIB_HEADER,)):
+        try:
+            data = zlib.decompress(data)
+        except zlib.error as e:
+            raise PackingError(str(e)) from e
+    document = unpackb(data)
+    if not (
+        isinstance(document, dict)
+        and document.get("format") == FORMAT_NAME
+        and "data" in document
+    ):
+        raise PackingError("Not a packed CAST or GroMEt document")
+    if document.get("version") != FORMAT_VERSION:
+        raise PackingError(
+            f"Unsupported packed format version {document.get('version')}"
+        )
+    return document
+
+
+def loads(data: bytes):
+    """Decodes a CAST, GrometFNModule or GrometFNModuleCollection encoded with
+    dumps."""
+    document = unpack_document(data)
+    if document["type"] == "CAST":
+        return CAST.from_json_data(
+            document["data"], document["cast_source_language"]
+        )
+    elif document["type"] == "GrometFNModule":
+        return GrometFNModule.from_dict(document["data"])
+    elif document["type"] == "GrometFNModuleCollection":
+        return GrometFNModuleCollection.from_dict(document["data"])
+    raise PackingError(f"Unknown packed document type {document['type']}")
+
+
+def dump(obj, fp, compress: bool = True):
+    """Writes a CAST, GrometFNModule or GrometFNModuleCollection to the binary
+    file fp."""
+    fp.write(dumps(obj, compress))
+
+
+def load(fp):
+    """Reads a CAST, GrometFNModule or GrometFNModuleCollection from the binary
+    file fp."""
+    return loads(fp.read())
@@ -0,0 +1,243 @@
+"""
+Per-pass instrumentation of the AnnCast pipeline.
+
+A PipelineInstrumentation passed to ann_cast_pipeline records, for every pass
+run on every file, its wall time, the peak memory it allocated, the high-water
+mark of the resident memory of the process after it ran, and the number of
+AnnCast nodes of the file. The records can be written out as JSON or in the
+Prometheus text format, and one pass can be run under cProfile.
+
+The records and the profiles are plain data, so an instrumentation can be sent
+to a worker process (see fork and merge).
+"""
+
+import cProfile
+import contextlib
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+
+from skema.program_analysis.CAST2GrFN.ann_cast.annotated_cast import (
+    node_attributes,
+)
+from skema.program_analysis.CAST2GrFN.model.cast import AstNode
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def max_rss_bytes():
+    """Returns the high-water mark of the resident memory of the process, or
+    None where it is not available."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, and in kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def count_nodes(nodes) -> int:
+    """Returns the number of distinct AST nodes reachable from nodes through
+    the attributes of the nodes, and the lists and tuples in them."""
+    seen = set()
+    stack = list(nodes)
+    while stack:
+        value = stack.pop()
+        if isinstance(value, AstNode):
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            stack.extend(node_attributes(value).values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return len(seen)
+
+
+class ProfileData:
+    """The stats of a cProfile run, in the form pstats.Stats reads them from a
+    profiler."""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class PipelineInstrumentation:
+    """Records metrics of the passes of the AnnCast pipeline.
+
+    Args:
+        trace_memory: If True, the peak memory allocated by each pass is
+            measured with tracemalloc. This makes the passes several times
+            slower, so their wall times are not representative.
+        profile_pass: The name of a pass to run under cProfile.
+
+    Attributes:
+        records: A dict for every pass run, with the keys file, pass, seconds,
+            peak_memory_bytes, max_rss_bytes and nodes.
+        profiles: The cProfile stats of every run of profile_pass.
+    """
+
+    def __init__(self, trace_memory: bool = False, profile_pass: str = None):
+        self.trace_memory = trace_memory
+        self.profile_pass = profile_pass
+        self.records = []
+        self.profiles = []
+
+    def fork(self):
+        """Returns an empty instrumentation with the same settings."""
+        return PipelineInstrumentation(self.trace_memory, self.profile_pass)
+
+    def merge(self, other):
+        """Adds the records and profiles of other, e.g. a fork that ran in a
+        worker process."""
+        self.records.extend(other.records)
+        self.profiles.extend(other.profiles)
+
+    @contextlib.contextmanager
+    def measure(self, file_name: str, pass_name: str, nodes: int = None):
+        """Records the metrics of the pass run in the body of the with
+        statement."""
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        profiler = None
+        if pass_name == self.profile_pass:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                profiler.create_stats()
+                self.profiles.append(profiler.stats)
+            peak_memory = None
+            if tracing:
+                peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            self.records.append(
+                {
+                    "file": file_name,
+                    "pass": pass_name,
+                    "seconds": seconds,
+                    "peak_memory_bytes": peak_memory,
+                    "max_rss_bytes": max_rss_bytes(),
+                    "nodes": nodes,
+                }
+            )
+
+    def totals(self) -> dict:
+        """Returns the number of runs, the total and maximum wall time, and the
+        maximum peak memory of every pass, over all files."""
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(
+                record["pass"],
+                {
+                    "count": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                    "max_peak_memory_bytes": None,
+                },
+            )
+            total["count"] += 1
+            total["total_seconds"] += record["seconds"]
+            total["max_seconds"] = max(total["max_seconds"], record["seconds"])
+            if record["peak_memory_bytes"] is not None:
+                total["max_peak_memory_bytes"] = max(
+                    total["max_peak_memory_bytes"] or 0,
+                    record["peak_memory_bytes"],
+                )
+        return totals
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"passes": self.records, "totals": self.totals()}, indent=2
+        )
+
+    def to_prometheus(self) -> str:
+        metrics = [
+            ("skema_pass_seconds", "Wall time of an AnnCast pass", "seconds"),
+            (
+                "skema_pass_peak_memory_bytes",
+                "Peak memory allocated by an AnnCast pass",
+                "peak_memory_bytes",
+            ),
+            (
+                "skema_pass_max_rss_bytes",
+                "Maximum resident memory of the process after an AnnCast pass",
+                "max_rss_bytes",
+            ),
+            ("skema_pass_nodes", "AnnCast nodes of the file", "nodes"),
+        ]
+        return format_prometheus(
+            (
+                name,
+                description,
+                "gauge",
+                [
+                    ({"file": r["file"], "pass": r["pass"]}, r[key])
+                    for r in self.records
+                ],
+            )
+            for name, description, key in metrics
+        )
+
+    def write(self, path: str, metrics_format: str = "json"):
+        """Writes the records to path, as "json" or "prometheus"."""
+        with open(path, "w") as f:
+            if metrics_format == "prometheus":
+                f.write(self.to_prometheus())
+            else:
+                f.write(self.to_json())
+
+    def write_profile(self, path: str):
+        """Writes the combined cProfile stats of every run of profile_pass to
+        path, in the format of cProfile.Profile.dump_stats."""
+        if not self.profiles:
+            return
+        stats = pstats.Stats(*(ProfileData(p) for p in self.profiles))
+        stats.dump_stats(path)
+
+
+def escape_label(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def format_prometheus(metrics) -> str:
+    """Formats metrics in the Prometheus text exposition format.
+
+    Args:
+        metrics: (name, help, type, samples) tuples, where samples is a list of
+            (labels, value) pairs. Samples whose value is None are left out.
+    """
+    lines = []
+    for name, description, metric_type, samples in metrics:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            if value is None:
+                continue
+            label_text = ",".join(
+                f'{k}="{escape_label(v)}"' for k, v in labels.items()
+            )
+            if label_text:
+                lines.append(f"{name}{{{label_text}}} {value}")
+            else:
+                lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,364 @@
+"""
+Compiled serializers for the Swagger generated GroMEt and CAST model classes.
+
+The generated to_dict of every model class loops over its swagger_types, and
+calls a property getter, isinstance and hasattr on every attribute of every
+object. A ModelSchema instead generates, once per class, a to_dict function
+and a from_dict function specialized to the attributes of the class. They read
+and write the private attributes behind the generated properties directly, and
+only fall back to the generic conversion for values that are not plain JSON
+scalars.
+
+The compiled to_dict returns exactly what the generated one does. The compiled
+from_dict builds an object from a dict in the format that to_dict returns,
+decoding the nested model objects according to the swagger_types.
+"""
+
+import importlib
+import keyword
+import re
+
+# Values of these types are returned by to_dict as they are
+PLAIN_TYPES = frozenset({str, int, float, bool, type(None)})
+
+# Swagger types whose values are stored as they are read from JSON
+PRIMITIVE_TYPES = frozenset(
+    {"str", "int", "float", "bool", "object", "date", "datetime"}
+)
+
+LIST_TYPE = re.compile(r"list\[(.*)\]$")
+DICT_TYPE = re.compile(r"dict\(([^,]*), (.*)\)$")
+
+
+def convert_value(value):
+    """Converts an attribute value that is not a plain scalar, the same way the
+    generated to_dict does."""
+    if isinstance(value, list):
+        return [
+            x
+            if x.__class__ in PLAIN_TYPES
+            else x.to_dict()
+            if hasattr(x, "to_dict")
+            else x
+            for x in value
+        ]
+    elif hasattr(value, "to_dict"):
+        return value.to_dict()
+    elif isinstance(value, dict):
+        return {
+            k: v.to_dict() if hasattr(v, "to_dict") else v
+            for k, v in value.items()
+        }
+    return value
+
+
+def is_identifier(name: str) -> bool:
+    return name.isidentifier() and not keyword.iskeyword(name)
+
+
+class ModelSchema:
+    """The model classes generated from one Swagger schema, and their compiled
+    serializers.
+
+    Args:
+        package_names: The packages the model classes of the schema are
+            defined in. A type name in swagger_types is looked up in the package
+            of the class that uses it first, then in the other packages in the
+            order they are given.
+    """
+
+    def __init__(self, *package_names: str):
+        self.package_names = package_names
+        self.models = set()
+        self.generated_to_dict = {}
+        self.to_dict_functions = {}
+        self.from_dict_functions = {}
+        self.constructors = {}
+        self.discriminators = {}
+        self.field_decoders = {}
+
+        # Shared by all the classes, so that subclasses which extend a
+        # generated to_dict with super().to_dict() still get the attributes of
+        # their own swagger_types
+        to_dict_functions = self.to_dict_functions
+        compile_to_dict = self.compile_to_dict
+
+        def to_dict(self):
+            """Returns the model properties as a dict"""
+            function = to_dict_functions.get(self.__class__)
+            if function is None:
+                function = compile_to_dict(self.__class__)
+            return function(self)
+
+        self.to_dict = to_dict
+
+    def install(self, package_name: str, from_dict: bool = True):
+        """Replaces the generated to_dict of the model classes of a package
+        with the compiled one. If from_dict is True, the classes also get a
+        from_dict classmethod."""
+        schema = self
+
+        def model_from_dict(cls, data):
+            """Returns an instance of the model built from a dict in the format
+            returned by to_dict"""
+            return schema.from_dict(cls, data)
+
+        package = importlib.import_module(package_name)
+        for cls in vars(package).values():
+            if not self.is_model_class(cls, package_name):
+                continue
+            self.models.add(cls)
+            if "to_dict" in vars(cls) and not issubclass(cls, dict):
+                self.generated_to_dict[cls] = vars(cls)["to_dict"]
+                cls.to_dict = self.to_dict
+            if from_dict:
+                cls.from_dict = classmethod(model_from_dict)
+
+    def use_compiled(self, enabled: bool):
+        """Switches the installed classes between the compiled to_dict and the
+        generated one. Used to compare the two."""
+        for cls, function in self.generated_to_dict.items():
+            cls.to_dict = self.to_dict if enabled else function
+
+    @staticmethod
+    def is_model_class(cls, package_name: str) -> bool:
+        return (
+            isinstance(cls, type)
+            and hasattr(cls, "swagger_types")
+            and cls.__module__.startswith(package_name + ".")
+        )
+
+    def add_discriminator(self, base, field: str, aliases: dict = None):
+        """Decodes values of type base as the subclass of base that the value
+        of field selects. The value of field that selects a subclass is the
+        default value of the field in that subclass.
+
+        Args:
+            base: The base model class.
+            field: The name of the discriminating attribute.
+            aliases: Other values of field, mapped to the subclass they
+                select.
+        """
+        classes = {}
+        for cls in self.models:
+            if cls is not base and issubclass(cls, base):
+                value = getattr(cls(), field, None)
+                if value is not None:
+                    classes[value] = cls
+        classes.update(aliases or {})
+        self.discriminators[base] = (field, classes)
+
+    def add_field_decoder(self, cls, attr: str, decoder):
+        """Decodes the attribute attr of cls with decoder(value, data), where
+        data is the dict the whole object is decoded from. Used for attributes
+        of type object whose type depends on the other attributes."""
+        self.field_decoders[(cls, attr)] = decoder
+
+    def resolve(self, type_name: str, owner):
+        """Returns the model class called type_name, as referenced from the
+        class owner, or None if there isn't one."""
+        owner_package = owner.__module__.rsplit(".", 1)[0]
+        package_names = [owner_package] + [
+            name for name in self.package_names if name != owner_package
+        ]
+        for package_name in package_names:
+            package = importlib.import_module(package_name)
+            cls = getattr(package, type_name, None)
+            if self.is_model_class(cls, package_name):
+                return cls
+        return None
+
+    def attribute_slot(self, cls, attr: str) -> str:
+        """Returns the name of the instance attribute that stores attr. That is
+        the private attribute behind a generated property, or attr itself."""
+        for klass in cls.__mro__:
+            if attr in vars(klass):
+                if isinstance(vars(klass)[attr], property) and (
+                    klass in self.models
+                ):
+                    return "_" + attr
+                break
+        return attr
+
+    def compile_to_dict(self, cls):
+        """Generates the to_dict function of cls."""
+        lines = ["def to_dict(self):"]
+        items = []
+        for i, attr in enumerate(cls.swagger_types):
+            slot = self.attribute_slot(cls, attr)
+            if is_identifier(slot):
+                lines.append(f"    v{i} = self.{slot}")
+            else:
+                lines.append(f"    v{i} = getattr(self, {slot!r})")
+            lines.append(f"    if v{i}.__class__ not in PLAIN_TYPES:")
+            lines.append(f"        v{i} = convert_value(v{i})")
+            items.append(f"{attr!r}: v{i}")
+        lines.append(f"    return {{{', '.join(items)}}}")
+
+        namespace = {
+            "PLAIN_TYPES": PLAIN_TYPES,
+            "convert_value": convert_value,
+        }
+        exec("\n".join(lines), namespace)
+        function = namespace["to_dict"]
+        self.to_dict_functions[cls] = function
+        return function
+
+    def from_dict(self, cls, data: dict):
+        """Builds an instance of cls, or of the subclass of cls that data
+        selects, from a dict in the format returned by to_dict."""
+        discriminator = self.discriminators.get(cls)
+        if discriminator is not None:
+            field, classes = discriminator
+            cls = classes.get(data.get(field), cls)
+        function = self.from_dict_functions.get(cls)
+        if function is None:
+            function = self.compile_from_dict(cls, decode=True)
+        return function(data)
+
+    def construct(self, cls, fields: dict):
+        """Builds an instance of cls from already decoded attribute values. This
+        is equivalent to cls(**fields), but does not go through __init__ and
+        the property setters.
+
+        Raises:
+            TypeError: If fields has a key that is not an attribute of cls.
+        """
+        function = self.constructors.get(cls)
+        if function is None:
+            function = self.compile_from_dict(cls, decode=False)
+        return function(fields)
+
+    def model_decoder(self, cls):
+        """Returns a function that decodes a value of type cls."""
+        if cls in self.discriminators:
+            from_dict = self.from_dict
+            return lambda value: (
+                from_dict(cls, value) if value.__class__ is dict else value
+            )
+
+        functions = self.from_dict_functions
+        compile_from_dict = self.compile_from_dict
+
+        def decode(value):
+            if value.__class__ is not dict:
+                return value
+            function = functions.get(cls)
+            if function is None:
+                function = compile_from_dict(cls, decode=True)
+            return function(value)
+
+        return decode
+
+    def type_decoder(self, type_name: str, owner):
+        """Returns a function that decodes a value of the swagger type
+        type_name, or None if values of the type are stored as they are."""
+        if type_name in PRIMITIVE_TYPES:
+            return None
+
+        match = LIST_TYPE.match(type_name)
+        if match:
+            decode_item = self.type_decoder(match.group(1), owner)
+            if decode_item is None:
+                return None
+            return lambda value: (
+                [decode_item(x) for x in value]
+                if value.__class__ is list
+                else value
+            )
+
+        match = DICT_TYPE.match(type_name)
+        if match:
+            decode_item = self.type_decoder(match.group(2), owner)
+            if decode_item is None:
+                return None
+            return lambda value: (
+                {k: decode_item(v) for k, v in value.items()}
+                if value.__class__ is dict
+                else value
+            )
+
+        cls = self.resolve(type_name, owner)
+        if cls is None or not (cls.swagger_types or cls in self.discriminators):
+            # Enumerations are generated as classes without attributes, and
+            # their values are plain strings
+            return None
+        return self.model_decoder(cls)
+
+    def compile_from_dict(self, cls, decode: bool):
+        """Generates the function that builds an instance of cls from a dict.
+
+        Args:
+            decode: If True, the values of the dict are decoded according to
+                the swagger_types of cls, and keys that are not attributes of
+                cls are set as plain attributes. Otherwise the values are
+                stored as they are, and unknown keys are an error.
+        """
+        template = vars(cls())
+        if all(v.__class__ in PLAIN_TYPES for v in template.values()):
+            create = "obj = new(cls)\n    d = obj.__dict__\n    d.update(template)"
+        else:
+            create = "obj = cls()\n    d = obj.__dict__"
+
+        namespace = {
+            "cls": cls,
+            "new": object.__new__,
+            "template": template,
+            "MISSING": object(),
+        }
+        lines = ["def from_dict(data):", "    " + create, "    n = 0"]
+        for i, (attr, type_name) in enumerate(cls.swagger_types.items()):
+            key = cls.attribute_map.get(attr, attr)
+            slot = self.attribute_slot(cls, attr)
+            value = "v"
+            if decode:
+                field_decoder = self.field_decoders.get((cls, attr))
+                if field_decoder is not None:
+                    namespace[f"decode_{i}"] = field_decoder
+                    value = f"decode_{i}(v, data)"
+                else:
+                    decoder = self.type_decoder(type_name, cls)
+                    if decoder is not None:
+                        namespace[f"decode_{i}"] = decoder
+                        value = f"decode_{i}(v)"
+            lines.append(f"    v = data.get({key!r}, MISSING)")
+            lines.append("    if v is not MISSING:")
+            lines.append("        n += 1")
+            if slot != attr:
+                lines.append(f"        d[{slot!r}] = {value}")
+            else:
+                lines.append(f"        setattr(obj, {slot!r}, {value})")
+
+        lines.append("    if n != len(data):")
+        lines.append("        set_unknown(obj, data)")
+        lines.append("    return obj")
+
+        known = {cls.attribute_map.get(a, a) for a in cls.swagger_types}
+        if decode:
+
+            def set_unknown(obj, data):
+                for key, value in data.items():
+                    if key not in known:
+                        setattr(obj, key, value)
+
+        else:
+
+            def set_unknown(obj, data):
+                unknown = sorted(set(data) - known)
+                raise TypeError(
+                    f"{cls.__name__} got unexpected fields: {unknown}"
+                )
+
+        namespace["set_unknown"] = set_unknown
+        exec("\n".join(lines), namespace)
+        function = namespace["from_dict"]
+        if decode:
+            self.from_dict_functions[cls] = function
+        else:
+            self.constructors[cls] = function
+        return function
+
+
+GROMET_SCHEMA = ModelSchema("skema.gromet.fn", "skema.gromet.metadata")
+
+CAST_SCHEMA = ModelSchema("skema.program_analysis.CAST2GrFN.model.cast")